@@ -1,124 +1,191 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import easyocr
 import cv2
 import numpy as np
-import re
+import hashlib
+import json
 import os
+import tempfile
+import threading
+import time
+import uuid
+
+from ocr.backends import create_reader
+from ocr.invoice import stream_invoice
+from ocr.jobs import jobs_blueprint, open_queue
+from ocr.pipeline import ScanPipeline
+from ocr.profiling import open_profiling, profiler
+from ocr.store import open_store
+from ocr.strategies import STRATEGIES, get_strategy, open_shadow, run_strategy
+from ocr.tray import scan_tray
+from orientation import auto_orient
+from straighten import extract_label
 
 app = Flask(__name__)
 CORS(app)
 
-print('Initializing EasyOCR...')
-reader = easyocr.Reader(['en'], gpu=False)
-print('EasyOCR ready!')
-
-def extract_imei(text):
-    match = re.search(r'IMEI[:\s]*([0-9]{15})', text, re.IGNORECASE)
-    if match:
-        return match.group(1)
-    cleaned = re.sub(r'\s+', '', text)
-    matches = re.findall(r'\b[0-9]{15}\b', cleaned)
-    return matches[0] if matches else None
-
-def extract_serial(text):
-    patterns = [r'S/N[:\s]*([A-Z0-9]{8,})', r'Serial[:\s]*([A-Z0-9]{8,})']
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
-    return None
-
-def extract_model(text):
-    text = text.replace('IPhone 114', 'iPhone 14').replace('IPhone 4', 'iPhone 14')
-    samsung = re.search(r'Samsung\s+Galaxy\s+([A-Z0-9+\s]+?)\s*,?\s*\d+', text, re.IGNORECASE)
-    if samsung:
-        return f"Samsung Galaxy {samsung.group(1).strip()}"
-    iphone = re.search(r'(iPhone|iPad)\s+(\d+\s*(?:Pro\s*Max|Pro|Max|Plus|Mini)?)', text, re.IGNORECASE)
-    if iphone:
-        return f"{iphone.group(1)} {iphone.group(2)}"
-    return None
-
-def extract_storage(text):
-    match = re.search(r',?\s*(\d{2,4})\s*(?:GB)?\s*[,\s]', text)
-    if match:
-        storage = int(match.group(1))
-        if storage in [64, 128, 256, 512, 1024, 2048]:
-            return f"{storage}GB"
-    return None
-
-def extract_color(text):
-    colors = {
-        'Phantom Black': r'Phantom\s+Black',
-        'Starlight': r'Starlight',
-        'Midnight': r'Midnight',
-        'Sierra Blue': r'Sierra\s+Blue',
-    }
-    for color, pattern in colors.items():
-        if re.search(pattern, text, re.IGNORECASE):
-            return color
-    for color in ['Black', 'White', 'Blue', 'Red', 'Green', 'Purple', 'Gold', 'Silver']:
-        if re.search(rf'\b{color}\b', text, re.IGNORECASE):
-            return color
-    return None
-
-def extract_recipient(text):
-    noise = ['SHIP TO', 'UDEAL INC', 'EAST MEADOW', 'HUDSON ST', 'UPS GROUND', 'USPS GROUND']
-    patterns = [
-        r'([A-Z]+\s+[A-Z]+)\s+X-\d+',
-        r'SHIP\s+TO[:\s]+([A-Z]+\s+[A-Z]+)',
-        r'SHIP\s+([A-Z]+\s+[A-Z]+)\s+TO[:\s]',
-        r'([A-Z]{3,}\s+[A-Z]{3,})\s+PO\s+BOX',
-        r'([A-Z]{3,}\s+[A-Z]{3,})\s+\d{3,5}\s+[A-Z]',
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text)
-        if match:
-            name = re.sub(r'\s+', ' ', match.group(1).strip())
-            if len(name) > 5 and name not in noise:
-                return name
-    return None
-
-def extract_address(text):
-    patterns = [
-        r'(PO\s+BOX\s+\d+)',
-        r'(\d{3,5}\s+[A-Z]{1,3}\s+\d+(?:ST|ND|RD|TH)\s+(?:ST|STREET|AVE|AVENUE|BLVD|DR|DRIVE|CT|LN))',
-        r'(\d{3,5}\s+[A-Z]\s+[A-Z]+\s+(?:ST|STREET|AVE|AVENUE|BLVD|DR|DRIVE|CT|LN))',
-        r'(\d{3,5}\s+[A-Z\s]+?(?:STREET|ST|AVENUE|AVE|BLVD|DRIVE|DR|COURT|CT))',
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            addr = re.sub(r'\s+', ' ', match.group(1).strip())
-            if not re.search(r'HUDSON|MEADOW', addr, re.IGNORECASE):
-                return addr
-    return None
-
-def extract_tracking(text):
-    cleaned = re.sub(r'\s+', '', text)
-    for carrier, pattern in [('UPS', r'1Z[A-Z0-9]{16}'), ('USPS', r'(94|93|92|95)\d{20,22}')]:
-        match = re.search(pattern, cleaned)
-        if match:
-            return match.group(0), carrier
-    return None, None
-
-def extract_location(text):
-    text = text.replace("FL'", "FL").replace("'", "")
-    states = r'(AL|AK|AZ|AR|CA|CO|CT|DE|FL|GA|HI|ID|IL|IN|IA|KS|KY|LA|ME|MD|MA|MI|MN|MS|MO|MT|NE|NV|NH|NJ|NM|NY|NC|ND|OH|OK|OR|PA|RI|SC|SD|TN|TX|UT|VT|VA|WA|WV|WI|WY)'
-    pattern = rf'\b([A-Z]{{3,}})\s+{states}\s+(\d{{5}}(?:-\d{{4}})?)\b'
-    locations = []
-    for match in re.finditer(pattern, text):
-        city = match.group(1)
-        state = match.group(2)
-        zip_code = match.group(3)
-        if city not in ['EAST', 'MEADOW', 'HUDSON', 'UPS', 'USPS', 'GROUND', 'ADVANTAGE']:
-            locations.append({'city': city, 'state': state, 'zip': zip_code})
-    non_ny = next((loc for loc in locations if loc['state'] != 'NY'), None)
-    return non_ny or (locations[-1] if locations else None)
+# OCR_STRATEGY picks the strategy that answers /scan (full-v1, full-v2, dual-v2)
+strategy = get_strategy(os.getenv('OCR_STRATEGY', 'full-v1'))
+
+# Filled in by create_app(). Importing this module loads nothing, so spawned
+# invoice and pipeline workers that re-import __main__ stay light.
+pipeline = None
+reader = None
+store = None
+shadow = None
+jobs = None
+
+PIPELINE_TIMEOUT = int(os.getenv('PIPELINE_TIMEOUT', 120))
+
+reader_lock = threading.Lock()
+
+def get_reader():
+    """The one Reader every strategy shares; in pipeline mode it is loaded on first use."""
+    global reader
+    with reader_lock:
+        if reader is None:
+            reader = create_reader()
+    return reader
+
+def record_scan(scan_strategy, passes, device_info, shipping_info, data, size):
+    if not store:
+        return
+    try:
+        store.record(scan_strategy.name, scan_strategy.extractors, passes, device_info, shipping_info,
+                     image_sha1=hashlib.sha1(data).hexdigest(), size=size)
+    except Exception as e:
+        print(f'OCR store error: {e}')
 
 @app.route('/health')
 def health():
-    return jsonify({'status': 'healthy'})
+    return jsonify({'status': 'healthy', 'strategy': strategy.name})
+
+@app.route('/strategies')
+def strategies():
+    return jsonify({
+        'active': strategy.name,
+        'shadow': shadow.candidate.name if shadow else None,
+        'strategies': {name: {'passes': list(s.passes), 'extractors': s.extractors} for name, s in STRATEGIES.items()},
+        'shadow_runs': store.shadow_summary() if store else [],
+    })
+
+def run_scan(data, scan_strategy=None):
+    scan_strategy = scan_strategy or strategy
+    if pipeline and scan_strategy is strategy:
+        print(f'=== EASYOCR {scan_strategy.name} (pipeline) ===')
+        result = pipeline.scan(data, PIPELINE_TIMEOUT)
+        device_info, shipping_info = result['device'], result['shipping']
+        print(f'Device: {device_info}')
+        print(f'Shipping: {shipping_info}')
+        print('==============================\n')
+        record_scan(scan_strategy, result['passes'], device_info, shipping_info, data, result['size'])
+        return {
+            'success': True,
+            'device': device_info,
+            'shipping': shipping_info,
+            'orientation': result['orientation'],
+            'raw_text': result['texts']['full']
+        }
+
+    nparr = np.frombuffer(data, np.uint8)
+    image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError('Could not decode image')
+
+    print(f'=== EASYOCR {scan_strategy.name} ===')
+
+    image, angle, confidence = auto_orient(image)
+    print(f'Orientation: {angle}° (confidence {confidence:.2f})')
+
+    start = time.perf_counter()
+    results, texts, device_info, shipping_info = run_strategy(get_reader(), scan_strategy, image)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    for name, text in texts.items():
+        print(f'{name.capitalize()} ({len(text)}): {text[:150]}')
+    print(f'Device: {device_info}')
+    print(f'Shipping: {shipping_info}')
+    print('==============================\n')
+
+    record_scan(scan_strategy, results, device_info, shipping_info, data, (image.shape[1], image.shape[0]))
+    if shadow:
+        shadow.maybe_submit(image, scan_strategy, (device_info, shipping_info), elapsed_ms)
+
+    return {
+        'success': True,
+        'device': device_info,
+        'shipping': shipping_info,
+        'orientation': {'angle': angle, 'confidence': confidence},
+        'raw_text': texts['full']
+    }
+
+def run_tray(data):
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError('Could not decode image')
+    print('=== EASYOCR TRAY ===')
+    devices = scan_tray(get_reader(), image)
+    for device in devices:
+        print(f"Device {device['bbox']}: {device.get('imei')} {device.get('model')}")
+    print(f'{len(devices)} devices\n')
+    return {'success': True, 'mode': 'tray', 'devices': devices, 'count': len(devices)}
+
+def run_straighten(data, params):
+    # Same as `straighten.py image_path out_path label_box` without a python3 spawn per label. The
+    # photo comes with the job and the label goes to the queue's files dir, served at /jobs/files/<output>
+    name = uuid.uuid4().hex + '.jpg'
+    with tempfile.NamedTemporaryFile(suffix='.img') as photo:
+        photo.write(data)
+        photo.flush()
+        with profiler.request('straighten'):
+            result = json.loads(extract_label(photo.name, os.path.join(jobs.files, name), params.get('label_box')))
+    if result.get('success'):
+        result['output'] = name
+    return result
+
+def run_invoice(data, params=None):
+    print('=== INVOICE ===')
+    for result in stream_invoice(data):
+        if 'success' not in result:
+            print(f"Page {result['page']}: {result['items']} items so far")
+    print(f"{result['pages']} pages, {len(result['items'])} items\n")
+    return result
+
+def run_scan_job(data, params):
+    if params.get('mode') == 'tray':
+        with profiler.request('tray'):
+            return run_tray(data)
+    with profiler.request('scan'):
+        return run_scan(data, get_strategy(params['strategy']) if params.get('strategy') else None)
+
+def create_app():
+    """Load the Reader (or start the pipeline), open the store, shadow and job queue; once."""
+    global pipeline, reader, store, shadow, jobs
+    if jobs is not None:
+        return app
+
+    # SCAN_PIPELINE=1 runs decode, OCR and extraction in separate process pools;
+    # the OCR workers load their own Readers, so skip the in-process one. Template
+    # zones need the label found first, so that strategy always runs in-process.
+    if os.getenv('SCAN_PIPELINE') == '1' and not strategy.templates:
+        pipeline = ScanPipeline(strategy.extractors, passes=strategy.passes).start()
+    else:
+        print(f'Initializing EasyOCR ({strategy.name})...')
+        reader = create_reader()
+        print('EasyOCR ready!')
+
+    store = open_store()
+    shadow = open_shadow(get_reader, store)
+
+    # Async job API (POST /jobs, GET /jobs/<id>, GET /jobs/<id>/events)
+    jobs = open_queue({'scan': run_scan_job, 'straighten': run_straighten, 'invoice': run_invoice},
+                      params={'scan': ('mode', 'strategy'), 'straighten': ('label_box',), 'invoice': ()}).start()
+    app.register_blueprint(jobs_blueprint(jobs, os.getenv('OCR_JOBS_TOKEN')))
+
+    # /debug/profile, only when OCR_DEBUG_TOKEN is set
+    debug = open_profiling()
+    if debug:
+        app.register_blueprint(debug)
+    return app
 
 @app.route('/scan', methods=['POST'])
 def scan():
@@ -127,66 +194,45 @@ def scan():
         if not file:
             return jsonify({'success': False, 'error': 'No image'}), 400
 
-        nparr = np.frombuffer(file.read(), np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        print('=== EASYOCR ===')
-        results = reader.readtext(image)
-        text = ' '.join([result[1] for result in results])
-        print(f'Text: {text[:400]}')
-
-        device_info = {}
-        shipping_info = {}
-
-        imei = extract_imei(text)
-        if imei:
-            device_info['imei'] = imei
-            print(f'IMEI: {imei}')
-
-        serial = extract_serial(text)
-        if serial:
-            device_info['serial'] = serial
-            print(f'Serial: {serial}')
-
-        model = extract_model(text)
-        if model:
-            device_info['model'] = model
-            print(f'Model: {model}')
-
-        storage = extract_storage(text)
-        if storage:
-            device_info['storage'] = storage
-            print(f'Storage: {storage}')
-
-        color = extract_color(text)
-        if color:
-            device_info['color'] = color
-            print(f'Color: {color}')
-
-        tracking, carrier = extract_tracking(text)
-        if tracking:
-            shipping_info['tracking_number'] = tracking
-            shipping_info['carrier'] = carrier
-            print(f'Tracking: {tracking} ({carrier})')
-
-        recipient = extract_recipient(text)
-        if recipient:
-            shipping_info['recipient_name'] = recipient
-            print(f'Recipient: {recipient}')
-
-        address = extract_address(text)
-        if address:
-            shipping_info['street_address'] = address
-            print(f'Address: {address}')
-
-        location = extract_location(text)
-        if location:
-            shipping_info.update(location)
-            print(f'Location: {location["city"]}, {location["state"]} {location["zip"]}')
-
-        print('===\n')
-        address = extract_address(text, shipping_info.get("recipient_name"))
-        return jsonify({'success': True, 'device': device_info, 'shipping': shipping_info, 'raw_text': text})
+        # Optional per-request override, e.g. strategy=dual-v2
+        scan_strategy = request.values.get('strategy')
+        try:
+            scan_strategy = get_strategy(scan_strategy) if scan_strategy else None
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        data = file.read()
+
+        if request.values.get('mode') == 'tray':
+            with profiler.request('tray'):
+                return jsonify(run_tray(data))
+        with profiler.request('scan'):
+            return jsonify(run_scan(data, scan_strategy))
+    except Exception as e:
+        print(f'ERROR: {e}')
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/invoice', methods=['POST'])
+def invoice():
+    file = request.files.get('file') or request.files.get('image')
+    if not file:
+        return jsonify({'success': False, 'error': 'No file'}), 400
+    data = file.read()
+
+    if request.values.get('stream') == '1':
+        # NDJSON: one progress line per page as it completes, then the full result
+        def stream():
+            try:
+                for line in stream_invoice(data):
+                    yield json.dumps(line) + '\n'
+            except Exception as e:
+                yield json.dumps({'success': False, 'error': str(e)}) + '\n'
+        return Response(stream(), mimetype='application/x-ndjson')
+
+    try:
+        return jsonify(run_invoice(data))
     except Exception as e:
         print(f'ERROR: {e}')
         import traceback
@@ -194,5 +240,4 @@ def scan():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 if __name__ == '__main__':
-    port = int(os.getenv('PORT', 8080))
-    app.run(host='0.0.0.0', port=port)
+    create_app().run(host='0.0.0.0', port=int(os.getenv('PORT', 8080)))
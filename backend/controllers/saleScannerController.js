@@ -85,16 +85,17 @@ exports.scanLabel = async (req, res) => {
     let cropSuccess = false;
 
     try {
-      const { execFileSync } = require('child_process');
+      const { execFile } = require('child_process');
+      const { promisify } = require('util');
       const scriptPath = path.join(__dirname, '../scripts/straighten.py');
 
       console.log('🔍 Extracting & enhancing label...');
       let pythonOutput = '';
       try {
-        pythonOutput = execFileSync('python3', [scriptPath, fullPath, labelPath, geminiBoxStr], {
-          encoding: 'utf-8',
-          stdio: ['ignore', 'pipe', 'pipe']
-        });
+        // Async so one slow label doesn't block the event loop for every other request
+        ({ stdout: pythonOutput } = await promisify(execFile)('python3', [scriptPath, fullPath, labelPath, geminiBoxStr], {
+          encoding: 'utf-8'
+        }));
       } catch (pyErr) {
         pythonOutput = pyErr.stdout || '';
         console.error('Script stderr:', pyErr.stderr || '');
@@ -103,6 +104,9 @@ exports.scanLabel = async (req, res) => {
       const pyResult = JSON.parse(pythonOutput.trim());
       if (pyResult.success) {
         console.log(`✅ Label extracted via: ${pyResult.method}`);
+        if (pyResult.orientation) {
+          console.log(`↻ Orientation: ${pyResult.orientation.angle}° (confidence ${pyResult.orientation.confidence})`);
+        }
         cropSuccess = true;
       } else {
         console.error('❌ Extraction failed:', pyResult.error);
@@ -0,0 +1,153 @@
+import cv2
+import numpy as np
+
+# Below this the text signal is too weak to trust (blank or barcode-only crops)
+MIN_CONFIDENCE = 0.3
+# Portrait label crops are nearly always upright already; flipping one takes a much
+# stronger signal: on 177 upright synthetic photos (bubble wrap, blur, glare) none was
+# flipped, while 7 of 35 upside-down ones still were.
+PORTRAIT_FLIP_CONFIDENCE = 0.85
+# Share of each side of a label crop ignored when reading its text: the crop is padded
+# and tilted, so its margins hold background (bubble wrap rims read as text lines)
+CROP_MARGIN = 0.06
+
+ROTATIONS = {
+    90: cv2.ROTATE_90_CLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_COUNTERCLOCKWISE,
+}
+
+
+def rotate(image, angle):
+    """Rotate clockwise by 0/90/180/270 degrees."""
+    return cv2.rotate(image, ROTATIONS[angle]) if angle in ROTATIONS else image
+
+
+def _binarize(image, long_edge=400):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    h, w = gray.shape[:2]
+    scale = long_edge / float(max(h, w))
+    if scale < 1.0:
+        gray = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    # Local threshold so cardboard or bubble wrap around the label isn't counted as ink; ink = 1
+    ink = cv2.adaptiveThreshold(gray, 1, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 15, 15)
+
+    # Keep character-sized blobs only: label edges, rules and barcodes carry no reading direction
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    limit = 0.08 * max(ink.shape)
+    keep = (np.maximum(stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]) <= limit) & \
+           (stats[:, cv2.CC_STAT_AREA] >= 3)
+    keep[0] = False
+    return keep[labels].astype(np.uint8)
+
+
+def _gap_fraction(profile):
+    """
+    Share of empty lines inside the bulk of the ink. Projected across horizontal
+    text, the gaps between text lines are empty; projected along it, almost no
+    column misses every line.
+    """
+    profile = profile.astype(np.float64)
+    total = profile.sum()
+    if total <= 0:
+        return 0.0
+    cumulative = np.cumsum(profile) / total
+    start, end = np.searchsorted(cumulative, 0.05), np.searchsorted(cumulative, 0.95)
+    band = profile[start:end + 1]
+    return float((band <= 0.05 * profile.max()).mean())
+
+
+def _text_lines(ink):
+    rows = ink.sum(axis=1)
+    on = rows > 0.05 * rows.max() if rows.max() else np.zeros_like(rows, dtype=bool)
+    lines, start = [], None
+    for y, v in enumerate(list(on) + [False]):
+        if v and start is None:
+            start = y
+        elif not v and start is not None:
+            if y - start >= 3:
+                lines.append((start, y))
+            start = None
+    return lines
+
+
+def _upright_score(ink):
+    """
+    > 0 when horizontal text reads upright, < 0 when it is upside down.
+    Label and sticker text is left-aligned (ragged right edge), and mixed-case
+    lines carry more ink below their middle than above it.
+    """
+    starts, ends, offsets = [], [], []
+    for top, bottom in _text_lines(ink):
+        band = ink[top:bottom]
+        cols = np.flatnonzero(band.sum(axis=0))
+        if len(cols) < 5 or cols[-1] - cols[0] < 0.1 * ink.shape[1]:
+            continue
+        starts.append(cols[0])
+        ends.append(cols[-1])
+        ys = np.flatnonzero(band.sum(axis=1))
+        weights = band.sum(axis=1)[ys]
+        centroid = (ys * weights).sum() / float(weights.sum())
+        offsets.append((centroid - (bottom - top - 1) / 2.0) / (bottom - top))
+    if len(starts) < 2:
+        return 0.0
+    starts, ends = np.array(starts, dtype=np.float64), np.array(ends, dtype=np.float64)
+    # Lines that share a margin with another line: blocks of left-aligned text share
+    # their start, while line ends only line up by chance
+    tolerance = max(2.0, 0.01 * ink.shape[1])
+    shared_start = sum(1 for i, x in enumerate(starts) if (np.abs(np.delete(starts, i) - x) <= tolerance).any())
+    shared_end = sum(1 for i, x in enumerate(ends) if (np.abs(np.delete(ends, i) - x) <= tolerance).any())
+    align = (shared_start - shared_end) / float(len(starts))
+    mass = float(np.clip(np.mean(offsets) * 8, -1, 1))
+    return 0.7 * align + 0.3 * mass
+
+
+def estimate_orientation(image):
+    """
+    Return (angle, confidence): the clockwise rotation (0/90/180/270) that makes
+    the text upright, and a 0-1 confidence. Works on a ~400px binarized copy.
+    """
+    ink = _binarize(image)
+    if not ink.any():
+        return 0, 0.0
+
+    # Horizontal text leaves empty rows between lines, vertical text empty columns
+    rows = _gap_fraction(ink.sum(axis=1))
+    cols = _gap_fraction(ink.sum(axis=0))
+    vertical = cols > rows
+    axis_confidence = min(1.0, abs(cols - rows) * 2)
+
+    if vertical:
+        ink = rotate(ink, 90)
+    score = _upright_score(ink)
+    flip_confidence = min(1.0, abs(score) * 2)
+
+    angle = (90 if vertical else 0) + (180 if score < 0 else 0)
+    return angle, round(float(min(axis_confidence, flip_confidence)), 3)
+
+
+def orient_portrait(image, min_confidence=PORTRAIT_FLIP_CONFIDENCE):
+    """
+    Turn a label crop upright and portrait. Labels are always portrait, so a
+    landscape crop only chooses between 90 and 270 (it has to turn one way) and
+    a portrait crop between 0 and 180. Portrait crops are kept as they are unless
+    the flip estimate clears min_confidence. Returns (image, angle, confidence).
+    """
+    base = 90 if image.shape[1] > image.shape[0] else 0
+    ink = _binarize(rotate(image, base))
+    h, w = ink.shape
+    mh, mw = int(CROP_MARGIN * h), int(CROP_MARGIN * w)
+    ink = ink[mh:h - mh, mw:w - mw]
+    score = _upright_score(ink) if ink.any() else 0.0
+    confidence = round(float(min(1.0, abs(score) * 2)), 3)
+    flip = score < 0 and (base == 90 or confidence >= min_confidence)
+    angle = base + (180 if flip else 0)
+    return rotate(image, angle), angle, confidence
+
+
+def auto_orient(image, min_confidence=MIN_CONFIDENCE):
+    """Rotate image upright when the estimate is confident; returns (image, angle, confidence)."""
+    angle, confidence = estimate_orientation(image)
+    if confidence < min_confidence:
+        return image, 0, confidence
+    return rotate(image, angle), angle, confidence
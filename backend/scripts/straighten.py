@@ -1,8 +1,11 @@
 import cv2
 import numpy as np
+import os
 import sys
 import json
 
+from orientation import orient_portrait
+
 def bank_check_scan(image):
     """
     Convert label to crisp black & white like a bank check mobile deposit scan.
@@ -58,6 +61,12 @@ def deskew_label(roi):
     # Get rotation angle from minAreaRect
     rect = cv2.minAreaRect(largest)
     angle = rect[2]
+    # OpenCV versions disagree on the range ([-90, 0) or (0, 90]); a slight tilt
+    # can come back near +-90, so fold it into (-45, 45]
+    if angle > 45:
+        angle -= 90
+    elif angle <= -45:
+        angle += 90
 
     # Only deskew if angle is significant but not extreme (avoid flips)
     if abs(angle) < 1.0 or abs(angle) > 45:
@@ -123,11 +132,12 @@ def extract_label(image_path, out_path, label_box_str=None):
         # Deskew if the label is at a slight angle
         roi = deskew_label(roi)
 
+        # Turn the label upright and portrait (landscape crops turn 90 or 270) before the final resize
+        roi, angle, confidence = orient_portrait(roi)
+        sys.stderr.write(f"Orientation: {angle}° (confidence {confidence:.2f})\n")
+
         # Resize to exact 4x6 at 200dpi (800x1200 portrait) BEFORE binarizing
         # (resize on color first for better quality, then binarize)
-        cw, ch = roi.shape[1], roi.shape[0]
-        if cw > ch:  # landscape → rotate to portrait
-            roi = cv2.rotate(roi, cv2.ROTATE_90_CLOCKWISE)
         resized = cv2.resize(roi, (800, 1200), interpolation=cv2.INTER_LANCZOS4)
 
         # Apply bank-check style black & white conversion
@@ -135,7 +145,8 @@ def extract_label(image_path, out_path, label_box_str=None):
 
         # Save as high-quality JPEG (binarized images compress very well)
         cv2.imwrite(out_path, final, [cv2.IMWRITE_JPEG_QUALITY, 98])
-        return json.dumps({"success": True, "method": "bank_check_bw"})
+        return json.dumps({"success": True, "method": "bank_check_bw",
+                           "orientation": {"angle": angle, "confidence": confidence}})
 
     except Exception as e:
         import traceback
@@ -145,4 +156,16 @@ if __name__ == "__main__":
     img_path      = sys.argv[1]
     out_path      = sys.argv[2]
     label_box_str = sys.argv[3] if len(sys.argv) > 3 else ""
-    print(extract_label(img_path, out_path, label_box_str or None))
+
+    # STRAIGHTEN_PROFILE=/path/stats.prof: cProfile this run, dump pstats there and the top calls to stderr
+    profile_path = os.getenv("STRAIGHTEN_PROFILE")
+    if profile_path:
+        import cProfile
+        import pstats
+        profile = cProfile.Profile()
+        result = profile.runcall(extract_label, img_path, out_path, label_box_str or None)
+        profile.dump_stats(profile_path)
+        pstats.Stats(profile, stream=sys.stderr).sort_stats("cumulative").print_stats(15)
+        print(result)
+    else:
+        print(extract_label(img_path, out_path, label_box_str or None))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Accuracy-vs-size benchmark for the GeminiOCRService upload payload.
+
+Runs extract_label_data over a folder of label photos once per payload setting
+and compares every field against a reference: <image>.json truth files when
+present, otherwise the extraction from the untouched full-size image.
+
+Usage:
+    GEMINI_API_KEY=... python3 bench_gemini_payload.py <image_dir> \\
+        [--edges 1024,1600,2048] [--formats JPEG,WEBP] [--qualities 70,85] \\
+        [--crop] [--out report.json]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from gemini_ocr_service import GeminiOCRService
+
+FIELDS = ['tracking_number', 'carrier', 'recipient_name', 'street_address', 'city', 'state', 'zip',
+          'imei', 'model', 'storage', 'color']
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.webp', '.heic', '.heif')
+
+
+def flatten(result):
+    fields = dict(result.get('shipping', {}))
+    fields.update(result.get('device', {}))
+    return fields
+
+
+def normalize(value):
+    if value is None:
+        return None
+    return ''.join(str(value).upper().split()) or None
+
+
+def field_agreement(fields, reference):
+    compared = [f for f in FIELDS if reference.get(f) is not None]
+    if not compared:
+        return None
+    hits = sum(1 for f in compared if normalize(fields.get(f)) == normalize(reference.get(f)))
+    return hits / float(len(compared))
+
+
+def load_truth(image_path):
+    truth_path = os.path.splitext(image_path)[0] + '.json'
+    if os.path.exists(truth_path):
+        with open(truth_path) as f:
+            return json.load(f)
+    return None
+
+
+def run_setting(service, images, references):
+    sizes, latencies, scores = [], [], []
+    for path in images:
+        start = time.time()
+        try:
+            fields = flatten(service.extract_label_data(path))
+        except Exception as e:
+            sys.stderr.write(f'{os.path.basename(path)}: {e}\n')
+            continue
+        latencies.append(time.time() - start)
+        info = service.last_payload_info or {}
+        sizes.append(info.get('bytes') or os.path.getsize(path))
+        score = field_agreement(fields, references[path])
+        if score is not None:
+            scores.append(score)
+    return {
+        'images': len(latencies),
+        'mean_bytes': int(sum(sizes) / len(sizes)) if sizes else None,
+        'mean_latency_s': round(sum(latencies) / len(latencies), 3) if latencies else None,
+        'field_agreement': round(sum(scores) / len(scores), 4) if scores else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('image_dir')
+    parser.add_argument('--edges', default='1024,1280,1600,2048')
+    parser.add_argument('--formats', default='JPEG,WEBP')
+    parser.add_argument('--qualities', default='70,80,90')
+    parser.add_argument('--crop', action='store_true', help='also try every setting with crop_label=True')
+    parser.add_argument('--out', default=None)
+    args = parser.parse_args()
+
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        sys.exit('GEMINI_API_KEY is not set')
+
+    images = sorted(p for p in glob.glob(os.path.join(args.image_dir, '*')) if p.lower().endswith(IMAGE_EXTS))
+    if not images:
+        sys.exit(f'No images found in {args.image_dir}')
+
+    service = GeminiOCRService(api_key)
+
+    # Reference pass: truth files where available, else the untouched upload
+    service.payload_options = {'max_edge': None}
+    references = {}
+    for path in images:
+        truth = load_truth(path)
+        if truth is None:
+            try:
+                truth = flatten(service.extract_label_data(path))
+            except Exception as e:
+                sys.stderr.write(f'{os.path.basename(path)}: reference failed: {e}\n')
+                truth = {}
+        references[path] = truth
+    baseline = run_setting(service, images, references)
+    baseline['setting'] = {'max_edge': None}
+    report = [baseline]
+
+    crops = [False, True] if args.crop else [False]
+    for edge in [int(e) for e in args.edges.split(',')]:
+        for fmt in args.formats.split(','):
+            for quality in [int(q) for q in args.qualities.split(',')]:
+                for crop in crops:
+                    setting = {'max_edge': edge, 'image_format': fmt, 'quality': quality, 'crop_label': crop}
+                    service.payload_options = setting
+                    row = run_setting(service, images, references)
+                    row['setting'] = setting
+                    report.append(row)
+                    print(json.dumps(row))
+
+    print(f"\n{'setting':<48} {'bytes':>10} {'latency':>8} {'agree':>7}")
+    for row in sorted(report, key=lambda r: r['mean_bytes'] or 0):
+        s = row['setting']
+        label = 'original' if not s.get('max_edge') else \
+            f"{s['max_edge']}px {s['image_format']} q{s['quality']}{' crop' if s['crop_label'] else ''}"
+        print(f"{label:<48} {row['mean_bytes'] or 0:>10} {row['mean_latency_s'] or 0:>8} "
+              f"{row['field_agreement'] if row['field_agreement'] is not None else '-':>7}")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,29 @@
 import google.generativeai as genai
-from PIL import Image
+from PIL import Image, ImageOps
 import io
 import json
 import time
-from typing import Dict
+from typing import Dict, List, Tuple
 import pillow_heif
 
+from label_box import find_label_box
+
 pillow_heif.register_heif_opener()
 
-class GeminiOCRService:
-    def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
-        
-    def extract_label_data(self, image_path_or_bytes, retry_count=3) -> Dict:
-        if isinstance(image_path_or_bytes, str):
-            image = Image.open(image_path_or_bytes)
-        elif isinstance(image_path_or_bytes, bytes):
-            image = Image.open(io.BytesIO(image_path_or_bytes))
-        else:
-            image = image_path_or_bytes
-            
-        prompt = """You are an expert OCR system for shipping labels and device stickers.
+MIME_TYPES = {'JPEG': 'image/jpeg', 'WEBP': 'image/webp', 'PNG': 'image/png'}
+
+# Untested defaults: a 1600px long edge at JPEG q80 is a guess at what keeps label
+# text legible, not a measured trade-off. No size, latency or field agreement
+# numbers back it yet; run bench_gemini_payload.py over a labelled photo set to get them.
+DEFAULT_PAYLOAD_OPTIONS = {
+    'max_edge': 1600,
+    'crop_label': False,
+    'image_format': 'JPEG',
+    'quality': 80,
+}
+
+
+LABEL_PROMPT = """You are an expert OCR system for shipping labels and device stickers.
 
 Extract ALL visible information from this image. Look VERY CAREFULLY for:
 
@@ -61,45 +63,212 @@ Return this exact JSON structure:
   "color": "..."
 }"""
 
+BATCH_PROMPT_SUFFIX = """
+
+BATCH MODE:
+You will receive {count} separate photos. Each photo is preceded by a text marker "IMAGE <n>"
+(n = 0 to {last}). Extract each photo independently - never copy fields between photos.
+Instead of a single object, return a JSON array with exactly {count} objects, one per photo,
+each with an extra "index" field holding its image number:
+[{{"index": 0, "tracking_number": "...", ...}}, {{"index": 1, ...}}]"""
+
+FIELDS = ['tracking_number', 'carrier', 'recipient_name', 'street_address', 'city', 'state', 'zip',
+          'imei', 'model', 'storage', 'color']
+
+# Digit fields the model sometimes returns as JSON numbers, which drop leading zeros
+NUMBER_WIDTHS = {'zip': 5, 'imei': 15}
+
+
+def _is_rate_limited(error) -> bool:
+    """True for quota / rate-limit errors (HTTP 429, ResourceExhausted)."""
+    text = str(error)
+    return '429' in text or type(error).__name__ == 'ResourceExhausted' or 'quota' in text.lower()
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def optimize_image(image: Image.Image, max_edge=1600, crop_label=False, image_format='JPEG',
+                   quality=80) -> Tuple[Dict, Dict]:
+    """
+    Shrink a camera photo into a compact upload part for generate_content.
+    Returns ({'mime_type', 'data'}, info) where info records the sizes and crop used.
+    """
+    image_format = image_format.upper()
+    info = {'original_size': image.size, 'crop_box': None}
+
+    # JPEG can decode straight at a reduced scale; keep headroom when cropping
+    if max_edge and image.format == 'JPEG':
+        target = max_edge * (2 if crop_label else 1)
+        image.draft('RGB', (target, target))
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    if crop_label:
+        box = find_label_box(image)
+        if box:
+            image = image.crop(box)
+            info['crop_box'] = box
+
+    if max_edge and max(image.size) > max_edge:
+        image = image.copy()
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+    buf = io.BytesIO()
+    if image_format == 'JPEG':
+        image.save(buf, format='JPEG', quality=quality, optimize=True)
+    elif image_format == 'WEBP':
+        image.save(buf, format='WEBP', quality=quality, method=4)
+    else:
+        image.save(buf, format=image_format)
+    data = buf.getvalue()
+
+    info['final_size'] = image.size
+    info['bytes'] = len(data)
+    return {'mime_type': MIME_TYPES.get(image_format, 'image/' + image_format.lower()), 'data': data}, info
+
+
+class GeminiOCRService:
+    def __init__(self, api_key: str, **payload_options):
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        # max_edge=None sends the decoded image untouched
+        self.payload_options = dict(DEFAULT_PAYLOAD_OPTIONS, **payload_options)
+        self.last_payload_info = None
+
+    def prepare_image(self, image_path_or_bytes):
+        if isinstance(image_path_or_bytes, str):
+            image = Image.open(image_path_or_bytes)
+        elif isinstance(image_path_or_bytes, bytes):
+            image = Image.open(io.BytesIO(image_path_or_bytes))
+        else:
+            image = image_path_or_bytes
+
+        if not self.payload_options.get('max_edge'):
+            self.last_payload_info = {'original_size': image.size, 'final_size': image.size, 'crop_box': None}
+            return image
+
+        part, self.last_payload_info = optimize_image(image, **self.payload_options)
+        return part
+
+    def extract_label_data(self, image_path_or_bytes, retry_count=3) -> Dict:
+        image = self.prepare_image(image_path_or_bytes)
+        data = self._generate([LABEL_PROMPT, image], retry_count)
+
+        # Handle array responses
+        if isinstance(data, list):
+            data = data[0] if data else {}
+
+        return self._format_result(data)
+
+    def extract_label_data_batch(self, images: List, batch_size=4, retry_count=3) -> List[Dict]:
+        """
+        Pack up to batch_size images into each request and map the returned array back
+        by index. Items the model drops or garbles are retried as single requests; an item
+        that still fails comes back as {'error': ...} so one bad photo doesn't sink the batch.
+        Quota and rate-limit errors are raised instead: retrying them as single requests
+        would only send more requests into the limit.
+        """
+        results = [None] * len(images)
+        for start in range(0, len(images), batch_size):
+            chunk = list(range(start, min(start + batch_size, len(images))))
+
+            by_offset = {}
+            if len(chunk) > 1:
+                try:
+                    contents = [LABEL_PROMPT + BATCH_PROMPT_SUFFIX.format(count=len(chunk), last=len(chunk) - 1)]
+                    for offset, i in enumerate(chunk):
+                        contents += [f'IMAGE {offset}', self.prepare_image(images[i])]
+                    by_offset = self._map_batch(self._generate(contents, retry_count), len(chunk))
+                except Exception as e:
+                    if _is_rate_limited(e):
+                        raise
+                    by_offset = {}
+
+            for offset, i in enumerate(chunk):
+                if offset in by_offset:
+                    results[i] = self._format_result(by_offset[offset])
+                    continue
+                try:
+                    results[i] = self.extract_label_data(images[i], retry_count)
+                except Exception as e:
+                    if _is_rate_limited(e):
+                        raise
+                    results[i] = {'error': str(e)}
+        return results
+
+    def _generate(self, contents, retry_count):
         for attempt in range(retry_count):
             try:
                 response = self.model.generate_content(
-                    [prompt, image],
+                    contents,
                     generation_config=genai.GenerationConfig(
                         response_mime_type="application/json",
                         temperature=0.1  # Lower temperature for more consistent extraction
                     )
                 )
-                
-                data = json.loads(response.text)
-                
-                # Handle array responses
-                if isinstance(data, list):
-                    data = data[0] if data else {}
-                
-                # Clean tracking - remove spaces
-                if data.get('tracking_number'):
-                    data['tracking_number'] = data['tracking_number'].replace(' ', '').replace('-', '')
-                
-                return {
-                    'shipping': {
-                        'tracking_number': data.get('tracking_number'),
-                        'carrier': data.get('carrier'),
-                        'recipient_name': data.get('recipient_name'),
-                        'street_address': data.get('street_address'),
-                        'city': data.get('city'),
-                        'state': data.get('state'),
-                        'zip': data.get('zip'),
-                    },
-                    'device': {
-                        'imei': data.get('imei'),
-                        'model': data.get('model'),
-                        'storage': data.get('storage'),
-                        'color': data.get('color'),
-                    }
-                }
+                return json.loads(response.text)
             except Exception as e:
-                if '429' in str(e) and attempt < retry_count - 1:
+                if _is_rate_limited(e) and attempt < retry_count - 1:
                     time.sleep(2 ** attempt)
                     continue
                 raise
+
+    @staticmethod
+    def _map_batch(data, count) -> Dict[int, Dict]:
+        """Validate a batch response and key its objects by image offset."""
+        if isinstance(data, dict):
+            data = data.get('results') or data.get('images') or [data]
+        if not isinstance(data, list):
+            return {}
+
+        items = [item for item in data if isinstance(item, dict)]
+        indexed = all(_is_int(item.get('index')) for item in items)
+        if not indexed:
+            # Without index markers only a complete, in-order array can be trusted
+            return dict(enumerate(items)) if len(items) == count else {}
+
+        mapped, seen = {}, set()
+        for item in items:
+            index = item['index']
+            if index in seen or not 0 <= index < count:
+                # Duplicate or out-of-range index: the pairing is unreliable
+                mapped.pop(index, None)
+                seen.add(index)
+                continue
+            seen.add(index)
+            if all(item.get(f) is None or isinstance(item.get(f), str) or _is_int(item.get(f)) for f in FIELDS):
+                mapped[index] = item
+        return mapped
+
+    @staticmethod
+    def _format_result(data) -> Dict:
+        data = {f: data.get(f) for f in FIELDS}
+        for f, value in data.items():
+            if _is_int(value):
+                data[f] = str(value).zfill(NUMBER_WIDTHS.get(f, 0))
+
+        # Clean tracking - remove spaces
+        if data.get('tracking_number'):
+            data['tracking_number'] = data['tracking_number'].replace(' ', '').replace('-', '')
+
+        return {
+            'shipping': {
+                'tracking_number': data.get('tracking_number'),
+                'carrier': data.get('carrier'),
+                'recipient_name': data.get('recipient_name'),
+                'street_address': data.get('street_address'),
+                'city': data.get('city'),
+                'state': data.get('state'),
+                'zip': data.get('zip'),
+            },
+            'device': {
+                'imei': data.get('imei'),
+                'model': data.get('model'),
+                'storage': data.get('storage'),
+                'color': data.get('color'),
+            }
+        }
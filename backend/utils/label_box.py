@@ -0,0 +1,82 @@
+"""
+Local guess at where the white shipping label sits in a camera photo, used by
+GeminiOCRService to crop uploads before they are sent.
+"""
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Paper is bright and unsaturated: cardboard is saturated and desks are dark.
+# Bubble wrap is as bright as paper, so a second family of masks follows local
+# contrast instead: print and the label's edge are high-contrast and close a
+# ring around the label, while the wrap's rims and dimples stay low-contrast.
+THRESHOLDS = (150, 170, 190, 210, 225)
+MAX_SATURATION = 70
+CONTRAST = (25, 40)
+MIN_RECTANGULARITY = 0.85
+
+
+def _masks(gray, saturation):
+    bright = saturation <= MAX_SATURATION
+    for threshold in THRESHOLDS:
+        plain = ((gray >= threshold) & bright).astype(np.uint8) * 255
+        # Opening cuts thin bright bridges (glare, bubble rims); the text inside
+        # the label doesn't matter because only outer contours are used
+        plain = cv2.morphologyEx(plain, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+        yield cv2.morphologyEx(plain, cv2.MORPH_CLOSE, np.ones((3, 3), np.uint8))
+
+    mean = cv2.blur(gray, (7, 7))
+    std = np.sqrt(np.maximum(cv2.blur(gray * gray, (7, 7)) - mean * mean, 0))
+    for limit in CONTRAST:
+        edges = (std > limit).astype(np.uint8) * 255
+        yield cv2.morphologyEx(edges, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8))
+
+
+def _candidates(gray, saturation, min_area, max_area):
+    h, w = gray.shape
+    for mask in _masks(gray, saturation):
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if not min_area <= area / float(w * h) <= max_area:
+                continue
+            (_, _), (rw, rh), _ = cv2.minAreaRect(contour)
+            rectangularity = area / max(1.0, rw * rh)
+            if rectangularity < MIN_RECTANGULARITY or max(rw, rh) > 3 * min(rw, rh):
+                continue
+            x, y, bw, bh = cv2.boundingRect(contour)
+            # Bright background halves are rectangular too, but they run off the frame
+            if (x <= 1) + (y <= 1) + (x + bw >= w - 1) + (y + bh >= h - 1) >= 2:
+                continue
+            yield area * rectangularity, (x, y, x + bw, y + bh)
+
+
+def find_label_box(image: Image.Image, thumb_size=512, min_area=0.05,
+                   max_area=0.90) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Find the largest bright, unsaturated, rectangular region of a thumbnail.
+    Returns (left, top, right, bottom) in full-image pixels, or None when no
+    plausible label stands out.
+    """
+    small = image.convert('RGB')
+    small.thumbnail((thumb_size, thumb_size))
+    rgb = np.asarray(small)
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY).astype(np.float32)
+    saturation = cv2.cvtColor(rgb, cv2.COLOR_RGB2HSV)[:, :, 1]
+
+    best = max(_candidates(gray, saturation, min_area, max_area), default=None, key=lambda c: c[0])
+    if best is None:
+        return None
+
+    left, top, right, bottom = best[1]
+    h, w = gray.shape
+    sx, sy = image.width / float(w), image.height / float(h)
+    pad_x, pad_y = int((right - left) * sx * 0.03), int((bottom - top) * sy * 0.03)
+    return (
+        max(0, int(left * sx) - pad_x),
+        max(0, int(top * sy) - pad_y),
+        min(image.width, int(right * sx) + pad_x),
+        min(image.height, int(bottom * sy) + pad_y),
+    )
@@ -0,0 +1,180 @@
+"""
+Offset-based replay of search/replace edits over a file.
+
+Each edit call (one or more (target, replacement) chunks) is resolved to exact
+offsets against a single snapshot of the document. It is applied only when its
+needle occurs exactly once, and the result is spliced into a piece table, so no
+chunk ever rewrites the whole file and no chunk silently hits extra occurrences.
+Needles are searched across the pieces in place; the document is joined into
+one string only once, when replay returns. An empty needle can't be located and
+is reported as invalid.
+
+Forward replay looks for target and writes replacement; reverse replay (undo)
+looks for replacement and writes target, walking the calls newest first.
+
+    code, report = replay(code, open_index().edits(target='InventoryList.jsx', reverse=True), reverse=True)
+"""
+import json
+from collections import namedtuple
+
+# A standalone edit for callers that don't come from the transcript index
+Patch = namedtuple('Patch', 'instruction chunks')
+
+APPLIED, AMBIGUOUS, MISSING, OVERLAP, INVALID = 'applied', 'ambiguous', 'missing', 'overlap', 'invalid'
+
+
+# Pieces shorter than this are folded into a neighbouring splice, which bounds
+# both the piece count a search walks and the text a splice copies
+SMALL_PIECE = 16 * 1024
+
+
+class PieceTable:
+    """Document as (buffer, start, end) pieces; splices copy at most a few small neighbours."""
+
+    def __init__(self, text):
+        self.buffers = [text]
+        self.pieces = [(0, 0, len(text))]
+
+    def text(self):
+        """Join the pieces into one string (and compact to a single piece)."""
+        text = ''.join(self.buffers[b][s:e] for b, s, e in self.pieces)
+        self.buffers = [text]
+        self.pieces = [(0, 0, len(text))]
+        return text
+
+    def find(self, needle, start=0):
+        """Offset of the first needle at or after start, or -1; matches may span pieces."""
+        n = len(needle)
+        pos = 0
+        carry = ''  # the n - 1 characters before the current piece
+        for b, s, e in self.pieces:
+            buf = self.buffers[b]
+            if carry:
+                # Matches that begin in earlier pieces and run into this one
+                i = (carry + buf[s:min(e, s + n - 1)]).find(needle, max(0, start - pos + len(carry)))
+                if i >= 0:
+                    return pos - len(carry) + i
+            i = buf.find(needle, s + max(0, start - pos), e)
+            if i >= 0:
+                return pos + i - s
+            if n > 1:
+                carry = (carry + buf[max(s, e - n + 1):e])[-(n - 1):]
+            pos += e - s
+        return -1
+
+    def replace(self, offset, length, new):
+        """Replace [offset, offset + length) with new."""
+        pieces = []
+        pos = 0
+        inserted = False
+        end = offset + length
+        for b, s, e in self.pieces:
+            size = e - s
+            p_start, p_end = pos, pos + size
+            pos = p_end
+            if p_end <= offset or p_start >= end:
+                if p_start >= end and not inserted:
+                    pieces.append(self._add(new))
+                    inserted = True
+                pieces.append((b, s, e))
+                continue
+            # Keep the parts of this piece that fall outside the replaced range
+            if p_start < offset:
+                pieces.append((b, s, s + offset - p_start))
+            if not inserted:
+                pieces.append(self._add(new))
+                inserted = True
+            if p_end > end:
+                pieces.append((b, s + end - p_start, e))
+        if not inserted:
+            pieces.append(self._add(new))
+        self.pieces = self._coalesce([p for p in pieces if p[2] > p[1]], offset, len(new))
+
+    def _coalesce(self, pieces, offset, length):
+        """Fold the spliced text and its small neighbours into one piece so searches stay short."""
+        pos, lo = 0, None
+        for i, (b, s, e) in enumerate(pieces):
+            if lo is None and pos + (e - s) >= offset:
+                lo = i
+            pos += e - s
+            if lo is not None and pos >= offset + length:
+                hi = i
+                break
+        else:
+            return pieces
+        while lo > 0 and pieces[lo - 1][2] - pieces[lo - 1][1] < SMALL_PIECE:
+            lo -= 1
+        while hi + 1 < len(pieces) and pieces[hi + 1][2] - pieces[hi + 1][1] < SMALL_PIECE:
+            hi += 1
+        if hi - lo < 1 or sum(e - s for _, s, e in pieces[lo:hi + 1]) >= 4 * SMALL_PIECE:
+            return pieces
+        merged = self._add(''.join(self.buffers[b][s:e] for b, s, e in pieces[lo:hi + 1]))
+        return pieces[:lo] + [merged] + pieces[hi + 1:]
+
+    def _add(self, text):
+        self.buffers.append(text)
+        return (len(self.buffers) - 1, 0, len(text))
+
+
+def _locate(doc, needle):
+    """Return (offset, count) where count is 0, 1 or 2 (= two or more)."""
+    first = doc.find(needle)
+    if first < 0:
+        return -1, 0
+    if doc.find(needle, first + 1) >= 0:
+        return first, 2
+    return first, 1
+
+
+def replay(text, edits, reverse=False, on_ambiguous='skip'):
+    """
+    Apply edits in the order given and return (text, report). Each report entry
+    records the edit id/instruction, chunk number, status, resolved offset and
+    whether it was applied.
+    on_ambiguous='first' applies an ambiguous chunk at its first occurrence
+    instead of skipping it.
+    """
+    doc = PieceTable(text)
+    report = []
+    for edit in edits:
+        resolved = []
+        for chunk_no, (target, replacement) in enumerate(edit.chunks):
+            needle, new = (replacement, target) if reverse else (target, replacement)
+            offset, count = _locate(doc, needle) if needle else (-1, 0)
+            entry = {
+                'id': getattr(edit, 'id', None),
+                'instruction': edit.instruction,
+                'chunk': chunk_no,
+                'offset': offset if count else None,
+                'status': (INVALID if not needle else MISSING if count == 0 else
+                           APPLIED if count == 1 else AMBIGUOUS),
+                'applied': False,
+            }
+            report.append(entry)
+            if count == 1 or (count > 1 and on_ambiguous == 'first'):
+                resolved.append((offset, len(needle), new, entry))
+
+        # All chunks of one call were located in the same snapshot; splice from
+        # the end so earlier offsets stay valid, and refuse overlapping chunks
+        resolved.sort(key=lambda r: r[0])
+        last_start = None
+        for offset, length, new, entry in reversed(resolved):
+            if last_start is not None and offset + length > last_start:
+                entry['status'] = OVERLAP
+                continue
+            doc.replace(offset, length, new)
+            entry['applied'] = True
+            last_start = offset
+    return doc.text(), report
+
+
+def summarize(report):
+    counts = {}
+    for entry in report:
+        counts[entry['status']] = counts.get(entry['status'], 0) + 1
+    return counts
+
+
+def write_report(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
@@ -1,16 +1,4 @@
-import json
+from transcript_index import open_index
 
-with open('/Users/deepakmalik/.gemini/antigravity/brain/1f0348c7-a051-4f7a-b596-d4413e8fdef0/.system_generated/logs/transcript.jsonl') as f:
-    lines = f.readlines()
-
-for line in lines:
-    try:
-        data = json.loads(line)
-        if data.get('type') == 'PLANNER_RESPONSE':
-            tool_calls = data.get('tool_calls', [])
-            for call in tool_calls:
-                if call['name'] in ['replace_file_content', 'multi_replace_file_content']:
-                    # We only care about the unparsed string for debugging, let's print the instruction
-                    print("Found instruction in string format:", call['args'].get('Instruction'))
-    except Exception as e:
-        pass
+for edit in open_index().edits():
+    print("Found instruction:", edit.instruction)
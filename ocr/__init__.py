@@ -0,0 +1,9 @@
+"""Shared building blocks for the EasyOCR scan service (app_easyocr.py)."""
+import os
+import sys
+
+# OpenCV label helpers shared with the Node-invoked scripts (orientation.py,
+# straighten.py) live in backend/scripts; make them importable from the service.
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'scripts')
+if SCRIPTS_DIR not in sys.path:
+    sys.path.append(SCRIPTS_DIR)
@@ -0,0 +1,10 @@
+"""
+Entry point for the scan service: `python -m ocr`, the same as running
+app_easyocr.py directly. PORT sets the port.
+"""
+import os
+
+if __name__ == '__main__':
+    from app_easyocr import create_app
+
+    create_app().run(host='0.0.0.0', port=int(os.getenv('PORT', 8080)))
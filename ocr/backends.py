@@ -0,0 +1,178 @@
+"""
+Inference backends for the EasyOCR Reader.
+
+  OCR_BACKEND=torch  stock PyTorch models (default)
+  OCR_BACKEND=onnx   CRAFT detector + CRNN recognizer exported to ONNX, dynamically
+                     quantized to int8 and run under ONNX Runtime
+
+The ONNX backend keeps EasyOCR's own pre/post-processing and only swaps the two
+networks on the Reader, so readtext/detect/recognize behave the same for callers.
+Exported models are cached in OCR_ONNX_DIR and reused across restarts; the file
+names carry the easyocr version and a digest of the weights, so upgrading either
+exports fresh models instead of loading stale ones.
+
+OCR_THREADS caps the intra-op threads of either backend; left unset, torch and
+ONNX Runtime keep their own defaults. torch and easyocr are imported on first
+use, so importing this module stays cheap.
+"""
+import hashlib
+import os
+
+ONNX_DIR = os.getenv('OCR_ONNX_DIR', os.path.join(os.path.expanduser('~'), '.EasyOCR', 'onnx'))
+
+
+def create_reader(backend=None, lang_list=('en',)):
+    backend = backend or os.getenv('OCR_BACKEND', 'torch')
+    threads = int(os.getenv('OCR_THREADS', '0')) or None
+    if backend not in ('torch', 'onnx'):
+        raise ValueError(f'Unknown OCR backend: {backend}')
+
+    import easyocr
+
+    if backend == 'torch':
+        if threads:
+            import torch
+
+            torch.set_num_threads(threads)
+        return easyocr.Reader(list(lang_list), gpu=False)
+
+    if backend == 'onnx':
+        # Torch's own dynamic quantization (the Reader default) produces modules
+        # that can't be exported, so export from the FP32 weights
+        reader = easyocr.Reader(list(lang_list), gpu=False, quantize=False)
+        quantize = [m.strip() for m in os.getenv('OCR_ONNX_QUANTIZE', 'detector,recognizer').split(',') if m.strip()]
+        return use_onnx(reader, threads=threads, quantize=quantize)
+
+
+class OnnxDetector:
+    def __init__(self, session):
+        self.session = session
+
+    def eval(self):
+        return self
+
+    def __call__(self, x):
+        import torch
+
+        y, feature = self.session.run(None, {'image': x.cpu().numpy()})
+        return torch.from_numpy(y), torch.from_numpy(feature)
+
+
+class OnnxRecognizer:
+    def __init__(self, session):
+        self.session = session
+
+    def eval(self):
+        return self
+
+    def __call__(self, image, text=None):
+        import torch
+
+        (preds,) = self.session.run(None, {'image': image.cpu().numpy()})
+        return torch.from_numpy(preds)
+
+
+def _unwrap(model):
+    return getattr(model, 'module', model)
+
+
+def weights_digest(model):
+    """Short digest of a network's parameters, to tell exported models apart."""
+    digest = hashlib.sha1()
+    for key, tensor in _unwrap(model).state_dict().items():
+        digest.update(key.encode())
+        digest.update(tensor.detach().cpu().numpy().tobytes())
+    return digest.hexdigest()[:12]
+
+
+def model_name(name, model):
+    import easyocr
+
+    return f'{name}-easyocr{easyocr.__version__}-{weights_digest(model)}'
+
+
+def export_detector(reader, path):
+    import torch
+
+    model = _unwrap(reader.detector).eval()
+    dummy = torch.randn(1, 3, 640, 640)
+    with torch.no_grad():
+        torch.onnx.export(
+            model, dummy, path,
+            input_names=['image'], output_names=['y', 'feature'],
+            dynamic_axes={'image': {0: 'batch', 2: 'height', 3: 'width'},
+                          'y': {0: 'batch', 1: 'out_height', 2: 'out_width'},
+                          'feature': {0: 'batch', 2: 'out_height', 3: 'out_width'}},
+            opset_version=13,
+        )
+
+
+def export_recognizer(reader, path):
+    import torch
+
+    class RecognizerExport(torch.nn.Module):
+        """The CTC recognizer ignores its text argument; export the image-only path."""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, image):
+            return self.model(image, None)
+
+    model = RecognizerExport(_unwrap(reader.recognizer)).eval()
+    dummy = torch.randn(1, 1, 64, 256)
+    with torch.no_grad():
+        torch.onnx.export(
+            model, dummy, path,
+            input_names=['image'], output_names=['preds'],
+            dynamic_axes={'image': {0: 'batch', 3: 'width'}, 'preds': {0: 'batch', 1: 'steps'}},
+            opset_version=13,
+        )
+
+
+def _build_model(name, export, reader, quantize, model_dir):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    fp32_path = os.path.join(model_dir, f'{name}.onnx')
+    if not os.path.exists(fp32_path):
+        print(f'Exporting {name} to ONNX...')
+        export(reader, fp32_path)
+
+    if not quantize:
+        return fp32_path
+
+    int8_path = os.path.join(model_dir, f'{name}.int8.onnx')
+    if not os.path.exists(int8_path):
+        print(f'Quantizing {name} to int8...')
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QUInt8)
+    return int8_path
+
+
+def _session(path, threads):
+    import onnxruntime as ort
+
+    opts = ort.SessionOptions()
+    if threads:
+        opts.intra_op_num_threads = threads
+    opts.inter_op_num_threads = 1
+    opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(path, opts, providers=['CPUExecutionProvider'])
+
+
+def use_onnx(reader, threads=None, quantize=('detector', 'recognizer'), model_dir=ONNX_DIR):
+    """Swap the Reader's torch networks for ONNX Runtime sessions in place."""
+    os.makedirs(model_dir, exist_ok=True)
+    detector_path = _build_model(model_name('craft', reader.detector), export_detector, reader,
+                                 'detector' in quantize, model_dir)
+    recognizer_name = model_name(f"{reader.model_lang}_{getattr(reader, 'recog_network', 'standard')}",
+                                 reader.recognizer)
+    recognizer_path = _build_model(recognizer_name, export_recognizer, reader, 'recognizer' in quantize, model_dir)
+
+    # Dropping the torch modules releases their FP32 weights
+    reader.detector = OnnxDetector(_session(detector_path, threads))
+    reader.recognizer = OnnxRecognizer(_session(recognizer_path, threads))
+    print(f'ONNX Runtime backend: {os.path.basename(detector_path)}, '
+          f'{os.path.basename(recognizer_path)} ({threads or "default"} threads)')
+    return reader
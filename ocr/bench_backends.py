@@ -0,0 +1,119 @@
+"""
+Accuracy/latency comparison of the OCR inference backends on a folder of scans.
+
+Each backend runs in its own subprocess so load time and resident memory are
+measured in isolation. Text from the first backend (torch by default) is the
+reference the others are scored against.
+
+Usage:
+    python -m ocr.bench_backends <image_dir> [--backends torch,onnx] [--out report.json]
+"""
+import argparse
+import difflib
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024.0
+    return None
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))]
+
+
+def run_backend(backend, images, out_path):
+    """Worker mode: OCR every image with one backend and dump texts and timings."""
+    import cv2
+    from ocr.backends import create_reader
+
+    start = time.time()
+    reader = create_reader(backend)
+    load_s = time.time() - start
+
+    # Warm-up so one-off allocation doesn't land on the first image
+    reader.readtext(cv2.imread(images[0]))
+
+    texts, latencies = {}, []
+    for path in images:
+        image = cv2.imread(path)
+        start = time.time()
+        results = reader.readtext(image)
+        latencies.append(time.time() - start)
+        texts[os.path.basename(path)] = ' '.join(r[1] for r in results)
+
+    with open(out_path, 'w') as f:
+        json.dump({'backend': backend, 'load_s': load_s, 'rss_mb': rss_mb(),
+                   'latencies': latencies, 'texts': texts}, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('image_dir')
+    parser.add_argument('--backends', default='torch,onnx')
+    parser.add_argument('--out', default=None)
+    parser.add_argument('--worker', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--raw', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    images = sorted(p for p in glob.glob(os.path.join(args.image_dir, '*')) if p.lower().endswith(IMAGE_EXTS))
+    if not images:
+        sys.exit(f'No images found in {args.image_dir}')
+
+    if args.worker:
+        run_backend(args.worker, images, args.raw)
+        return
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends.split(','):
+            raw = os.path.join(tmp, f'{backend}.json')
+            print(f'Running {backend} on {len(images)} images...')
+            subprocess.run([sys.executable, '-m', 'ocr.bench_backends', args.image_dir,
+                            '--worker', backend, '--raw', raw], check=True)
+            with open(raw) as f:
+                runs.append(json.load(f))
+
+    reference = runs[0]['texts']
+    report = []
+    for run in runs:
+        similarity = [difflib.SequenceMatcher(None, reference[name], text).ratio()
+                      for name, text in run['texts'].items()]
+        lat = run['latencies']
+        report.append({
+            'backend': run['backend'],
+            'load_s': round(run['load_s'], 2),
+            'rss_mb': round(run['rss_mb'], 1) if run['rss_mb'] else None,
+            'mean_s': round(sum(lat) / len(lat), 3),
+            'p50_s': round(percentile(lat, 50), 3),
+            'p95_s': round(percentile(lat, 95), 3),
+            'text_similarity': round(sum(similarity) / len(similarity), 4),
+        })
+
+    base = report[0]['mean_s']
+    print(f"\n{'backend':<10} {'load':>6} {'rss MB':>8} {'mean':>7} {'p50':>7} {'p95':>7} {'speedup':>8} {'similar':>8}")
+    for row in report:
+        print(f"{row['backend']:<10} {row['load_s']:>6} {row['rss_mb'] or '-':>8} {row['mean_s']:>7} "
+              f"{row['p50_s']:>7} {row['p95_s']:>7} {base / row['mean_s']:>7.2f}x {row['text_similarity']:>8}")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
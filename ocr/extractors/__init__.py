@@ -0,0 +1,23 @@
+"""
+Versioned field extractors. Each version exposes extract_fields(passes), where
+passes maps an OCR pass name ('full', 'bottom', ...) to its joined text, and
+returns (device_info, shipping_info).
+"""
+from . import v1, v2
+
+EXTRACTORS = {
+    'v1': v1,
+    'v2': v2,
+}
+
+
+def join_text(results):
+    """Join EasyOCR readtext results ([box, text, conf], ...) the way the apps always have."""
+    return ' '.join([r[1] for r in results])
+
+
+def flatten(device, shipping):
+    """(device_info, shipping_info) -> {'device.imei': ..., 'shipping.tracking_number': ...}"""
+    fields = {'device.' + k: v for k, v in device.items()}
+    fields.update({'shipping.' + k: v for k, v in shipping.items()})
+    return fields
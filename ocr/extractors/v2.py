@@ -0,0 +1,210 @@
+"""
+Dual-pass extractors: shipping fields come from the full image, the IMEI prefers
+the upscaled bottom-half pass where small device stickers sit.
+"""
+import re
+
+def extract_imei(text):
+    # Format 1: IMEI: 355260780990629
+    m = re.search(r'IMEI[:\s]+([0-9]{15})', text, re.IGNORECASE)
+    if m:
+        return m.group(1)
+    # Format 2: IMEI:355260780990629 (no space - small stickers)
+    m = re.search(r'IMEI:([0-9]{15})', text, re.IGNORECASE)
+    if m:
+        return m.group(1)
+    # Format 3: OCR errors in IMEI label
+    m = re.search(r'IME[I1L][:\s]*([0-9]{15})', text, re.IGNORECASE)
+    if m:
+        return m.group(1)
+    # Format 4: standalone 15 digits starting with 3
+    cleaned = re.sub(r'\s+', '', text)
+    matches = re.findall(r'(?<!\d)([0-9]{15})(?!\d)', cleaned)
+    for imei in matches:
+        if imei[0] == '3':
+            return imei
+    return None
+
+def extract_serial(text):
+    for pattern in [r'S/N[:\s]*([A-Z0-9]{8,})', r'Serial[:\s]*([A-Z0-9]{8,})']:
+        m = re.search(pattern, text, re.IGNORECASE)
+        if m:
+            return m.group(1).strip()
+    return None
+
+def extract_model(text):
+    text = text.replace('IPhone 114', 'iPhone 14').replace('IPhone 4 ', 'iPhone 14 ')
+    m = re.search(r'Samsung\s+Galaxy\s+([A-Z0-9+\s]+?)\s*,?\s*\d+', text, re.IGNORECASE)
+    if m:
+        return f"Samsung Galaxy {m.group(1).strip()}"
+    m = re.search(r'Apple[,\s]+(iPhone|iPad)\s+(\d+\s*(?:Pro\s*Max|Pro|Max|Plus|Mini)?)', text, re.IGNORECASE)
+    if m:
+        return f"{m.group(1)} {m.group(2).strip()}"
+    m = re.search(r'(iPhone|iPad)\s+(\d+\s*(?:Pro\s*Max|Pro|Max|Plus|Mini)?)', text, re.IGNORECASE)
+    if m:
+        return f"{m.group(1)} {m.group(2).strip()}"
+    m = re.search(r'IPH\s*(\d+[A-Z]*)', text, re.IGNORECASE)
+    if m:
+        return f"iPhone {m.group(1)}"
+    return None
+
+def extract_storage(text):
+    for pattern in [r',\s*(\d{2,4})\s*(?:GB)?\s*,', r'(\d{2,4})\s*GB']:
+        m = re.search(pattern, text, re.IGNORECASE)
+        if m:
+            storage = int(m.group(1))
+            if storage in [64, 128, 256, 512, 1024, 2048]:
+                return f"{storage}GB"
+    return None
+
+def extract_color(text):
+    specific = {
+        'Phantom Black': r'Phantom\s+Black',
+        'Starlight': r'Starlight',
+        'Midnight': r'Midnight',
+        'Sierra Blue': r'Sierra\s+Blue',
+        'Alpine Green': r'Alpine\s+Green',
+        'Space Gray': r'Space\s+Gr[ae]y',
+    }
+    for color, pattern in specific.items():
+        if re.search(pattern, text, re.IGNORECASE):
+            return color
+    for color in ['Black', 'White', 'Blue', 'Red', 'Green', 'Purple', 'Gold', 'Silver']:
+        if re.search(rf'\b{color}\b', text, re.IGNORECASE):
+            return color
+    return None
+
+def extract_carrier_device(text):
+    if re.search(r'Other\s*\(Unlocked\)', text, re.IGNORECASE):
+        return 'Unlocked'
+    for carrier in ['Verizon', 'AT&T', 'T-Mobile', 'Sprint']:
+        if re.search(carrier, text, re.IGNORECASE):
+            if 'unlocked' in text.lower():
+                return f"{carrier} (Unlocked)"
+            return carrier
+    if re.search(r'Unlocked', text, re.IGNORECASE):
+        return 'Unlocked'
+    return None
+
+def extract_recipient(text):
+    noise = {'SHIP TO', 'UDEAL INC', 'EAST MEADOW', 'UPS GROUND', 'USPS GROUND', 'FRAGILE PLEASE'}
+    patterns = [
+        r'([A-Z]+\s+[A-Z]+)\s+X-\d+',
+        r'SHIP\s+TO[:\s]+([A-Z]+\s+[A-Z]+)',
+        r'SHIP\s+([A-Z]+\s+[A-Z]+)\s+TO[:\s]',
+        r'([A-Z]{3,}\s+[A-Z]{3,})\s+PO\s+BOX',
+        r'([A-Z]{3,}\s+[A-Z]{3,})\s+\d{3,5}\s+[A-Z]',
+    ]
+    for pattern in patterns:
+        m = re.search(pattern, text)
+        if m:
+            name = re.sub(r'\s+', ' ', m.group(1).strip())
+            if len(name) > 4 and name not in noise and not any(n in name for n in noise):
+                return name
+    return None
+
+def extract_address(text):
+    po = re.search(r'(PO\s+BOX\s+\d+)', text, re.IGNORECASE)
+    if po:
+        return po.group(1).upper()
+    patterns = [
+        r'(\d{3,5}\s+[A-Z]{1,3}\s+\d+(?:ST|ND|RD|TH)\s+(?:ST|AVE|BLVD|DR|CT|LN|RD))',
+        r'(\d{3,5}\s+[A-Z]\s+[A-Z]+\s+(?:ST|STREET|AVE|AVENUE|BLVD|DR|DRIVE|CT|LN|RD|ROAD))',
+        r'(\d{3,5}\s+[A-Z]\s+[A-Z]+\s+[A-Z]+)',
+        r'(\d{3,5}\s+[A-Z]+\s+(?:ST|AVE|BLVD|DR|CT|LN|RD)(?:\s+APT\s+[A-Z0-9]+)?)',
+    ]
+    for pattern in patterns:
+        m = re.search(pattern, text, re.IGNORECASE)
+        if m:
+            addr = re.sub(r'\s+', ' ', m.group(1).strip()).upper()
+            if not re.search(r'HUDSON|MEADOW|UDEAL', addr, re.IGNORECASE):
+                return addr
+    return None
+
+def extract_tracking(text):
+    cleaned = re.sub(r'\s+', '', text)
+    for carrier, pattern in [('UPS', r'1Z[A-Z0-9]{16}'), ('USPS', r'(94|93|92|95)\d{20,22}')]:
+        m = re.search(pattern, cleaned)
+        if m:
+            return m.group(0), carrier
+    return None, None
+
+def extract_shipping_service(text):
+    if re.search(r'UPS\s+GROUND', text, re.IGNORECASE):
+        return 'UPS Ground'
+    if re.search(r'USPS\s+GROUND\s+ADVANTAGE', text, re.IGNORECASE):
+        return 'USPS Ground Advantage'
+    if re.search(r'PRIORITY\s+MAIL', text, re.IGNORECASE):
+        return 'USPS Priority Mail'
+    return None
+
+def extract_location(text):
+    text = text.replace("FL'", "FL").replace("'", "").replace("\u2019", "")
+    states = r'(AL|AK|AZ|AR|CA|CO|CT|DE|FL|GA|HI|ID|IL|IN|IA|KS|KY|LA|ME|MD|MA|MI|MN|MS|MO|MT|NE|NV|NH|NJ|NM|NY|NC|ND|OH|OK|OR|PA|RI|SC|SD|TN|TX|UT|VT|VA|WA|WV|WI|WY)'
+    pattern = rf'\b([A-Z]{{3,}})\s+{states}\s+(\d{{5}}(?:-\d{{4}})?)\b'
+    locations = []
+    for m in re.finditer(pattern, text):
+        city = m.group(1)
+        state = m.group(2)
+        zip_code = m.group(3)
+        if city not in ['EAST', 'MEADOW', 'HUDSON', 'UPS', 'USPS', 'GROUND', 'ADVANTAGE', 'FRAGILE']:
+            locations.append({'city': city, 'state': state, 'zip': zip_code})
+    non_ny = next((loc for loc in locations if loc['state'] != 'NY'), None)
+    return non_ny or (locations[-1] if locations else None)
+
+
+def extract_fields(passes):
+    """passes maps OCR pass name -> joined text ('full' and 'bottom')."""
+    text_full = passes['full']
+    text_bottom = passes.get('bottom', '')
+    text_combined = text_full + ' ' + text_bottom
+    device_info = {}
+    shipping_info = {}
+
+    # IMEI: try bottom half first (sticker location), then full
+    imei = extract_imei(text_bottom) or extract_imei(text_full)
+    if imei:
+        device_info['imei'] = imei
+
+    serial = extract_serial(text_combined)
+    if serial:
+        device_info['serial'] = serial
+
+    model = extract_model(text_combined)
+    if model:
+        device_info['model'] = model
+
+    storage = extract_storage(text_combined)
+    if storage:
+        device_info['storage'] = storage
+
+    color = extract_color(text_combined)
+    if color:
+        device_info['color'] = color
+
+    carrier_device = extract_carrier_device(text_combined)
+    if carrier_device:
+        device_info['carrier'] = carrier_device
+
+    tracking, carrier = extract_tracking(text_full)
+    if tracking:
+        shipping_info['tracking_number'] = tracking
+        shipping_info['carrier'] = carrier
+
+    service = extract_shipping_service(text_full)
+    if service:
+        shipping_info['service'] = service
+
+    recipient = extract_recipient(text_full)
+    if recipient:
+        shipping_info['recipient_name'] = recipient
+
+    address = extract_address(text_full)
+    if address:
+        shipping_info['street_address'] = address
+
+    location = extract_location(text_full)
+    if location:
+        shipping_info.update(location)
+
+    return device_info, shipping_info
@@ -0,0 +1,349 @@
+"""
+Multi-page invoice OCR: PDF/TIFF/image bytes -> header fields and line items.
+
+Pages are rendered one at a time (pypdfium2 for PDFs, PIL frames for TIFFs) and
+handed to a process pool running Tesseract, with at most two pages per worker
+in flight, so a 40-page supplier invoice is never fully rasterized in memory.
+Each worker also groups its words into visual rows. Table extraction then walks
+the pages in order: a header row (Description / Qty / Price / Amount / IMEI)
+fixes the column spans, later rows are split into cells by those spans, and the
+columns carry over onto continuation pages without their own header. Wrapped
+descriptions and IMEI-only rows attach to the item above them.
+
+The result uses the same keys as backend/utils/ocrService.js (invoiceNumber,
+items[].model/quantity/price/imeis) so the Node upload flow can consume it.
+
+INVOICE_WORKERS sets the pool size and INVOICE_DPI the PDF render resolution.
+"""
+import io
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+DPI = int(os.getenv('INVOICE_DPI', 300))
+WORKERS = int(os.getenv('INVOICE_WORKERS', os.cpu_count() or 1))
+
+# Header cell -> (column, score); a cell takes the first pattern it matches, so
+# 'Unit Price' is a price, not a quantity. When several cells claim a column the
+# higher score wins: 'Description' beats an 'Item' (number) column for the model.
+COLUMNS = [
+    ('imei', re.compile(r'\b(imeis?|serial|s/n)\b', re.IGNORECASE), 1),
+    ('quantity', re.compile(r'^(qty|quantity|qnty)\b', re.IGNORECASE), 1),
+    ('price', re.compile(r'\b(price|rate|cost)\b', re.IGNORECASE), 1),
+    ('amount', re.compile(r'\b(amount|total|ext(ended)?)\b', re.IGNORECASE), 1),
+    ('model', re.compile(r'\b(desc(ription)?|model|product|device)\b', re.IGNORECASE), 2),
+    ('model', re.compile(r'\bitems?\b', re.IGNORECASE), 1),
+]
+
+# Rows that end a line-item table
+TABLE_END = re.compile(r'^\s*(sub\s*-?total|total|tax|shipping|freight|balance|amount due)\b', re.IGNORECASE)
+
+MODEL_PATTERNS = [
+    re.compile(r'iPhone\s+\d+\s*(?:Pro\s*Max|Pro|Max|Plus|Mini)?', re.IGNORECASE),
+    re.compile(r'iPad\s+[A-Za-z0-9 ]+?(?=\s{2}|\s*\d+GB|$)', re.IGNORECASE),
+    re.compile(r'Samsung\s+Galaxy\s+[A-Z0-9+]+(?:\s+(?:Ultra|Plus|FE))?', re.IGNORECASE),
+    re.compile(r'Google\s+Pixel\s+\d+\s*(?:Pro|a)?', re.IGNORECASE),
+]
+
+# Not followed by more digits or GB/TB, so '128GB' in a description is no price
+MONEY = re.compile(r'-?\$?\s*(\d{1,3}(?:,\d{3})+|\d+)(\.\d{2})?(?!\.?\d)(?!\s*[GgTt][Bb]\b)')
+IMEI = re.compile(r'(?<!\d)(\d{15})(?!\d)')
+
+
+def _luhn_ok(digits):
+    total = 0
+    for i, d in enumerate(int(c) for c in reversed(digits)):
+        if i % 2:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return total % 10 == 0
+
+
+def find_imeis(text):
+    imeis = [m for m in IMEI.findall(text) if _luhn_ok(m)]
+    if not imeis:
+        # Grouped as printed on some invoices: 3569 3803 5643 809
+        imeis = [m for m in IMEI.findall(re.sub(r'(?<=\d)[ -](?=\d)', '', text)) if _luhn_ok(m)]
+    return imeis
+
+
+def _money(text):
+    m = MONEY.search(text)
+    if not m:
+        return None
+    return float(m.group(1).replace(',', '') + (m.group(2) or ''))
+
+
+def _quantity(text):
+    m = re.search(r'(?<![\d.])(\d{1,4})(?![\d.,])', text)
+    return int(m.group(1)) if m else None
+
+
+def iter_pages(data):
+    """Yield each page as a grayscale PIL image, rendering lazily."""
+    if data[:5] == b'%PDF-':
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(data)
+        try:
+            for i in range(len(pdf)):
+                page = pdf[i]
+                try:
+                    yield page.render(scale=DPI / 72.0, grayscale=True).to_pil().convert('L')
+                finally:
+                    page.close()
+        finally:
+            pdf.close()
+        return
+
+    from PIL import Image, ImageSequence
+
+    with Image.open(io.BytesIO(data)) as image:
+        for frame in ImageSequence.Iterator(image):
+            yield frame.convert('L')
+
+
+def _init_worker():
+    # One Tesseract thread per process; the pool is the parallelism
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+def ocr_page(job):
+    """(page_no, mode, size, raw pixels) -> {'page', 'width', 'height', 'rows'}; rows are lists of cells."""
+    import numpy as np
+    import pytesseract
+    from PIL import Image
+
+    page_no, mode, size, pixels = job
+    image = Image.frombytes(mode, size, pixels)
+    # Low-resolution scans (faxed invoices) read much better at ~300dpi
+    if image.width < 1700:
+        image = image.resize((image.width * 2, image.height * 2), Image.BICUBIC)
+
+    data = pytesseract.image_to_data(image, config='--psm 4', output_type=pytesseract.Output.DICT)
+    words = []
+    for text, conf, left, top, width, height in zip(data['text'], data['conf'], data['left'], data['top'],
+                                                    data['width'], data['height']):
+        if text.strip() and float(conf) >= 0:
+            words.append({'text': text.strip(), 'conf': float(conf), 'left': left, 'top': top,
+                          'right': left + width, 'height': height})
+    line_height = float(np.median([w['height'] for w in words])) if words else 0.0
+    return {'page': page_no, 'width': image.width, 'height': image.height, 'line_height': line_height,
+            'rows': group_rows(words, line_height)}
+
+
+def group_rows(words, line_height):
+    """
+    Group words into visual rows by vertical center (Tesseract's own line order
+    breaks up table rows whose cells sit in different blocks), then split each
+    row into cells at horizontal gaps wider than about one line height.
+    """
+    if not words:
+        return []
+    rows = []
+    for w in sorted(words, key=lambda w: w['top'] + w['height'] / 2.0):
+        center = w['top'] + w['height'] / 2.0
+        if rows and abs(center - rows[-1]['center']) <= 0.5 * line_height:
+            row = rows[-1]
+            row['words'].append(w)
+            row['center'] += (center - row['center']) / len(row['words'])
+        else:
+            rows.append({'center': center, 'words': [w]})
+
+    grouped = []
+    for row in rows:
+        cells = []
+        for w in sorted(row['words'], key=lambda w: w['left']):
+            if cells and w['left'] - cells[-1]['right'] <= 1.2 * line_height:
+                cells[-1]['text'] += ' ' + w['text']
+                cells[-1]['right'] = w['right']
+            else:
+                cells.append({'text': w['text'], 'left': w['left'], 'right': w['right']})
+        grouped.append({'top': min(w['top'] for w in row['words']), 'cells': cells})
+    return grouped
+
+
+def _header_columns(cells):
+    """
+    Column spans from a header row, or None when the row isn't a table header.
+    Header cells that lose their column to a better match stay as unnamed (None)
+    spans, so their values don't spill into a neighbouring column.
+    """
+    best = {}
+    matched = []
+    for cell in cells:
+        for name, pattern, score in COLUMNS:
+            if pattern.search(cell['text']):
+                matched.append((name, score, cell))
+                if name not in best or score > best[name][0]:
+                    best[name] = (score, id(cell))
+                break
+    columns = [(name if best[name][1] == id(cell) else None, cell['left'], cell['right'])
+               for name, score, cell in matched]
+    if 'model' in best and len(best) >= 2:
+        return columns
+    return None
+
+
+def _assign(cells, columns):
+    """Map each cell to the header column it overlaps most (nearest center when none overlap)."""
+    values = {}
+    for cell in cells:
+        best, best_score = None, None
+        for name, left, right in columns:
+            overlap = min(cell['right'], right) - max(cell['left'], left)
+            distance = abs((cell['left'] + cell['right']) / 2.0 - (left + right) / 2.0)
+            score = (overlap > 0, overlap if overlap > 0 else -distance)
+            if best_score is None or score > best_score:
+                best, best_score = name, score
+        values[best] = (values[best] + ' ' + cell['text']) if best in values else cell['text']
+    return values
+
+
+def _row_model(text):
+    for pattern in MODEL_PATTERNS:
+        m = pattern.search(text)
+        if m:
+            return m.group(0).strip()
+    return None
+
+
+class TableReader:
+    """Accumulates line items across pages in order, keeping the column layout between pages."""
+
+    def __init__(self):
+        self.columns = None
+        self.in_table = False
+        self.items = []
+        self._last_top = None
+        self._last_page = None
+
+    def feed(self, page):
+        line_height = page['line_height'] or 1.0
+        for row in page['rows']:
+            cells = row['cells']
+            text = ' '.join(c['text'] for c in cells)
+            header = _header_columns(cells)
+            if header:
+                self.columns, self.in_table = header, True
+                self._last_top = None
+                continue
+            if TABLE_END.match(text):
+                self.in_table = False
+                continue
+            if self.columns and self.in_table:
+                self._table_row(page['page'], row, _assign(cells, self.columns), text, line_height)
+            else:
+                self._loose_row(page['page'], text)
+
+    def _table_row(self, page_no, row, values, text, line_height):
+        model = values.get('model', '').strip()
+        imeis = find_imeis(values.get('imei', '') or text)
+        quantity = _quantity(values['quantity']) if values.get('quantity') else None
+        price = _money(values['price']) if values.get('price') else None
+        amount = _money(values['amount']) if values.get('amount') else None
+        last = self.items[-1] if self.items else None
+        near = (last is not None and self._last_page == page_no and self._last_top is not None
+                and row['top'] - self._last_top <= 2.5 * line_height)
+
+        if model and (quantity or price or amount):
+            if price is None and amount is not None and quantity:
+                price = round(amount / quantity, 2)
+            self.items.append({'model': _row_model(model) or model, 'description': model,
+                               'quantity': quantity or 1, 'price': price or 0, 'amount': amount,
+                               'imeis': imeis, 'page': page_no})
+        elif last and imeis:
+            last['imeis'].extend(imeis)
+        elif last and model and near:
+            # Wrapped description line
+            last['description'] += ' ' + model
+            last['model'] = _row_model(last['description']) or last['description']
+        else:
+            return
+        self._last_top, self._last_page = row['top'], page_no
+
+    def _loose_row(self, page_no, text):
+        # No table header seen: same per-line heuristics as the Node extractor
+        model = _row_model(text)
+        if model:
+            rest = text.replace(model, ' ')
+            qty = re.search(r'(?:qty|quantity|x)[\s:]*(\d+)', rest, re.IGNORECASE)
+            if qty:
+                rest = rest[:qty.start()] + ' ' + rest[qty.end():]
+            self.items.append({'model': model, 'description': text, 'quantity': int(qty.group(1)) if qty else 1,
+                               'price': _money(rest) or 0, 'amount': None, 'imeis': find_imeis(text),
+                               'page': page_no})
+        elif self.items and find_imeis(text):
+            self.items[-1]['imeis'].extend(find_imeis(text))
+
+
+def extract_header(text):
+    invoice = re.search(r'(?:Invoice|INV)\s*(?:No\.?|Number|#)?[:\s#-]*([A-Z0-9][A-Z0-9-]{2,})', text, re.IGNORECASE)
+    date = re.search(r'(?:Date|Dated)[:\s]*(\d{1,2}[/\-.]\d{1,2}[/\-.]\d{2,4}|\w{3,9}\.? \d{1,2},? \d{4})',
+                     text, re.IGNORECASE)
+    return {
+        'invoiceNumber': invoice.group(1) if invoice else None,
+        'date': date.group(1) if date else None,
+    }
+
+
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        # spawn: the service process already holds torch/OpenMP state that must not be forked.
+        # Started through `python -m ocr`, workers import only this module (see ocr/__main__.py)
+        _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                                    initializer=_init_worker)
+    return _pool
+
+
+def iter_page_results(data, pool=None):
+    """OCR pages in parallel and yield their results in page order as they finish."""
+    pool = pool or get_pool()
+    window = 2 * WORKERS
+    pending = []
+    for page_no, image in enumerate(iter_pages(data), start=1):
+        # Raw pixels, not PNG: encoding every 300dpi page here would serialize the pool behind this loop
+        pending.append(pool.submit(ocr_page, (page_no, image.mode, image.size, image.tobytes())))
+        if len(pending) >= window:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+
+def page_text(page):
+    return '\n'.join(' '.join(c['text'] for c in row['cells']) for row in page['rows'])
+
+
+def stream_invoice(data, pool=None):
+    """Yield {'page', 'items'} as each page completes (items = line items so far), then the full result."""
+    table = TableReader()
+    texts = []
+    for page in iter_page_results(data, pool):
+        table.feed(page)
+        texts.append(page_text(page))
+        yield {'page': page['page'], 'items': len(table.items)}
+
+    first = texts[0] if texts else ''
+    lines = [line.strip() for line in first.split('\n') if line.strip()]
+    result = extract_header('\n'.join(texts[:2]))
+    result.update({
+        'success': True,
+        'pages': len(texts),
+        'supplier': lines[0] if lines else None,
+        'items': table.items,
+        'rawText': '\n\f'.join(texts),
+    })
+    yield result
+
+
+def process_invoice(data, pool=None):
+    for result in stream_invoice(data, pool):
+        pass
+    return result
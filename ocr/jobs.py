@@ -0,0 +1,298 @@
+"""
+Durable, prioritized scan job queue with polling and Server-Sent Events.
+
+    POST /jobs                 multipart 'image' (+ kind, priority, params) -> {'job_id'} at once
+    GET  /jobs/<id>            current status, and the result once done
+    GET  /jobs/<id>/events     text/event-stream of status changes until done/failed
+    GET  /jobs/files/<name>    a file a job wrote (e.g. the straightened label)
+
+Jobs live in SQLite (OCR_JOBS_DB, default data/ocr_jobs.sqlite3), so queued
+work survives a restart. Lower priority numbers run first: interactive single
+scans (0) overtake bulk backfills (10). OCR_JOB_WORKERS sets the worker threads.
+
+A worker holds a lease on the job it runs and renews it while the job runs, so
+several processes can share one database: a job whose lease runs out (its
+process died) goes back to the queue, and after OCR_JOB_MAX_ATTEMPTS tries it
+is failed instead. Every job needs an uploaded image and may only carry the
+params its kind declares; handlers write output only under the queue's files
+directory (OCR_JOBS_FILES), which is pruned after a day. With OCR_JOBS_TOKEN
+set every /jobs endpoint needs 'Authorization: Bearer <token>'.
+"""
+import hmac
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from flask import Blueprint, Response, jsonify, request, send_from_directory
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DEFAULT_PATH = os.path.join(DATA_DIR, 'ocr_jobs.sqlite3')
+DEFAULT_FILES = os.path.join(DATA_DIR, 'job_files')
+
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 3
+FILES_MAX_AGE = 24 * 3600
+
+PRIORITIES = {'interactive': 0, 'normal': 5, 'bulk': 10}
+FINISHED = ('done', 'failed')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    params TEXT NOT NULL,
+    payload BLOB,
+    result TEXT,
+    error TEXT,
+    owner TEXT,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority, created_at);
+'''
+
+# Columns added after the first release; older databases get them on open
+MIGRATIONS = {'owner': 'ALTER TABLE jobs ADD COLUMN owner TEXT',
+              'lease_until': 'ALTER TABLE jobs ADD COLUMN lease_until REAL'}
+
+
+class JobQueue:
+    def __init__(self, path=DEFAULT_PATH, handlers=None, workers=1, params=None, files=DEFAULT_FILES,
+                 lease=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        os.makedirs(files, exist_ok=True)
+        self.handlers = handlers or {}
+        # kind -> the param names a job of that kind may carry
+        self.params = params or {}
+        self.files = files
+        self.workers = workers
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._version = 0
+        self._stop = threading.Event()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(jobs)')}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(statement)
+
+    def submit(self, kind, payload=None, params=None, priority=PRIORITIES['normal']):
+        if kind not in self.handlers:
+            raise ValueError(f'Unknown job kind: {kind}')
+        if not isinstance(params or {}, dict):
+            raise ValueError('params must be an object')
+        unknown = sorted(set(params or {}) - set(self.params.get(kind, ())))
+        if unknown:
+            raise ValueError(f"Unknown params for {kind}: {', '.join(unknown)}")
+        if any(not isinstance(v, (str, int, float, bool, type(None))) for v in (params or {}).values()):
+            raise ValueError('params values must be strings or numbers')
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, priority, status, created_at, params, payload) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, int(priority), time.time(), json.dumps(params or {}), payload))
+        self._notify()
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT id, kind, priority, status, created_at, started_at, finished_at, attempts, result, error '
+                'FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if not row:
+            return None
+        job = dict(zip(('id', 'kind', 'priority', 'status', 'created_at', 'started_at', 'finished_at',
+                        'attempts', 'result', 'error'), row))
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        if job['status'] == 'queued':
+            with self._lock:
+                job['position'] = self._conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND "
+                    "(priority < ? OR (priority = ? AND created_at < ?))",
+                    (job['priority'], job['priority'], job['created_at'])).fetchone()[0]
+        return job
+
+    def claim(self):
+        """
+        Atomically take the most urgent job that is queued or whose lease ran
+        out, or None. Jobs that already used up their attempts are failed.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                expired = "status = 'running' AND (lease_until IS NULL OR lease_until < ?)"
+                given_up = self._conn.execute(
+                    f"UPDATE jobs SET status = 'failed', finished_at = ?, error = ?, payload = NULL, owner = NULL "
+                    f"WHERE {expired} AND attempts >= ?",
+                    (now, f'Gave up after {self.max_attempts} attempts', now, self.max_attempts)).rowcount
+                row = self._conn.execute(
+                    f"SELECT id, kind, params, payload FROM jobs WHERE status = 'queued' OR ({expired}) "
+                    "ORDER BY priority, created_at LIMIT 1", (now,)).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1, "
+                        "owner = ?, lease_until = ? WHERE id = ?",
+                        (now, self.owner, now + self.lease, row[0]))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        if row or given_up:
+            self._notify()
+        if row:
+            return {'id': row[0], 'kind': row[1], 'params': json.loads(row[2]), 'payload': row[3]}
+        return None
+
+    def renew(self):
+        """Extend the leases of the jobs this queue is running."""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET lease_until = ? WHERE status = 'running' AND owner = ?",
+                               (time.time() + self.lease, self.owner))
+
+    def finish(self, job_id, result=None, error=None):
+        status = 'failed' if error else 'done'
+        with self._lock:
+            # The image is no longer needed once the job has an outcome. A job
+            # whose lease was taken over belongs to the new owner now.
+            self._conn.execute(
+                'UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ?, payload = NULL, owner = NULL, '
+                "lease_until = NULL WHERE id = ? AND owner = ? AND status = 'running'",
+                (status, time.time(), json.dumps(result) if result is not None else None, error,
+                 job_id, self.owner))
+        self._notify()
+
+    def changes(self):
+        """A token for wait_for_change: read it before looking at the state you wait on."""
+        with self._changed:
+            return self._version
+
+    def wait_for_change(self, timeout, seen):
+        """
+        Wait until something changed since changes() returned `seen`, or for
+        timeout seconds. A change between reading `seen` and waiting is not
+        lost. Other processes don't notify; the timeout covers them.
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: self._version != seen, timeout)
+
+    def _notify(self):
+        with self._changed:
+            self._version += 1
+            self._changed.notify_all()
+
+    def _work(self):
+        while not self._stop.is_set():
+            seen = self.changes()
+            job = self.claim()
+            if job is None:
+                self.wait_for_change(5, seen)
+                continue
+            try:
+                result = self.handlers[job['kind']](job['payload'], job['params'])
+                self.finish(job['id'], result=result)
+            except Exception as e:
+                print(f"Job {job['id']} ({job['kind']}) failed: {e}")
+                self.finish(job['id'], error=str(e))
+
+    def _housekeep(self):
+        while not self._stop.wait(self.lease / 3.0):
+            self.renew()
+            cutoff = time.time() - FILES_MAX_AGE
+            for entry in os.scandir(self.files):
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+
+    def start(self):
+        for _ in range(self.workers):
+            threading.Thread(target=self._work, daemon=True).start()
+        threading.Thread(target=self._housekeep, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._notify()
+
+
+def jobs_blueprint(queue, token=None):
+    bp = Blueprint('jobs', __name__)
+
+    if token:
+        @bp.before_request
+        def check_token():
+            given = request.headers.get('Authorization', '')
+            if not hmac.compare_digest(given.encode(), f'Bearer {token}'.encode()):
+                return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+
+    @bp.route('/jobs', methods=['POST'])
+    def submit_job():
+        kind = request.values.get('kind', 'scan')
+        priority = request.values.get('priority', 'normal')
+        priority = PRIORITIES.get(priority, priority)
+        try:
+            params = json.loads(request.values.get('params') or '{}')
+            file = request.files.get('image')
+            if not file:
+                raise ValueError('No image')
+            job_id = queue.submit(kind, file.read(), params, int(priority))
+        except (ValueError, TypeError) as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        return jsonify({'success': True, 'job_id': job_id, 'status': 'queued'}), 202
+
+    @bp.route('/jobs/<job_id>')
+    def get_job(job_id):
+        job = queue.get(job_id)
+        if not job:
+            return jsonify({'success': False, 'error': 'Unknown job'}), 404
+        return jsonify({'success': True, 'job': job})
+
+    @bp.route('/jobs/<job_id>/events')
+    def job_events(job_id):
+        if not queue.get(job_id):
+            return jsonify({'success': False, 'error': 'Unknown job'}), 404
+
+        def stream():
+            last = None
+            while True:
+                seen = queue.changes()
+                job = queue.get(job_id)
+                state = (job['status'], job.get('position'))
+                if state != last:
+                    yield f"event: {job['status']}\ndata: {json.dumps(job)}\n\n"
+                    last = state
+                else:
+                    yield ': keep-alive\n\n'
+                if job['status'] in FINISHED:
+                    return
+                queue.wait_for_change(15, seen)
+
+        return Response(stream(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @bp.route('/jobs/files/<name>')
+    def job_file(name):
+        return send_from_directory(queue.files, name)
+
+    return bp
+
+
+def open_queue(handlers, params=None):
+    path = os.getenv('OCR_JOBS_DB', DEFAULT_PATH)
+    return JobQueue(path, handlers, workers=int(os.getenv('OCR_JOB_WORKERS', 1)), params=params,
+                    files=os.getenv('OCR_JOBS_FILES', DEFAULT_FILES),
+                    max_attempts=int(os.getenv('OCR_JOB_MAX_ATTEMPTS', MAX_ATTEMPTS)))
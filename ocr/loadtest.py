@@ -0,0 +1,391 @@
+"""
+Load generator for a local EasyOCR service: replays a folder of real scans.
+
+    python -m ocr.loadtest <image_dir> --rate 2 --duration 120 --pid $(pgrep -f app_easyocr)
+    python -m ocr.loadtest <image_dir> --concurrency 8 --requests 400 --target straighten
+
+Open-loop mode (--rate) sends requests on a Poisson arrival schedule no matter
+how fast the server answers, and latency is measured from each request's
+scheduled send time, so a saturated server shows up as growing latency rather
+than a politely slowed-down client. Closed-loop mode (--concurrency) keeps N
+requests in flight.
+
+Targets:
+    scan         POST /scan with the image (extra form fields via --field k=v)
+    tray         POST /scan with mode=tray
+    straighten   POST /jobs kind=straighten with the image, then poll until the
+                 job finishes; label_box comes from <image stem>.json when present
+                 (--token or OCR_JOBS_TOKEN when the service requires one)
+
+With --pid the server's RSS (including pipeline worker processes) and CPU are
+sampled once per second. The report is JSON (--out report.json) plus a
+self-contained HTML page next to it; --baseline prev.json prints the deltas.
+"""
+import argparse
+import glob
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from ocr.bench_backends import IMAGE_EXTS, percentile
+
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+PERCENTILES = (50, 90, 95, 99)
+
+
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, data) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: application/octet-stream\r\n\r\n'.encode() + data + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def _request(url, body=None, content_type=None, timeout=60, token=None):
+    req = urllib.request.Request(url, data=body, method='POST' if body is not None else 'GET')
+    if content_type:
+        req.add_header('Content-Type', content_type)
+    if token:
+        req.add_header('Authorization', f'Bearer {token}')
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+
+def label_box(path):
+    # synth.py writes synth_000001.jpg next to synth_000001.json
+    truth = os.path.splitext(path)[0] + '.json'
+    if os.path.exists(truth):
+        with open(truth) as f:
+            box = json.load(f).get('label_box')
+        if box:
+            return ','.join(str(int(v)) for v in box)
+    return '0,0,1000,1000'
+
+
+class Target:
+    def __init__(self, kind, url, fields, timeout, token=None):
+        self.kind = kind
+        self.url = url.rstrip('/')
+        self.fields = fields
+        self.timeout = timeout
+        self.token = token
+
+    def __call__(self, path, data):
+        """Send one request; raises on HTTP errors, timeouts and success=False responses."""
+        if self.kind in ('scan', 'tray'):
+            fields = dict(self.fields, **({'mode': 'tray'} if self.kind == 'tray' else {}))
+            body, content_type = multipart(fields, {'image': (os.path.basename(path), data)})
+            result = _request(self.url + '/scan', body, content_type, self.timeout)
+        else:
+            # The service writes the label into its own files dir; the client only sends the photo
+            fields = dict(self.fields, kind='straighten', params=json.dumps({'label_box': label_box(path)}))
+            body, content_type = multipart(fields, {'image': (os.path.basename(path), data)})
+            job_id = _request(self.url + '/jobs', body, content_type, self.timeout, self.token)['job_id']
+            deadline = time.time() + self.timeout
+            while True:
+                job = _request(f'{self.url}/jobs/{job_id}', timeout=self.timeout, token=self.token)['job']
+                if job['status'] in ('done', 'failed'):
+                    break
+                if time.time() > deadline:
+                    raise TimeoutError(f'job {job_id} still {job["status"]}')
+                time.sleep(0.05)
+            if job['status'] == 'failed':
+                raise RuntimeError(job['error'])
+            result = job['result']
+        if not result.get('success', True):
+            raise RuntimeError(result.get('error', 'success=false'))
+        return result
+
+
+def _proc_tree(pid):
+    """pid plus every descendant (pipeline and invoice workers count towards server memory)."""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        p = stack.pop()
+        tree.append(p)
+        stack.extend(children.get(p, []))
+    return tree
+
+
+def _proc_usage(pids):
+    rss_kb, ticks = 0, 0
+    for p in pids:
+        try:
+            with open(f'/proc/{p}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        rss_kb += int(line.split()[1])
+            with open(f'/proc/{p}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            ticks += int(fields[11]) + int(fields[12])
+        except (OSError, IndexError, ValueError):
+            continue
+    return rss_kb / 1024.0, ticks
+
+
+class ResourceSampler(threading.Thread):
+    def __init__(self, pid, start, interval=1.0):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.start_time = start
+        self.interval = interval
+        self.samples = []
+        self._done = threading.Event()
+        self._hz = os.sysconf('SC_CLK_TCK')
+
+    def run(self):
+        last_ticks, last_t = None, None
+        while not self._done.is_set():
+            pids = _proc_tree(self.pid)
+            rss, ticks = _proc_usage(pids)
+            now = time.time()
+            cpu = None
+            if last_ticks is not None:
+                cpu = round(100.0 * (ticks - last_ticks) / self._hz / (now - last_t), 1)
+            self.samples.append({'t': round(now - self.start_time, 2), 'rss_mb': round(rss, 1),
+                                 'cpu_pct': cpu, 'processes': len(pids)})
+            last_ticks, last_t = ticks, now
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def run_load(target, images, rate=None, concurrency=None, duration=None, requests=None, max_inflight=256):
+    """Return one record per request: scheduled/start/end offsets, image, ok, error kind."""
+    payloads = []
+    for path in images:
+        with open(path, 'rb') as f:
+            payloads.append((path, f.read()))
+    records = []
+    lock = threading.Lock()
+    start = time.time()
+
+    def send(path, data, scheduled):
+        sent = time.time()
+        record = {'image': os.path.basename(path), 'scheduled': scheduled - start, 'sent': sent - start}
+        try:
+            target(path, data)
+            record['ok'] = True
+        except (TimeoutError, urllib.error.URLError) as e:
+            timeout = isinstance(e, TimeoutError) or isinstance(getattr(e, 'reason', None), TimeoutError)
+            record.update(ok=False, error='timeout' if timeout else 'http', detail=str(e)[:200])
+        except Exception as e:
+            record.update(ok=False, error='error', detail=str(e)[:200])
+        record['end'] = time.time() - start
+        # Open loop: latency counts from when the request was due, not when a thread got to it
+        record['latency'] = record['end'] - record['scheduled']
+        with lock:
+            records.append(record)
+
+    def more(n, now):
+        if requests is not None and n >= requests:
+            return False
+        return duration is None or now - start < duration
+
+    source = itertools.cycle(payloads)
+    if rate:
+        with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+            due = start
+            for n in itertools.count():
+                if not more(n, due):
+                    break
+                delay = due - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                path, data = next(source)
+                pool.submit(send, path, data, due)
+                due += random.expovariate(rate)
+    else:
+        counter = itertools.count()
+        source_lock = threading.Lock()
+
+        def loop():
+            while True:
+                with source_lock:
+                    n = next(counter)
+                    path, data = next(source)
+                if not more(n, time.time()):
+                    return
+                send(path, data, time.time())
+
+        threads = [threading.Thread(target=loop) for _ in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    return sorted(records, key=lambda r: r['scheduled'])
+
+
+def summarize(records, wall_s):
+    ok = [r['latency'] for r in records if r['ok']]
+    errors = [r for r in records if not r['ok']]
+    summary = {
+        'requests': len(records),
+        'ok': len(ok),
+        'error_rate': round(len(errors) / len(records), 4) if records else 0.0,
+        'timeout_rate': round(sum(1 for r in errors if r['error'] == 'timeout') / len(records), 4) if records else 0.0,
+        'throughput_rps': round(len(ok) / wall_s, 3) if wall_s else 0.0,
+        'offered_rps': round(len(records) / wall_s, 3) if wall_s else 0.0,
+        'latency_mean_s': round(sum(ok) / len(ok), 3) if ok else None,
+        'latency_max_s': round(max(ok), 3) if ok else None,
+    }
+    for pct in PERCENTILES:
+        value = percentile(ok, pct)
+        summary[f'latency_p{pct}_s'] = round(value, 3) if value is not None else None
+    return summary
+
+
+def timeline(records, bucket_s=5.0):
+    buckets = {}
+    for r in records:
+        buckets.setdefault(int(r['end'] // bucket_s), []).append(r)
+    rows = []
+    for b in sorted(buckets):
+        done = buckets[b]
+        ok = [r['latency'] for r in done if r['ok']]
+        rows.append({'t': b * bucket_s, 'completed': len(done), 'errors': len(done) - len(ok),
+                     'rps': round(len(ok) / bucket_s, 3),
+                     'p50_s': round(percentile(ok, 50), 3) if ok else None,
+                     'p95_s': round(percentile(ok, 95), 3) if ok else None})
+    return rows
+
+
+def _svg_series(title, points, unit, width=640, height=160):
+    points = [(x, y) for x, y in points if y is not None]
+    if not points:
+        return f'<h3>{title}</h3><p>no data</p>'
+    max_x = max(x for x, _ in points) or 1
+    max_y = max(y for _, y in points) or 1
+    coords = ' '.join(f'{40 + x / max_x * (width - 50):.1f},{height - 20 - y / max_y * (height - 30):.1f}'
+                      for x, y in points)
+    return (f'<h3>{title}</h3><svg width="{width}" height="{height}" style="border:1px solid #ddd">'
+            f'<polyline fill="none" stroke="#2a6fdb" stroke-width="2" points="{coords}"/>'
+            f'<text x="2" y="14" font-size="11">{max_y:.2f} {unit}</text>'
+            f'<text x="{width - 60}" y="{height - 4}" font-size="11">{max_x:.0f} s</text></svg>')
+
+
+def write_html(report, path, baseline=None):
+    rows = ''.join(f'<tr><td>{k}</td><td>{v}</td><td>{"" if baseline is None else baseline["summary"].get(k)}</td></tr>'
+                   for k, v in report['summary'].items())
+    tl = report['timeline']
+    charts = [
+        _svg_series('Throughput', [(r['t'], r['rps']) for r in tl], 'req/s'),
+        _svg_series('Latency p95', [(r['t'], r['p95_s']) for r in tl], 's'),
+    ]
+    if report['resources']:
+        charts.append(_svg_series('Server RSS', [(s['t'], s['rss_mb']) for s in report['resources']], 'MB'))
+        charts.append(_svg_series('Server CPU', [(s['t'], s['cpu_pct']) for s in report['resources']], '%'))
+    config = json.dumps(report['config'], indent=2)
+    with open(path, 'w') as f:
+        f.write(f'<!doctype html><html><head><meta charset="utf-8"><title>Load test {report["config"]["label"]}</title>'
+                f'<style>body{{font-family:sans-serif;margin:24px}}td{{padding:2px 12px}}</style></head><body>'
+                f'<h2>Load test: {report["config"]["label"]}</h2><pre>{config}</pre>'
+                f'<table><tr><th>metric</th><th>this run</th><th>baseline</th></tr>{rows}</table>'
+                f'{"".join(charts)}</body></html>')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('image_dir')
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--target', default='scan', choices=['scan', 'tray', 'straighten'])
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--rate', type=float, help='open loop: mean arrivals per second (Poisson)')
+    mode.add_argument('--concurrency', type=int, help='closed loop: requests kept in flight')
+    parser.add_argument('--duration', type=float, default=None, help='seconds to send for')
+    parser.add_argument('--requests', type=int, default=None, help='total requests to send')
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--field', action='append', default=[], help='extra form field k=v, e.g. strategy=dual-v2')
+    parser.add_argument('--token', default=os.getenv('OCR_JOBS_TOKEN'), help='bearer token for /jobs')
+    parser.add_argument('--pid', type=int, default=None, help='server pid for RSS/CPU sampling')
+    parser.add_argument('--label', default=None)
+    parser.add_argument('--out', default=None, help='JSON report path; HTML is written alongside')
+    parser.add_argument('--baseline', default=None, help='earlier JSON report to compare against')
+    args = parser.parse_args()
+
+    if urlparse(args.url).hostname not in LOCAL_HOSTS:
+        sys.exit(f'Refusing to load-test non-local host {args.url}')
+    if args.duration is None and args.requests is None:
+        args.duration = 60
+    images = sorted(p for p in glob.glob(os.path.join(args.image_dir, '*')) if p.lower().endswith(IMAGE_EXTS))
+    if not images:
+        sys.exit(f'No images found in {args.image_dir}')
+    fields = dict(f.split('=', 1) for f in args.field)
+
+    target = Target(args.target, args.url, fields, args.timeout, args.token)
+    start = time.time()
+    sampler = ResourceSampler(args.pid, start) if args.pid else None
+    if sampler:
+        sampler.start()
+    mode_desc = f'{args.rate}/s open loop' if args.rate else f'{args.concurrency} in flight'
+    print(f'{args.target} x {len(images)} images, {mode_desc}...')
+    records = run_load(target, images, args.rate, args.concurrency, args.duration, args.requests)
+    wall_s = time.time() - start
+    if sampler:
+        sampler.stop()
+
+    report = {
+        'config': {'label': args.label or f'{args.target}-{mode_desc}', 'url': args.url, 'target': args.target,
+                   'rate': args.rate, 'concurrency': args.concurrency, 'duration': args.duration,
+                   'requests': args.requests, 'timeout': args.timeout, 'fields': fields, 'images': len(images),
+                   'started_at': start},
+        'summary': summarize(records, wall_s),
+        'timeline': timeline(records),
+        'resources': sampler.samples if sampler else [],
+        'records': records,
+    }
+    if report['resources']:
+        report['summary']['rss_peak_mb'] = max(s['rss_mb'] for s in report['resources'])
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(f"\n{'metric':<18} {'value':>10}" + (f" {'baseline':>10} {'delta':>9}" if baseline else ''))
+    for key, value in report['summary'].items():
+        line = f'{key:<18} {value if value is not None else "-":>10}'
+        if baseline:
+            old = baseline['summary'].get(key)
+            delta = f'{(value - old) / old * 100:+.1f}%' if isinstance(old, (int, float)) and old and value is not None else ''
+            line += f' {old if old is not None else "-":>10} {delta:>9}'
+        print(line)
+
+    errors = {}
+    for r in records:
+        if not r['ok']:
+            errors[r['detail']] = errors.get(r['detail'], 0) + 1
+    for detail, count in sorted(errors.items(), key=lambda e: -e[1])[:5]:
+        print(f'  {count} x {detail}')
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        write_html(report, os.path.splitext(args.out)[0] + '.html', baseline)
+
+
+if __name__ == '__main__':
+    main()
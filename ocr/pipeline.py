@@ -0,0 +1,327 @@
+"""
+Pipelined, multi-process /scan engine.
+
+    decode/preprocess workers -> OCR workers -> extraction workers -> results
+
+Each stage is its own process pool. Decoded and preprocessed frames travel
+through per-pass shared-memory ring buffers (one fixed-size slot per frame);
+the queues between stages only carry slot numbers, shapes and small OCR
+results. Free-slot queues give backpressure: decoders block when every slot is
+in flight instead of piling decoded 12 MP frames up in memory.
+
+    pipeline = ScanPipeline('v2').start()
+    result = pipeline.scan(jpeg_bytes, timeout=60)
+    pipeline.stop()
+
+Each ring records which process holds each slot. A monitor thread respawns
+workers that die; the slots they held go back on the free queue and the jobs
+in them fail at once instead of waiting out their timeout.
+
+Enabled in the app with SCAN_PIPELINE=1; worker counts come from
+PIPELINE_DECODERS / PIPELINE_OCR_WORKERS / PIPELINE_EXTRACTORS and the slot
+size from PIPELINE_SLOT_MB.
+"""
+import atexit
+import itertools
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+# Seconds between worker liveness checks
+MONITOR_INTERVAL = 1.0
+# Slot owner while a frame waits in a queue between stages, held by no process
+QUEUED = -1
+
+# OCR passes each extractor version consumes
+PASSES = {
+    'v1': ['full'],
+    'v2': ['full', 'bottom'],
+}
+
+
+class FrameRing:
+    """Fixed-size frame slots in one shared-memory block, handed out through a free-slot queue."""
+
+    def __init__(self, ctx, slots, slot_bytes):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.free = ctx.Queue()
+        for slot in range(slots):
+            self.free.put(slot)
+        # Per slot: pid of the process holding it (0 free, QUEUED in transit) and its job id
+        self.owners = ctx.RawArray('i', slots)
+        self.jobs = ctx.RawArray('q', slots)
+
+    def __getstate__(self):
+        # Workers re-attach by name instead of pickling the block
+        return {'name': self.shm.name, 'slots': self.slots, 'slot_bytes': self.slot_bytes, 'free': self.free,
+                'owners': self.owners, 'jobs': self.jobs}
+
+    def __setstate__(self, state):
+        self.slots = state['slots']
+        self.slot_bytes = state['slot_bytes']
+        self.free = state['free']
+        self.owners = state['owners']
+        self.jobs = state['jobs']
+        try:
+            self.shm = shared_memory.SharedMemory(name=state['name'], track=False)
+        except TypeError:
+            # Before 3.13 attaching also registers the block, but with the resource tracker
+            # spawned workers share with the parent; leave that entry alone, since
+            # unregistering here would drop the parent's and leak the block
+            self.shm = shared_memory.SharedMemory(name=state['name'])
+
+    def put(self, array, job_id):
+        """Copy a frame into a free slot; frames larger than a slot travel inline instead."""
+        if array.nbytes > self.slot_bytes:
+            return ('inline', array)
+        import numpy as np
+
+        slot = self.free.get()
+        self.owners[slot], self.jobs[slot] = os.getpid(), job_id
+        view = np.ndarray(array.shape, array.dtype, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+        view[...] = array
+        return ('shm', slot, array.shape, array.dtype.str)
+
+    def hand_off(self, frame):
+        """Mark a frame as queued for the next stage, so the sender dying doesn't reclaim it."""
+        if frame[0] == 'shm':
+            self.owners[frame[1]] = QUEUED
+
+    def claim(self, frame):
+        """Take ownership of a frame received from the previous stage."""
+        if frame[0] == 'shm':
+            self.owners[frame[1]] = os.getpid()
+
+    def view(self, frame):
+        import numpy as np
+
+        if frame[0] == 'inline':
+            return frame[1]
+        _, slot, shape, dtype = frame
+        return np.ndarray(shape, np.dtype(dtype), buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def release(self, frame):
+        if frame[0] == 'shm':
+            self.owners[frame[1]] = 0
+            self.free.put(frame[1])
+
+    def reclaim(self, pid):
+        """Free the slots a dead process held; returns the ids of the jobs in them."""
+        jobs = []
+        for slot in range(self.slots):
+            if self.owners[slot] == pid:
+                jobs.append(self.jobs[slot])
+                self.owners[slot] = 0
+                self.free.put(slot)
+        return jobs
+
+    def close(self, unlink=False):
+        if self.shm is None:
+            return
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+        self.shm = None
+
+
+def _decode_worker(passes, rings, in_queue, ocr_queue, result_queue):
+    import cv2
+    import numpy as np
+
+    from orientation import auto_orient
+
+    from ocr.preprocess import bottom_half_for_stickers
+
+    while True:
+        item = in_queue.get()
+        if item is None:
+            return
+        job_id, data = item
+        frames = {}
+        try:
+            image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                raise ValueError('Could not decode image')
+            image, angle, confidence = auto_orient(image)
+            frames['full'] = rings['full'].put(image, job_id)
+            if 'bottom' in passes:
+                frames['bottom'] = rings['bottom'].put(bottom_half_for_stickers(image), job_id)
+            meta = {'size': (image.shape[1], image.shape[0]),
+                    'orientation': {'angle': angle, 'confidence': confidence}}
+            for name, frame in frames.items():
+                rings[name].hand_off(frame)
+            ocr_queue.put((job_id, meta, frames))
+        except Exception as e:
+            for name, frame in frames.items():
+                rings[name].release(frame)
+            result_queue.put((job_id, 'error', str(e)))
+
+
+def _ocr_worker(threads, rings, ocr_queue, extract_queue, result_queue):
+    os.environ['OCR_THREADS'] = str(threads)
+    from ocr.backends import create_reader
+    from ocr.store import serialize_results
+
+    reader = create_reader()
+    while True:
+        item = ocr_queue.get()
+        if item is None:
+            return
+        job_id, meta, frames = item
+        for name, frame in frames.items():
+            rings[name].claim(frame)
+        try:
+            passes = {}
+            for name, frame in frames.items():
+                passes[name] = serialize_results(reader.readtext(rings[name].view(frame)))
+            extract_queue.put((job_id, meta, passes))
+        except Exception as e:
+            result_queue.put((job_id, 'error', str(e)))
+        finally:
+            for name, frame in frames.items():
+                rings[name].release(frame)
+
+
+def _extract_worker(version, extract_queue, result_queue):
+    from ocr.extractors import EXTRACTORS, join_text
+
+    extract_fields = EXTRACTORS[version].extract_fields
+    while True:
+        item = extract_queue.get()
+        if item is None:
+            return
+        job_id, meta, passes = item
+        try:
+            texts = {name: join_text(results) for name, results in passes.items()}
+            device, shipping = extract_fields(texts)
+            result_queue.put((job_id, 'ok', dict(meta, device=device, shipping=shipping, texts=texts,
+                                                 passes=passes)))
+        except Exception as e:
+            result_queue.put((job_id, 'error', str(e)))
+
+
+class ScanPipeline:
+    def __init__(self, version='v2', decoders=None, ocr_workers=None, extractors=None, slots=None, slot_mb=None,
+                 passes=None):
+        cpus = os.cpu_count() or 1
+        self.version = version
+        self.passes = list(passes or PASSES[version])
+        self.decoders = decoders or int(os.getenv('PIPELINE_DECODERS', max(1, cpus // 4)))
+        self.ocr_workers = ocr_workers or int(os.getenv('PIPELINE_OCR_WORKERS', max(1, cpus // 2)))
+        self.extractors = extractors or int(os.getenv('PIPELINE_EXTRACTORS', 1))
+        # Enough slots that every decoder and OCR worker can hold a frame plus one queued
+        self.slots = slots or self.decoders + 2 * self.ocr_workers
+        self.slot_bytes = int(slot_mb or os.getenv('PIPELINE_SLOT_MB', 64)) * 1024 * 1024
+        self.threads_per_ocr = max(1, cpus // self.ocr_workers)
+
+        self._ids = itertools.count()
+        self._futures = {}
+        self._lock = threading.Lock()
+        # [process, target, args] per worker, in stage order, so dead ones can be respawned in place
+        self._workers = []
+        self._stopping = threading.Event()
+        self._rings = {}
+
+    def start(self):
+        ctx = mp.get_context('spawn')  # never fork a process that already holds torch state
+        self._rings = {name: FrameRing(ctx, self.slots, self.slot_bytes) for name in self.passes}
+        # The app never calls stop(); unlink the blocks at interpreter exit so restarts don't leak them
+        atexit.register(self._unlink_rings)
+        self._in = ctx.Queue(maxsize=self.slots)
+        self._ocr = ctx.Queue()
+        self._extract = ctx.Queue()
+        self._results = ctx.Queue()
+
+        stages = [
+            (self.decoders, _decode_worker, (self.passes, self._rings, self._in, self._ocr, self._results)),
+            (self.ocr_workers, _ocr_worker, (self.threads_per_ocr, self._rings, self._ocr, self._extract, self._results)),
+            (self.extractors, _extract_worker, (self.version, self._extract, self._results)),
+        ]
+        self._ctx = ctx
+        for count, target, args in stages:
+            for _ in range(count):
+                self._workers.append([self._spawn(target, args), target, args])
+
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        threading.Thread(target=self._monitor, daemon=True).start()
+        print(f'Scan pipeline: {self.decoders} decode, {self.ocr_workers} OCR '
+              f'({self.threads_per_ocr} threads each), {self.extractors} extract workers')
+        return self
+
+    def _spawn(self, target, args):
+        p = self._ctx.Process(target=target, args=args, daemon=True)
+        p.start()
+        return p
+
+    def _monitor(self):
+        while not self._stopping.wait(MONITOR_INTERVAL):
+            for worker in self._workers:
+                p, target, args = worker
+                if p.is_alive() or self._stopping.is_set():
+                    continue
+                print(f'Scan pipeline: {target.__name__} (pid {p.pid}) exited with {p.exitcode}; respawning')
+                for ring in self._rings.values():
+                    for job_id in ring.reclaim(p.pid):
+                        self._finish(job_id, 'error', f'Scan worker died (exit code {p.exitcode})')
+                worker[0] = self._spawn(target, args)
+
+    def submit(self, data):
+        """Queue encoded image bytes; the Future resolves to the extraction result dict."""
+        future = Future()
+        future.job_id = next(self._ids)
+        with self._lock:
+            self._futures[future.job_id] = future
+        self._in.put((future.job_id, data))
+        return future
+
+    def scan(self, data, timeout):
+        """submit() and wait for the result; a job that times out is dropped, and so is its late result."""
+        future = self.submit(data)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            with self._lock:
+                self._futures.pop(future.job_id, None)
+            raise
+
+    def _collect(self):
+        while True:
+            item = self._results.get()
+            if item is None:
+                return
+            self._finish(*item)
+
+    def _finish(self, job_id, status, payload):
+        with self._lock:
+            future = self._futures.pop(job_id, None)
+        if future is None:
+            return
+        if status == 'ok':
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(payload))
+
+    def stop(self):
+        self._stopping.set()
+        # Drain stage by stage so work already in flight still completes
+        stages = [(self._in, self.decoders), (self._ocr, self.ocr_workers), (self._extract, self.extractors)]
+        start = 0
+        for q, count in stages:
+            for _ in range(count):
+                q.put(None)
+            for p, _, _ in self._workers[start:start + count]:
+                p.join(timeout=60)
+            start += count
+        self._results.put(None)
+        self._collector.join(timeout=10)
+        self._unlink_rings()
+        atexit.unregister(self._unlink_rings)
+
+    def _unlink_rings(self):
+        for ring in self._rings.values():
+            ring.close(unlink=True)
@@ -0,0 +1,28 @@
+"""Image preprocessing shared by the scan apps and the pipelined scan workers."""
+import cv2
+
+
+# Shortest strip under a found shipping label, as a share of the frame height, read on its own
+MIN_STICKER_ROWS = 0.08
+
+
+def bottom_half_for_stickers(image, top=None):
+    """Upscaled bottom half (or the rows from `top` down) for small IMEI stickers on bubble wrap"""
+    h, w = image.shape[:2]
+    top = h // 2 if top is None else top
+    bottom = image[top:, :]
+    scale = 3.0
+    upscaled = cv2.resize(bottom, (int(w * scale), int((h - top) * scale)), interpolation=cv2.INTER_CUBIC)
+    gray = cv2.cvtColor(upscaled, cv2.COLOR_BGR2GRAY)
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+
+
+def below_label_for_stickers(image, label_bottom):
+    """
+    bottom_half_for_stickers without the rows a shipping label already covers.
+    A "label" reaching the bottom of the frame is as likely the whole photo
+    taken for one, so then the full bottom half is read after all.
+    """
+    h = image.shape[0]
+    top = max(h // 2, label_bottom)
+    return bottom_half_for_stickers(image, top if h - top >= MIN_STICKER_ROWS * h else None)
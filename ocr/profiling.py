@@ -0,0 +1,292 @@
+"""
+On-demand profiling of the scan service, behind OCR_DEBUG_TOKEN.
+
+    POST   /debug/profile   start: {"mode": "sample"|"deterministic", "requests": N, "seconds": T,
+                                    "interval_ms": 5}
+    GET    /debug/profile   status, or the profile once N requests / T seconds are done
+                            (?format=collapsed returns flamegraph.pl/speedscope text)
+    DELETE /debug/profile   stop early and return what was collected
+
+Send the token as 'Authorization: Bearer <token>'; without OCR_DEBUG_TOKEN set
+the endpoints don't exist. Only code inside profiler.request() blocks (/scan,
+tray, straighten and scan jobs) is profiled. Sample mode walks those threads'
+stacks every interval_ms from a background thread; the leaf frame keeps its
+line number so cv2.resize and adaptiveThreshold calls in the same function
+stay apart. Deterministic mode runs cProfile per request and merges the stats;
+only one request is profiled at a time (Python 3.12+ refuses a second active
+profiler), and requests arriving meanwhile run unprofiled and aren't counted.
+When no session is active request() returns a shared no-op context.
+
+Pipeline workers (SCAN_PIPELINE=1) run in other processes and aren't covered;
+the straighten.py script has its own STRAIGHTEN_PROFILE switch.
+"""
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Blueprint, Response, jsonify, request
+
+TOP = 30
+
+
+class _Noop:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _Noop()
+
+
+def _frame_name(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)})'
+
+
+class Session:
+    def __init__(self, mode, requests=None, seconds=None, interval_ms=5):
+        if mode not in ('sample', 'deterministic'):
+            raise ValueError(f'Unknown profile mode: {mode}')
+        if not requests and not seconds:
+            raise ValueError('Give requests and/or seconds')
+        self.mode = mode
+        self.remaining = int(requests) if requests else None
+        self.deadline = time.time() + float(seconds) if seconds else None
+        self.interval = max(1, int(interval_ms)) / 1000.0
+        self.started_at = time.time()
+        self.finished_at = None
+        self.requests = 0
+        self.samples = 0
+        self.stacks = Counter()
+        self.stats = None
+        self.done = threading.Event()
+
+    def expired(self):
+        return self.deadline is not None and time.time() >= self.deadline
+
+
+class _Request:
+    def __init__(self, profiler, session, label):
+        self.profiler = profiler
+        self.session = session
+        self.label = label
+        self.profile = None
+        self.active = False
+
+    def __enter__(self):
+        if self.session.mode == 'deterministic':
+            if not self.profiler._cprofile.acquire(blocking=False):
+                return self
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler (outside this module) is already active
+                self.profiler._cprofile.release()
+                return self
+            self.profile = profile
+        with self.profiler._lock:
+            self.profiler._active[threading.get_ident()] = (self.label, sys._getframe(1))
+        self.active = True
+        return self
+
+    def __exit__(self, *exc):
+        if not self.active:
+            return False
+        if self.profile:
+            self.profile.disable()
+            self.profiler._cprofile.release()
+        with self.profiler._lock:
+            self.profiler._active.pop(threading.get_ident(), None)
+            session = self.session
+            if self.profile:
+                if session.stats is None:
+                    session.stats = pstats.Stats(self.profile)
+                else:
+                    session.stats.add(self.profile)
+            session.requests += 1
+            if session.remaining is not None:
+                session.remaining -= 1
+                if session.remaining <= 0:
+                    self.profiler._finish(session)
+        return False
+
+
+class Profiler:
+    def __init__(self):
+        self.session = None
+        self.last = None
+        self._lock = threading.Lock()
+        # Held by the one request cProfile is running for (deterministic mode)
+        self._cprofile = threading.Lock()
+        self._active = {}
+
+    def request(self, label='scan'):
+        session = self.session
+        if session is None:
+            return _NOOP
+        if session.expired():
+            self._expire(session)
+            return _NOOP
+        return _Request(self, session, label)
+
+    def start(self, mode='sample', requests=None, seconds=None, interval_ms=5):
+        with self._lock:
+            if self.session is not None:
+                raise RuntimeError('A profile is already running')
+            session = Session(mode, requests, seconds, interval_ms)
+            self.session = session
+        if session.mode == 'sample':
+            threading.Thread(target=self._sample, args=(session,), daemon=True).start()
+        elif session.deadline:
+            timer = threading.Timer(session.deadline - time.time(), self._expire, args=(session,))
+            timer.daemon = True
+            timer.start()
+        return session
+
+    def stop(self):
+        with self._lock:
+            if self.session is not None:
+                self._finish(self.session)
+        return self.last
+
+    def _expire(self, session):
+        with self._lock:
+            self._finish(session)
+
+    def _finish(self, session):
+        # Caller holds self._lock
+        if self.session is session:
+            session.finished_at = time.time()
+            session.done.set()
+            self.session = None
+            self.last = session
+
+    def _sample(self, session):
+        while not session.done.wait(session.interval):
+            if session.expired():
+                self._expire(session)
+                return
+            frames = sys._current_frames()
+            with self._lock:
+                active = list(self._active.items())
+            for tid, (label, entry) in active:
+                frame = frames.get(tid)
+                if frame is None:
+                    continue
+                leaf = f'{_frame_name(frame.f_code)[:-1]}:{frame.f_lineno})'
+                names = []
+                frame = frame.f_back
+                while frame is not None and frame is not entry:
+                    names.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                names.reverse()
+                with self._lock:
+                    session.stacks[';'.join([label] + names + [leaf])] += 1
+                    session.samples += 1
+
+
+def _stacks(session):
+    with profiler._lock:
+        return Counter(session.stacks), session.samples
+
+
+def collapsed(session):
+    return ''.join(f'{stack} {count}\n' for stack, count in _stacks(session)[0].most_common())
+
+
+def report(session):
+    result = {
+        'mode': session.mode,
+        'running': not session.done.is_set(),
+        'started_at': session.started_at,
+        'duration_s': round((session.finished_at or time.time()) - session.started_at, 3),
+        'requests': session.requests,
+    }
+    if session.mode == 'sample':
+        stacks, samples = _stacks(session)
+        self_counts, total_counts = Counter(), Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(';')[1:]
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+        total = samples or 1
+        result.update({
+            'interval_ms': session.interval * 1000,
+            'samples': samples,
+            'top_self': [{'function': f, 'samples': c, 'pct': round(100.0 * c / total, 1)}
+                         for f, c in self_counts.most_common(TOP)],
+            'top_total': [{'function': f, 'samples': c, 'pct': round(100.0 * c / total, 1)}
+                          for f, c in total_counts.most_common(TOP)],
+            'collapsed': ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common()),
+        })
+    elif session.stats is not None:
+        out = io.StringIO()
+        with profiler._lock:
+            stats = pstats.Stats(stream=out).add(session.stats)
+        rows = []
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({'function': f'{name} ({os.path.basename(filename)}:{line})', 'calls': calls,
+                         'tottime_s': round(tottime, 4), 'cumtime_s': round(cumtime, 4)})
+        result['top_cumulative'] = sorted(rows, key=lambda r: -r['cumtime_s'])[:TOP]
+        result['top_self'] = sorted(rows, key=lambda r: -r['tottime_s'])[:TOP]
+        stats.sort_stats('cumulative').print_stats(TOP)
+        result['text'] = out.getvalue()
+    return result
+
+
+profiler = Profiler()
+
+
+def profiling_blueprint(token):
+    bp = Blueprint('profiling', __name__)
+
+    @bp.before_request
+    def check_token():
+        given = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(given.encode(), f'Bearer {token}'.encode()):
+            return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+
+    @bp.route('/debug/profile', methods=['POST'])
+    def start_profile():
+        options = request.get_json(silent=True) or request.values
+        try:
+            session = profiler.start(options.get('mode', 'sample'), options.get('requests'),
+                                     options.get('seconds'), options.get('interval_ms', 5))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        except RuntimeError as e:
+            return jsonify({'success': False, 'error': str(e)}), 409
+        return jsonify({'success': True, 'profile': report(session)})
+
+    @bp.route('/debug/profile', methods=['GET'])
+    def get_profile():
+        session = profiler.session or profiler.last
+        if session is None:
+            return jsonify({'success': False, 'error': 'No profile'}), 404
+        if request.args.get('format') == 'collapsed':
+            return Response(collapsed(session), mimetype='text/plain')
+        return jsonify({'success': True, 'profile': report(session)})
+
+    @bp.route('/debug/profile', methods=['DELETE'])
+    def stop_profile():
+        session = profiler.stop()
+        if session is None:
+            return jsonify({'success': False, 'error': 'No profile'}), 404
+        return jsonify({'success': True, 'profile': report(session)})
+
+    return bp
+
+
+def open_profiling():
+    """The debug blueprint when OCR_DEBUG_TOKEN is set, else None."""
+    token = os.getenv('OCR_DEBUG_TOKEN')
+    return profiling_blueprint(token) if token else None
@@ -0,0 +1,82 @@
+"""
+Re-run field extractors over stored OCR output and diff against what was returned.
+
+Usage:
+    python -m ocr.reextract [--extractors v2] [--store data/ocr_store.sqlite3]
+                            [--source dual-v2] [--workers 8] [--out diffs.jsonl]
+
+Rows are read in batches and fanned out to a process pool; each worker rebuilds
+the per-pass text from the stored boxes and calls extract_fields, so a full
+history replay costs regex time only.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from multiprocessing import Pool
+
+from ocr.extractors import EXTRACTORS, flatten, join_text
+from ocr.store import DEFAULT_PATH, ScanStore
+
+
+def diff_batch(job):
+    version, rows = job
+    extract_fields = EXTRACTORS[version].extract_fields
+    diffs = []
+    for scan_id, source, extractors, passes, device, shipping in rows:
+        texts = {name: join_text(results) for name, results in json.loads(passes).items()}
+        try:
+            new = flatten(*extract_fields(texts))
+        except Exception as e:
+            diffs.append({'id': scan_id, 'source': source, 'error': str(e)})
+            continue
+        old = flatten(json.loads(device), json.loads(shipping))
+        changed = {k: [old.get(k), new.get(k)] for k in sorted(set(old) | set(new)) if old.get(k) != new.get(k)}
+        if changed:
+            diffs.append({'id': scan_id, 'source': source, 'extractors': extractors, 'changed': changed})
+    return len(rows), diffs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--extractors', default='v2', choices=sorted(EXTRACTORS))
+    parser.add_argument('--store', default=os.getenv('OCR_STORE') or DEFAULT_PATH)
+    parser.add_argument('--source', default=None, help='only scans recorded by this strategy')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--out', default=None, help='write one JSON line per changed scan')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.store):
+        sys.exit(f'No OCR store at {args.store}')
+    store = ScanStore(args.store)
+
+    jobs = ((args.extractors, rows) for rows in store.iter_batches(args.batch_size, args.source))
+    total, changed_scans, errors = 0, 0, 0
+    field_changes = Counter()
+    out = open(args.out, 'w') if args.out else None
+    try:
+        with Pool(args.workers) as pool:
+            for count, diffs in pool.imap(diff_batch, jobs):
+                total += count
+                for diff in diffs:
+                    if 'error' in diff:
+                        errors += 1
+                    else:
+                        changed_scans += 1
+                        field_changes.update(diff['changed'].keys())
+                    if out:
+                        out.write(json.dumps(diff) + '\n')
+    finally:
+        if out:
+            out.close()
+        store.close()
+
+    print(f'Scans: {total}  changed: {changed_scans}  errors: {errors}')
+    for field, n in field_changes.most_common():
+        print(f'  {field:<28} {n}')
+
+
+if __name__ == '__main__':
+    main()
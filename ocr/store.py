@@ -0,0 +1,135 @@
+"""
+Append-only SQLite store of raw OCR output for every scan.
+
+Each row keeps the EasyOCR boxes, text and confidences for every pass the app
+ran, plus the fields it extracted at the time, so extractor changes can be
+replayed over history with ocr.reextract instead of re-running OCR.
+
+OCR_STORE sets the database path; set it to an empty string to disable.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'ocr_store.sqlite3')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    source TEXT NOT NULL,
+    extractors TEXT NOT NULL,
+    image_sha1 TEXT,
+    width INTEGER,
+    height INTEGER,
+    passes TEXT NOT NULL,
+    device TEXT NOT NULL,
+    shipping TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scans_image_sha1 ON scans (image_sha1);
+CREATE TABLE IF NOT EXISTS shadow_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    primary_strategy TEXT NOT NULL,
+    candidate TEXT NOT NULL,
+    primary_ms REAL NOT NULL,
+    candidate_ms REAL NOT NULL,
+    agreement REAL NOT NULL,
+    diffs TEXT NOT NULL
+);
+'''
+
+
+def serialize_results(results):
+    """EasyOCR readtext output -> JSON-safe [[box, text, conf], ...] (numpy ints/floats become Python)."""
+    return [[[[int(x), int(y)] for x, y in box], text, float(conf)] for box, text, conf in results]
+
+
+class ScanStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def record(self, source, extractors, passes, device, shipping, image_sha1=None, size=None):
+        """passes maps pass name -> readtext results; returns the new scan id."""
+        width, height = size or (None, None)
+        row = (
+            time.time(), source, extractors, image_sha1, width, height,
+            json.dumps({name: serialize_results(results) for name, results in passes.items()}),
+            json.dumps(device), json.dumps(shipping),
+        )
+        with self._lock:
+            cur = self._conn.execute(
+                'INSERT INTO scans (created_at, source, extractors, image_sha1, width, height, passes, device, shipping) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', row)
+            self._conn.commit()
+            return cur.lastrowid
+
+    def record_shadow(self, primary, candidate, primary_ms, candidate_ms, agreement, diffs):
+        """diffs maps field -> [primary value, candidate value] for the fields that disagree."""
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO shadow_runs (created_at, primary_strategy, candidate, primary_ms, candidate_ms, agreement, diffs) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (time.time(), primary, candidate, primary_ms, candidate_ms, agreement, json.dumps(diffs)))
+            self._conn.commit()
+
+    def shadow_summary(self):
+        """Per (primary, candidate) pair: run count, mean agreement, mean latencies and per-field disagreements."""
+        with self._lock:
+            pairs = self._conn.execute(
+                'SELECT primary_strategy, candidate, COUNT(*), AVG(agreement), AVG(primary_ms), AVG(candidate_ms) '
+                'FROM shadow_runs GROUP BY primary_strategy, candidate').fetchall()
+            fields = self._conn.execute(
+                'SELECT primary_strategy, candidate, diff.key, COUNT(*) '
+                'FROM shadow_runs, json_each(shadow_runs.diffs) AS diff '
+                'GROUP BY primary_strategy, candidate, diff.key').fetchall()
+        summary = {(primary, candidate): {
+            'primary': primary, 'candidate': candidate, 'runs': runs, 'agreement': round(agreement, 3),
+            'primary_ms': round(primary_ms, 3), 'candidate_ms': round(candidate_ms, 3), 'disagreements': {},
+        } for primary, candidate, runs, agreement, primary_ms, candidate_ms in pairs}
+        for primary, candidate, field, count in fields:
+            summary[(primary, candidate)]['disagreements'][field] = count
+        return list(summary.values())
+
+    def count(self, source=None):
+        sql, args = 'SELECT COUNT(*) FROM scans', ()
+        if source:
+            sql, args = sql + ' WHERE source = ?', (source,)
+        with self._lock:
+            return self._conn.execute(sql, args).fetchone()[0]
+
+    def iter_batches(self, batch_size=1000, source=None):
+        """Yield lists of raw rows (id, source, extractors, passes, device, shipping) in id order."""
+        last_id = 0
+        while True:
+            sql = 'SELECT id, source, extractors, passes, device, shipping FROM scans WHERE id > ?'
+            args = [last_id]
+            if source:
+                sql += ' AND source = ?'
+                args.append(source)
+            sql += ' ORDER BY id LIMIT ?'
+            args.append(batch_size)
+            with self._lock:
+                rows = self._conn.execute(sql, args).fetchall()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_store():
+    """The store configured by OCR_STORE, or None when recording is disabled."""
+    path = os.getenv('OCR_STORE', DEFAULT_PATH)
+    return ScanStore(path) if path else None
@@ -0,0 +1,141 @@
+"""
+Named scan strategies: which OCR passes to run and which extractor version reads them.
+
+    full-v1   full image only, v1 extractors (the original app_easyocr.py)
+    full-v2   full image only, v2 extractors
+    dual-v2   full image + upscaled bottom half, v2 extractors (app_easyocr-2.py)
+    template  carrier label zones (ocr.templates) + the bottom half below the label,
+              v2 extractors; falls back to dual-v2 when no known label layout is found
+
+Every strategy runs on the service's one shared Reader. OCR_STRATEGY picks the
+strategy that answers requests. SHADOW_STRATEGY names a candidate that is run
+on a SHADOW_SAMPLE fraction of scans (default 0.1) in a background thread after
+the response is built; its field agreement with the primary result and both
+latencies go to the store's shadow_runs table (summary at GET /strategies).
+Shadow runs share the Reader and the CPU with requests, so they are held to
+SHADOW_MAX_SHARE of wall time (default 0.2): after each run the runner idles
+for long enough that the run is that share of the total, and scans sampled
+while it idles are skipped.
+"""
+import os
+import queue
+import random
+import threading
+import time
+from collections import namedtuple
+
+from ocr.extractors import EXTRACTORS, flatten, join_text
+from ocr.preprocess import below_label_for_stickers, bottom_half_for_stickers
+from ocr.templates import read_label, validate_shipping
+
+Strategy = namedtuple('Strategy', 'name passes extractors templates fallback', defaults=(False, None))
+
+STRATEGIES = {
+    'full-v1': Strategy('full-v1', ('full',), 'v1'),
+    'full-v2': Strategy('full-v2', ('full',), 'v2'),
+    'dual-v2': Strategy('dual-v2', ('full', 'bottom'), 'v2'),
+    'template': Strategy('template', ('bottom',), 'v2', templates=True, fallback='dual-v2'),
+}
+
+ALIASES = {
+    'full-only': 'full-v1',
+    'dual': 'dual-v2',
+}
+
+# Image each OCR pass reads, derived from the upright full frame
+PASS_IMAGES = {
+    'full': lambda image: image,
+    'bottom': bottom_half_for_stickers,
+}
+
+
+def get_strategy(name):
+    name = ALIASES.get(name, name)
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown strategy '{name}' (known: {', '.join(sorted(STRATEGIES))})")
+    return STRATEGIES[name]
+
+
+def run_strategy(reader, strategy, image):
+    """Return (results, texts, device_info, shipping_info) with results/texts keyed by pass."""
+    if strategy.templates:
+        label = read_label(reader, image)
+        if label is None:
+            return run_strategy(reader, STRATEGIES[strategy.fallback], image)
+        # Label zones stand in for the full-image pass, so stored scans replay through extract_fields;
+        # their boxes are in the warped label's coordinates, not the photo's
+        # The sticker pass starts under the label instead of re-reading its lower half
+        results = {'bottom': reader.readtext(below_label_for_stickers(image, label.bottom))}
+        results['full'] = label.results
+        texts = {name: join_text(r) for name, r in results.items()}
+        device_info, shipping_info = EXTRACTORS[strategy.extractors].extract_fields(texts)
+        # Zone fields win; what the extractors add from zone text must pass the same checks
+        shipping_info = validate_shipping(dict(shipping_info, **label.shipping))
+        return results, texts, device_info, shipping_info
+
+    results = {name: reader.readtext(PASS_IMAGES[name](image)) for name in strategy.passes}
+    texts = {name: join_text(r) for name, r in results.items()}
+    device_info, shipping_info = EXTRACTORS[strategy.extractors].extract_fields(texts)
+    return results, texts, device_info, shipping_info
+
+
+def agreement(primary, candidate):
+    """Per-field agreement between two (device_info, shipping_info) results."""
+    a, b = flatten(*primary), flatten(*candidate)
+    fields = {k: [a.get(k), b.get(k)] for k in sorted(set(a) | set(b))}
+    matched = sum(1 for x, y in fields.values() if x == y)
+    return (matched / len(fields) if fields else 1.0), {k: v for k, v in fields.items() if v[0] != v[1]}
+
+
+class ShadowRunner:
+    """Runs a candidate strategy on sampled scans without touching the request path."""
+
+    def __init__(self, get_reader, candidate, sample, store, backlog=8, max_share=0.2):
+        self.get_reader = get_reader
+        self.candidate = candidate
+        self.sample = sample
+        self.store = store
+        self.max_share = max_share
+        self._resume_at = 0.0
+        # Bounded: when the shadow falls behind, samples are dropped rather than queued up
+        self._queue = queue.Queue(maxsize=backlog)
+        threading.Thread(target=self._work, daemon=True).start()
+
+    def maybe_submit(self, image, primary, primary_result, primary_ms):
+        if primary.name == self.candidate.name or random.random() >= self.sample:
+            return
+        if time.monotonic() < self._resume_at:
+            # Still idling off the last run's share of the CPU
+            return
+        try:
+            self._queue.put_nowait((image, primary, primary_result, primary_ms))
+        except queue.Full:
+            pass
+
+    def _work(self):
+        while True:
+            image, primary, primary_result, primary_ms = self._queue.get()
+            start = time.perf_counter()
+            try:
+                _, _, device_info, shipping_info = run_strategy(self.get_reader(), self.candidate, image)
+                candidate_ms = (time.perf_counter() - start) * 1000
+                score, diffs = agreement(primary_result, (device_info, shipping_info))
+                self.store.record_shadow(primary.name, self.candidate.name, primary_ms, candidate_ms, score, diffs)
+            except Exception as e:
+                print(f'Shadow {self.candidate.name} error: {e}')
+            pause = self.pause_after(time.perf_counter() - start)
+            self._resume_at = time.monotonic() + pause
+            time.sleep(pause)
+
+    def pause_after(self, elapsed):
+        """Idle time after a run of `elapsed` seconds that keeps shadow work to max_share of wall time."""
+        return elapsed * (1.0 / self.max_share - 1.0)
+
+
+def open_shadow(get_reader, store):
+    """The ShadowRunner configured by SHADOW_STRATEGY/SHADOW_SAMPLE/SHADOW_MAX_SHARE, or None."""
+    name = os.getenv('SHADOW_STRATEGY')
+    if not name or not store:
+        return None
+    return ShadowRunner(get_reader, get_strategy(name), float(os.getenv('SHADOW_SAMPLE', 0.1)), store,
+                        max_share=float(os.getenv('SHADOW_MAX_SHARE', 0.2)))
@@ -0,0 +1,586 @@
+"""
+Synthetic UPS/USPS label and IMEI sticker photos with ground truth.
+
+    python -m ocr.synth generate data/synth --count 1000 --seed 7 [--kind scene|label|tray]
+    python -m ocr.synth evaluate data/synth [--strategies dual-v2,template] [--out eval.json]
+
+Kinds:
+    scene   one 4x6 carrier label plus one device sticker in the bottom half (the /scan photo)
+    label   a label alone, for straighten.py
+    tray    10-20 device stickers in a grid, for tray mode
+
+Labels follow the section order of UPS Ground and USPS Ground Advantage labels,
+with each section shifted per image (LAYOUT_JITTER), so they don't match the
+zones in ocr.templates by construction. IMEIs are Luhn-valid and tracking
+numbers carry valid check digits. Names and addresses are random combinations,
+so no real PII is used. Photo effects are random per image: background
+(cardboard, bubble wrap, desk), small tilt, perspective, a right-angle camera
+rotation, lighting gradient, specular glare, blur, sensor noise and JPEG quality.
+
+Each <name>.jpg has a <name>.json next to it. The JSON holds:
+- the flat fields backend/utils/bench_gemini_payload.py compares (tracking_number, carrier, recipient_name, ...)
+- 'device'/'shipping' in the scan response shape
+- label_box as [ymin, xmin, ymax, xmax] on the 0-1000 scale straighten.py takes
+- orientation: the clockwise turn that makes the photo upright
+Images depend only on --seed and the image index, never on --workers.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from ocr.templates import ups_check_digit, usps_check_digit
+
+FONT_PATHS = [
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans{bold}.ttf',
+    '/usr/share/fonts/dejavu/DejaVuSans{bold}.ttf',
+    '/Library/Fonts/Arial{bold}.ttf',
+    '/System/Library/Fonts/Supplemental/Arial{bold}.ttf',
+]
+
+TACS = ['35391110', '35332811', '35467811', '35693803', '35260780', '35407115', '35925406', '35202611']
+MODELS = [
+    ('Apple', 'iPhone 12 Mini'), ('Apple', 'iPhone 13'), ('Apple', 'iPhone 13 Pro Max'), ('Apple', 'iPhone 14'),
+    ('Apple', 'iPhone 14 Pro'), ('Apple', 'iPhone 15 Pro Max'), ('Samsung', 'Galaxy S22'),
+    ('Samsung', 'Galaxy S23 Ultra'), ('Samsung', 'Galaxy A54'),
+]
+STORAGE = [64, 128, 256, 512]
+COLORS = ['Black', 'White', 'Blue', 'Midnight', 'Starlight', 'Silver', 'Gold', 'Purple', 'Space Gray', 'Green']
+DEVICE_CARRIERS = ['Unlocked', 'Unlocked', 'Verizon', 'AT&T', 'T-Mobile']
+
+FIRST = ['JAMES', 'MARIA', 'ROBERT', 'LINDA', 'MICHAEL', 'PATRICIA', 'DAVID', 'JENNIFER', 'CARLOS', 'AISHA',
+         'KEVIN', 'NGUYEN', 'SARAH', 'DANIEL', 'PRIYA', 'THOMAS', 'LAURA', 'ANTHONY', 'GRACE', 'MARCUS']
+LAST = ['JOHNSON', 'GARCIA', 'MILLER', 'DAVIS', 'RODRIGUEZ', 'MARTINEZ', 'ANDERSON', 'TAYLOR', 'THOMAS', 'MOORE',
+        'JACKSON', 'WHITE', 'HARRIS', 'CLARK', 'LEWIS', 'WALKER', 'PATEL', 'YOUNG', 'KING', 'WRIGHT']
+STREETS = ['MAIN', 'OAK', 'MAPLE', 'CEDAR', 'PINE', 'ELM', 'WASHINGTON', 'LAKE', 'HILL', 'PARK', 'SUNSET', 'RIVER']
+SUFFIXES = ['ST', 'AVE', 'BLVD', 'DR', 'CT', 'LN', 'RD']
+CITIES = [('SPRINGFIELD', 'IL', '627'), ('AUSTIN', 'TX', '787'), ('DENVER', 'CO', '802'), ('PHOENIX', 'AZ', '850'),
+          ('COLUMBUS', 'OH', '432'), ('ORLANDO', 'FL', '328'), ('SEATTLE', 'WA', '981'), ('ATLANTA', 'GA', '303'),
+          ('NASHVILLE', 'TN', '372'), ('SAN JOSE', 'CA', '951'), ('LAS VEGAS', 'NV', '891'),
+          ('KANSAS CITY', 'MO', '641'), ('PORTLAND', 'OR', '972'), ('CHARLOTTE', 'NC', '282')]
+SENDER = ('UDEAL INC', 'EAST MEADOW NY 11554')
+
+# 4x6 inches at 200dpi
+LABEL_SIZE = (800, 1200)
+# Largest downward drift of a label section from its nominal position, as a share of the label height
+LAYOUT_JITTER = 0.06
+
+_fonts = {}
+
+
+def font(size, bold=False):
+    key = (size, bold)
+    if key not in _fonts:
+        custom = os.getenv('SYNTH_FONT')
+        paths = [custom] if custom else [p.format(bold='-Bold' if bold else '') for p in FONT_PATHS]
+        for path in paths:
+            if path and os.path.exists(path):
+                _fonts[key] = ImageFont.truetype(path, size)
+                break
+        else:
+            _fonts[key] = ImageFont.load_default(size=size)
+    return _fonts[key]
+
+
+def luhn_digit(body):
+    total = 0
+    for i, d in enumerate(int(c) for c in reversed(body)):
+        if i % 2 == 0:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return (10 - total % 10) % 10
+
+
+def make_imei(rng):
+    body = rng.choice(TACS) + ''.join(rng.choice('0123456789') for _ in range(6))
+    return body + str(luhn_digit(body))
+
+
+def make_tracking(rng, carrier):
+    if carrier == 'UPS':
+        shipper = ''.join(rng.choice('0123456789ABCDEFGHJKLMNPRSTUVWXY') for _ in range(6))
+        body = shipper + '03' + ''.join(rng.choice('0123456789') for _ in range(7))  # 03 = Ground
+        return '1Z' + body + str(ups_check_digit(body))
+    body = '9400111' + ''.join(rng.choice('0123456789') for _ in range(14))
+    return body + str(usps_check_digit(body))
+
+
+def make_shipping(rng):
+    carrier = rng.choice(['UPS', 'USPS'])
+    city, state, zip3 = rng.choice(CITIES)
+    if rng.random() < 0.1:
+        street = f'PO BOX {rng.randint(10, 9999)}'
+    else:
+        direction = rng.choice(['', '', 'N ', 'S ', 'E ', 'W '])
+        street = f'{rng.randint(100, 99999)} {direction}{rng.choice(STREETS)} {rng.choice(SUFFIXES)}'
+        if rng.random() < 0.2:
+            street += f' APT {rng.randint(1, 40)}{rng.choice("ABCD")}'
+    return {
+        'tracking_number': make_tracking(rng, carrier),
+        'carrier': carrier,
+        'service': 'UPS Ground' if carrier == 'UPS' else 'USPS Ground Advantage',
+        'recipient_name': f'{rng.choice(FIRST)} {rng.choice(LAST)}',
+        'street_address': street,
+        'city': city,
+        'state': state,
+        'zip': zip3 + ''.join(rng.choice('0123456789') for _ in range(2)),
+    }
+
+
+def make_device(rng):
+    brand, model = rng.choice(MODELS)
+    return {
+        'imei': make_imei(rng),
+        'serial': rng.choice('CDFG') + ''.join(rng.choice('0123456789ABCDEFGHJKLMNPQRTVWXY') for _ in range(9)),
+        'model': model if brand == 'Apple' else f'{brand} {model}',
+        'brand': brand,
+        'storage': f'{rng.choice(STORAGE)}GB',
+        'color': rng.choice(COLORS),
+        'carrier': rng.choice(DEVICE_CARRIERS),
+    }
+
+
+def _barcode(draw, rng, box, seed_text):
+    x0, y0, x1, y1 = box
+    bars = random.Random(seed_text)
+    x = x0
+    black = True
+    while x < x1:
+        width = bars.choice((2, 2, 4, 6))
+        if black:
+            draw.rectangle([x, y0, min(x + width, x1) - 1, y1], fill=0)
+        x += width
+        black = not black
+
+
+def _maxicode(draw, rng, box):
+    x0, y0, x1, y1 = box
+    for y in range(y0, y1, 8):
+        for x in range(x0 + (4 if (y // 8) % 2 else 0), x1, 8):
+            if rng.random() < 0.45:
+                draw.rectangle([x, y, x + 5, y + 5], fill=0)
+    cx, cy = (x0 + x1) // 2, (y0 + y1) // 2
+    draw.rectangle([cx - 30, cy - 30, cx + 30, cy + 30], fill=255)
+    for r in (28, 20, 12, 5):
+        draw.ellipse([cx - r, cy - r, cx + r, cy + r], outline=0, width=4)
+
+
+def _section_offsets(rng, sections, lift, room):
+    """
+    Vertical offset in pixels of each label section after the first: all of them
+    move up by as much as `lift`, then the gaps between them grow at random until
+    the last one sits at most `room` below its nominal place. Gaps never shrink,
+    so sections never overlap.
+    """
+    start = -rng.uniform(0, lift)
+    steps = [rng.random() for _ in sections[1:]]
+    scale = rng.uniform(0, room - start) / (sum(steps) or 1.0)
+    offsets, dy = {sections[0]: 0}, start
+    for name, step in zip(sections[1:], steps):
+        dy += step * scale
+        offsets[name] = int(round(dy))
+    return offsets
+
+
+def render_label(rng, shipping):
+    """
+    Upright 4x6 label at 200dpi as a grayscale PIL image.
+
+    The section order follows the carrier layouts, but below the sender block
+    each section moves by up to LAYOUT_JITTER of the label height, each line a
+    few pixels sideways and the font size by up to 10%, so nothing lands at
+    fixed coordinates for a zone reader to fit.
+    """
+    w, h = LABEL_SIZE
+    image = Image.new('L', (w, h), 255)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([4, 4, w - 5, h - 5], outline=0, width=4)
+    name, street, city = shipping['recipient_name'], shipping['street_address'], \
+        f"{shipping['city']} {shipping['state']} {shipping['zip']}"
+    sender_street = f'{rng.randint(100, 2999)} {rng.choice(STREETS)} {rng.choice(SUFFIXES)}'
+    tracking = shipping['tracking_number']
+    size = rng.uniform(0.9, 1.1)
+
+    def text(xy, value, points, bold=False, multiline=False, section=None):
+        args = dict(font=font(int(points * size), bold))
+        if multiline:
+            args['spacing'] = int(14 * size)
+        right = (draw.multiline_textbbox if multiline else draw.textbbox)((0, 0), value, **args)[2]
+        x = max(16, min(xy[0] + rng.randint(-16, 16), w - 14 - right))
+        (draw.multiline_text if multiline else draw.text)((x, xy[1] + dy[section]), value, fill=0, **args)
+
+    def rule(y, width, section):
+        draw.line([0, y + dy[section], w, y + dy[section]], fill=0, width=width)
+
+    room = LAYOUT_JITTER * h
+    if shipping['carrier'] == 'UPS':
+        dy = _section_offsets(rng, ('sender', 'ship_to', 'routing', 'service', 'barcode', 'billing'), 40, room)
+        text((24, 20), f'{SENDER[0]}\n{sender_street}\n{SENDER[1]}', 24, multiline=True, section='sender')
+        text((560, 20), f'{rng.randint(1, 9)} LBS', 34, True, section='sender')
+        text((600, 64), '1 OF 1', 26, section='sender')
+        rule(160, 3, 'ship_to')
+        text((24, 180), 'SHIP TO:', 26, True, section='ship_to')
+        text((60, 222), f'{name}\n{street}\n{city}', 40, True, multiline=True, section='ship_to')
+        rule(470, 3, 'routing')
+        x0, y0 = 24, 480 + dy['routing']
+        _maxicode(draw, rng, (x0, y0, x0 + 200, y0 + 140))
+        text((300, 500), f"{shipping['state']} {shipping['zip'][:3]} {rng.randint(0, 9)}-{rng.randint(10, 99)}",
+             64, True, section='routing')
+        rule(630, 8, 'service')
+        text((24, 650), 'UPS GROUND', 58, True, section='service')
+        spaced = f'{tracking[:2]} {tracking[2:5]} {tracking[5:8]} {tracking[8:10]} {tracking[10:14]} {tracking[14:]}'
+        text((24, 730), f'TRACKING #: {spaced}', 32, True, section='service')
+        rule(790, 3, 'barcode')
+        _barcode(draw, rng, (80, 820 + dy['barcode'], 720, 1000 + dy['barcode']), tracking)
+        rule(1030, 3, 'billing')
+        text((24, 1050), 'BILLING: P/P', 26, section='billing')
+        text((24, 1090), f'REF 1: SO-{rng.randint(10000, 99999)}', 22, section='billing')
+    else:
+        dy = _section_offsets(rng, ('sender', 'service', 'ship_to', 'tracking'), 15, room)
+        text((24, 20), f'{SENDER[0]}\n{sender_street}\n{SENDER[1]}', 22, multiline=True, section='sender')
+        draw.rectangle([520, 16 + dy['sender'], w - 20, 130 + dy['sender']], outline=0, width=3)
+        text((540, 30), 'US POSTAGE PAID\nGROUND ADV\nePostage', 20, multiline=True, section='sender')
+        rule(150, 3, 'service')
+        draw.rectangle([24, 170 + dy['service'], 164, 330 + dy['service']], fill=0)
+        draw.text((60, 182 + dy['service']), 'G', font=font(120, True), fill=255)
+        text((190, 205), 'USPS GROUND', 54, True, section='service')
+        text((190, 265), 'ADVANTAGE', 54, True, section='service')
+        rule(380, 8, 'ship_to')
+        text((60, 440), 'SHIP TO:', 26, True, section='ship_to')
+        text((100, 482), f'{name}\n{street}\n{city}', 40, True, multiline=True, section='ship_to')
+        rule(780, 8, 'tracking')
+        text((200, 800), 'USPS TRACKING # EP', 32, True, section='tracking')
+        _barcode(draw, rng, (60, 850 + dy['tracking'], 740, 1020 + dy['tracking']), tracking)
+        spaced = ' '.join(tracking[i:i + 4] for i in range(0, len(tracking), 4))
+        text((110, 1040), spaced, 34, True, section='tracking')
+        rule(1110, 8, 'tracking')
+    return image
+
+
+def render_sticker(rng, device):
+    """Small white device sticker as a grayscale PIL image."""
+    image = Image.new('L', (620, 250), 255)
+    draw = ImageDraw.Draw(image)
+    if device['brand'] == 'Apple':
+        line = f"Apple, {device['model']}, {device['storage'][:-2]}, {device['color']}"
+    else:
+        line = f"{device['model']}, {device['storage']}, {device['color']}"
+    carrier = 'Other (Unlocked)' if device['carrier'] == 'Unlocked' else device['carrier']
+    draw.text((16, 12), line, font=font(26, True), fill=0)
+    draw.text((16, 52), f"IMEI: {device['imei']}", font=font(30, True), fill=0)
+    _barcode(draw, rng, (16, 96, 604, 150), device['imei'])
+    draw.text((16, 160), f"S/N: {device['serial']}", font=font(24), fill=0)
+    draw.text((16, 200), carrier, font=font(24), fill=0)
+    return image
+
+
+def background(rng, nrng, width, height):
+    kind = rng.choice(['cardboard', 'bubble', 'desk'])
+    if kind == 'cardboard':
+        base = np.array([70, 120, 170], np.float32)  # BGR kraft brown
+    elif kind == 'bubble':
+        base = np.array([205, 200, 195], np.float32)
+    else:
+        base = np.array([55, 60, 70], np.float32)
+    scene = np.ones((height, width, 3), np.float32) * base
+    # Low-frequency blotches plus fine grain
+    blotch = cv2.resize(nrng.normal(0, 14, (8, 6)).astype(np.float32), (width, height), interpolation=cv2.INTER_CUBIC)
+    scene += blotch[..., None] + nrng.normal(0, 4, (height, width, 1)).astype(np.float32)
+    if kind == 'bubble':
+        r = rng.randint(18, 30)
+        for y in range(r, height, 2 * r + 6):
+            for x in range(r + (r if (y // (2 * r)) % 2 else 0), width, 2 * r + 6):
+                cv2.circle(scene, (x, y), r, (170, 165, 160), 2)
+                cv2.circle(scene, (x - r // 3, y - r // 3), max(2, r // 5), (255, 255, 255), -1)
+    return np.clip(scene, 0, 255).astype(np.uint8), kind
+
+
+def _paste(scene, patch, center, angle, scale):
+    """Rotate/scale a grayscale patch onto the scene; returns its four corners in scene pixels."""
+    h, w = patch.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), angle, scale)
+    matrix[0, 2] += center[0] - w / 2.0
+    matrix[1, 2] += center[1] - h / 2.0
+    size = (scene.shape[1], scene.shape[0])
+    warped = cv2.warpAffine(cv2.cvtColor(patch, cv2.COLOR_GRAY2BGR), matrix, size, flags=cv2.INTER_LINEAR)
+    mask = cv2.warpAffine(np.full((h, w), 255, np.uint8), matrix, size, flags=cv2.INTER_LINEAR)
+    alpha = (mask.astype(np.float32) / 255.0)[..., None]
+    # Paper is slightly off-white and picks up the ambient tint
+    paper = warped.astype(np.float32) * 0.93 + scene.astype(np.float32) * 0.04
+    scene[:] = (paper * alpha + scene.astype(np.float32) * (1 - alpha)).astype(np.uint8)
+    corners = np.array([[0, 0], [w, 0], [w, h], [0, h]], np.float32)
+    return cv2.transform(corners[None], matrix)[0]
+
+
+def _rotate_points(points, angle, width, height):
+    """Map points through a clockwise right-angle rotation of a width x height image."""
+    x, y = points[:, 0], points[:, 1]
+    if angle == 90:
+        return np.stack([height - 1 - y, x], axis=1)
+    if angle == 180:
+        return np.stack([width - 1 - x, height - 1 - y], axis=1)
+    if angle == 270:
+        return np.stack([y, width - 1 - x], axis=1)
+    return points
+
+
+def _box(points, width, height):
+    """[ymin, xmin, ymax, xmax] on the 0-1000 scale."""
+    xs = np.clip(points[:, 0], 0, width - 1)
+    ys = np.clip(points[:, 1], 0, height - 1)
+    return [int(ys.min() * 1000 / height), int(xs.min() * 1000 / width),
+            int(round(ys.max() * 1000 / height)), int(round(xs.max() * 1000 / width))]
+
+
+def photo_effects(rng, nrng, scene, glare):
+    h, w = scene.shape[:2]
+    out = scene.astype(np.float32)
+    # Lighting falls off across the frame
+    gx, gy = np.meshgrid(np.linspace(-1, 1, w), np.linspace(-1, 1, h))
+    a, b = rng.uniform(-0.15, 0.15), rng.uniform(-0.15, 0.15)
+    out *= (1.0 + a * gx + b * gy)[..., None].astype(np.float32) * rng.uniform(0.85, 1.05)
+    # Specular glare from bubble wrap or glossy tape
+    for _ in range(rng.randint(1, 4) if glare else rng.randint(0, 1)):
+        cx, cy = rng.uniform(0, w), rng.uniform(0, h)
+        sx, sy = rng.uniform(0.02, 0.08) * w, rng.uniform(0.01, 0.05) * h
+        blob = np.exp(-(((gx + 1) * w / 2 - cx) ** 2 / (2 * sx ** 2) + ((gy + 1) * h / 2 - cy) ** 2 / (2 * sy ** 2)))
+        out += (blob * rng.uniform(60, 160))[..., None]
+    out = np.clip(out, 0, 255).astype(np.uint8)
+
+    blur = rng.choice(['none', 'gaussian', 'gaussian', 'motion'])
+    if blur == 'gaussian':
+        out = cv2.GaussianBlur(out, (0, 0), rng.uniform(0.4, 1.8))
+    elif blur == 'motion':
+        k = rng.choice([5, 7, 9])
+        kernel = np.zeros((k, k), np.float32)
+        kernel[k // 2, :] = 1.0 / k
+        rot = cv2.getRotationMatrix2D((k / 2.0 - 0.5, k / 2.0 - 0.5), rng.uniform(0, 180), 1.0)
+        out = cv2.filter2D(out, -1, cv2.warpAffine(kernel, rot, (k, k)))
+    noise = nrng.normal(0, rng.uniform(1, 8), out.shape).astype(np.float32)
+    return np.clip(out.astype(np.float32) + noise, 0, 255).astype(np.uint8), blur
+
+
+def generate_one(job):
+    out_dir, index, seed, kind, width, height = job
+    rng = random.Random(seed)
+    nrng = np.random.default_rng(seed)
+    scene, surface = background(rng, nrng, width, height)
+    truth = {'kind': kind, 'seed': seed}
+    marks = {}
+
+    if kind in ('scene', 'label'):
+        shipping = make_shipping(rng)
+        label = np.array(render_label(rng, shipping))
+        span = rng.uniform(0.45, 0.6) if kind == 'scene' else rng.uniform(0.6, 0.85)
+        scale = span * height / label.shape[0]
+        center = (width * rng.uniform(0.4, 0.6), height * (rng.uniform(0.3, 0.38) if kind == 'scene' else 0.5))
+        marks['label'] = _paste(scene, label, center, rng.uniform(-12, 12), scale)
+        truth['shipping'] = shipping
+    if kind == 'scene':
+        device = make_device(rng)
+        sticker = np.array(render_sticker(rng, device))
+        scale = rng.uniform(0.28, 0.38) * width / sticker.shape[1]
+        center = (width * rng.uniform(0.3, 0.7), height * rng.uniform(0.75, 0.88))
+        marks['sticker'] = _paste(scene, sticker, center, rng.uniform(-8, 8), scale)
+        truth['device'] = {k: v for k, v in device.items() if k != 'brand'}
+    if kind == 'tray':
+        rows, cols = rng.choice([(4, 3), (5, 3), (5, 4), (4, 4)])
+        devices = []
+        for r in range(rows):
+            for c in range(cols):
+                device = make_device(rng)
+                sticker = np.array(render_sticker(rng, device))
+                cell_w, cell_h = width / cols, height / rows
+                scale = 0.8 * cell_w / sticker.shape[1]
+                center = ((c + 0.5) * cell_w + rng.uniform(-0.05, 0.05) * cell_w,
+                          (r + 0.5) * cell_h + rng.uniform(-0.1, 0.1) * cell_h)
+                marks[f'sticker{len(devices)}'] = _paste(scene, sticker, center, rng.uniform(-4, 4), scale)
+                devices.append({k: v for k, v in device.items() if k != 'brand'})
+        truth['devices'] = devices
+
+    # Handheld camera: perspective jitter, then maybe a sideways/upside-down shot
+    jitter = 0.05 if kind != 'tray' else 0.02
+    src = np.array([[0, 0], [width, 0], [width, height], [0, height]], np.float32)
+    dst = src + np.array([[rng.uniform(-jitter, jitter) * width, rng.uniform(-jitter, jitter) * height]
+                          for _ in range(4)], np.float32)
+    matrix = cv2.getPerspectiveTransform(src, dst)
+    scene = cv2.warpPerspective(scene, matrix, (width, height), borderMode=cv2.BORDER_REFLECT)
+    marks = {k: cv2.perspectiveTransform(v[None].astype(np.float32), matrix)[0] for k, v in marks.items()}
+
+    turn = rng.choices([0, 90, 180, 270], weights=[0.6, 0.15, 0.1, 0.15])[0]
+    if turn:
+        scene = cv2.rotate(scene, {90: cv2.ROTATE_90_CLOCKWISE, 180: cv2.ROTATE_180,
+                                   270: cv2.ROTATE_90_COUNTERCLOCKWISE}[turn])
+        marks = {k: _rotate_points(v, turn, width, height) for k, v in marks.items()}
+    h, w = scene.shape[:2]
+
+    scene, blur = photo_effects(rng, nrng, scene, glare=surface == 'bubble')
+    quality = rng.randint(60, 95)
+
+    if 'label' in marks:
+        truth['label_box'] = _box(marks['label'], w, h)
+        truth['label_corners'] = [[round(float(x), 1), round(float(y), 1)] for x, y in marks['label']]
+    if 'sticker' in marks:
+        truth['sticker_box'] = _box(marks['sticker'], w, h)
+    if kind == 'tray':
+        for i, device in enumerate(truth['devices']):
+            pts = marks[f'sticker{i}']
+            device['bbox'] = [int(pts[:, 0].min()), int(pts[:, 1].min()),
+                              int(pts[:, 0].max() - pts[:, 0].min()), int(pts[:, 1].max() - pts[:, 1].min())]
+    truth['orientation'] = (360 - turn) % 360
+    truth['effects'] = {'surface': surface, 'blur': blur, 'jpeg_quality': quality, 'turn': turn}
+
+    # Flat fields in the layout bench_gemini_payload.py compares
+    truth.update({k: v for k, v in truth.get('shipping', {}).items() if k != 'service'})
+    truth.update({k: v for k, v in truth.get('device', {}).items() if k not in ('carrier', 'serial')})
+
+    name = f'synth_{index:06d}'
+    cv2.imwrite(os.path.join(out_dir, name + '.jpg'), scene, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    with open(os.path.join(out_dir, name + '.json'), 'w') as f:
+        json.dump(truth, f, indent=2)
+    return name
+
+
+def generate(args):
+    os.makedirs(args.out_dir, exist_ok=True)
+    jobs = [(args.out_dir, i, args.seed * 1000003 + i, args.kind, args.width, args.height)
+            for i in range(args.start, args.start + args.count)]
+    start = time.time()
+    with Pool(args.workers) as pool:
+        for done, _ in enumerate(pool.imap_unordered(generate_one, jobs, chunksize=4), start=1):
+            if done % 100 == 0 or done == len(jobs):
+                print(f'{done}/{len(jobs)} images ({done / (time.time() - start):.1f}/s)')
+    with open(os.path.join(args.out_dir, 'manifest.json'), 'w') as f:
+        json.dump({'seed': args.seed, 'kind': args.kind, 'count': args.count, 'start': args.start,
+                   'size': [args.width, args.height]}, f, indent=2)
+
+
+def _normalize(value):
+    if value is None:
+        return None
+    return ''.join(str(value).upper().split()) or None
+
+
+def evaluate_dir(data_dir, reader, strategies=('dual-v2', 'template'), limit=None):
+    """
+    Score orientation, the named scan strategies, straighten.py and tray mode
+    against the ground truth in data_dir, reading with `reader`; returns the report.
+    """
+    from ocr.bench_backends import percentile
+    from ocr.extractors import flatten
+    from ocr.strategies import get_strategy, run_strategy
+    from ocr.tray import scan_tray
+    from orientation import auto_orient, estimate_orientation
+    from straighten import extract_label
+
+    samples = []
+    for path in sorted(glob.glob(os.path.join(data_dir, 'synth_*.jpg')))[:limit]:
+        with open(os.path.splitext(path)[0] + '.json') as f:
+            samples.append((path, json.load(f)))
+    if not samples:
+        raise ValueError(f'No synth_*.jpg images in {data_dir}')
+
+    report = {'images': len(samples), 'strategies': {}, 'orientation': None, 'straighten': None, 'tray': None}
+
+    hits = sum(1 for path, truth in samples if estimate_orientation(cv2.imread(path))[0] == truth['orientation'])
+    report['orientation'] = {'accuracy': round(hits / len(samples), 4)}
+
+    scenes = [(p, t) for p, t in samples if t['kind'] == 'scene']
+    for name in (strategies if scenes else []):
+        strategy = get_strategy(name)
+        correct, totals, latencies = {}, {}, []
+        for path, truth in scenes:
+            image, _, _ = auto_orient(cv2.imread(path))
+            start = time.perf_counter()
+            _, _, device, shipping = run_strategy(reader, strategy, image)
+            latencies.append(time.perf_counter() - start)
+            got = flatten(device, shipping)
+            for field, value in flatten(truth['device'], truth['shipping']).items():
+                totals[field] = totals.get(field, 0) + 1
+                correct[field] = correct.get(field, 0) + (_normalize(got.get(field)) == _normalize(value))
+        report['strategies'][strategy.name] = {
+            'mean_s': round(sum(latencies) / len(latencies), 3),
+            'p95_s': round(percentile(latencies, 95), 3),
+            'fields': {f: round(correct[f] / totals[f], 4) for f in sorted(totals)},
+            'overall': round(sum(correct.values()) / float(sum(totals.values())), 4),
+        }
+
+    labelled = [(p, t) for p, t in samples if 'label_box' in t]
+    if labelled:
+        ok, latencies = 0, []
+        with tempfile.TemporaryDirectory() as tmp:
+            for path, truth in labelled:
+                start = time.perf_counter()
+                result = json.loads(extract_label(path, os.path.join(tmp, 'label.jpg'),
+                                                  ','.join(str(v) for v in truth['label_box'])))
+                latencies.append(time.perf_counter() - start)
+                ok += bool(result.get('success'))
+        report['straighten'] = {'success_rate': round(ok / len(labelled), 4),
+                                'mean_s': round(sum(latencies) / len(latencies), 3),
+                                'p95_s': round(percentile(latencies, 95), 3)}
+
+    trays = [(p, t) for p, t in samples if t['kind'] == 'tray']
+    if trays:
+        found = expected = 0
+        for path, truth in trays:
+            image, _, _ = auto_orient(cv2.imread(path))
+            imeis = {d.get('imei') for d in scan_tray(reader, image)}
+            expected += len(truth['devices'])
+            found += sum(1 for d in truth['devices'] if d['imei'] in imeis)
+        report['tray'] = {'imei_recall': round(found / expected, 4)}
+    return report
+
+
+def evaluate(args):
+    from ocr.backends import create_reader
+
+    try:
+        report = evaluate_dir(args.data_dir, create_reader(), args.strategies.split(','), args.limit)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    gen = sub.add_parser('generate')
+    gen.add_argument('out_dir')
+    gen.add_argument('--count', type=int, default=100)
+    gen.add_argument('--start', type=int, default=0, help='first image index (to extend a corpus)')
+    gen.add_argument('--seed', type=int, default=0)
+    gen.add_argument('--kind', default='scene', choices=['scene', 'label', 'tray'])
+    gen.add_argument('--width', type=int, default=1512)
+    gen.add_argument('--height', type=int, default=2016)
+    gen.add_argument('--workers', type=int, default=os.cpu_count())
+
+    ev = sub.add_parser('evaluate')
+    ev.add_argument('data_dir')
+    ev.add_argument('--strategies', default='dual-v2,template')
+    ev.add_argument('--limit', type=int, default=None)
+    ev.add_argument('--out', default=None)
+
+    args = parser.parse_args()
+    if args.command == 'generate':
+        generate(args)
+    else:
+        evaluate(args)
+
+
+if __name__ == '__main__':
+    main()
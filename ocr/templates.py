@@ -0,0 +1,238 @@
+"""
+Carrier label templates: OCR only the zones of a known 4x6 layout.
+
+    label = read_label(reader, image)       # None when no known label is found
+    label.carrier, label.shipping, label.results   # results boxes are in label coordinates
+    label.bottom                            # lowest photo row the label covers
+
+The label is found as the largest white quadrilateral, perspective-warped to
+800x1200 portrait (4x6 at 200dpi, as straighten.py produces) and turned upright.
+A cheap keyword pass over a 400px-wide copy identifies the template; each
+zone is then read at full label resolution with an EasyOCR allowlist for its
+field, and tracking numbers are accepted only when their check digit holds
+(after correcting the usual O/0, I/1, S/5, B/8 confusions).
+
+Zone boxes are (left, top, right, bottom) fractions of the portrait label.
+"""
+import re
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from ocr.extractors.v2 import extract_shipping_service
+from orientation import auto_orient, rotate
+
+LABEL_SIZE = (800, 1200)
+
+UPPER = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+DIGITS = '0123456789'
+ADDRESS_CHARS = UPPER + DIGITS + ' ,.-#/&\''
+
+Zone = namedtuple('Zone', 'name box allowlist')
+Template = namedtuple('Template', 'name carrier service keywords zones')
+
+TEMPLATES = [
+    Template('ups_ground', 'UPS', 'UPS Ground', (r'UPS\s*GROUND', r'\b1Z[A-Z0-9]{6}'), [
+        Zone('ship_to', (0.00, 0.14, 0.82, 0.40), ADDRESS_CHARS),
+        Zone('service', (0.00, 0.44, 1.00, 0.56), UPPER + DIGITS + ' '),
+        Zone('tracking', (0.00, 0.50, 1.00, 0.66), UPPER + DIGITS + ' #:'),
+    ]),
+    Template('usps_ground_advantage', 'USPS', 'USPS Ground Advantage', (r'GROUND\s*ADVANTAGE',), [
+        Zone('service', (0.00, 0.12, 1.00, 0.30), UPPER + ' '),
+        Zone('ship_to', (0.04, 0.34, 0.96, 0.66), ADDRESS_CHARS),
+        Zone('tracking', (0.00, 0.64, 1.00, 0.96), DIGITS + ' USPTRACKINGEXP#'),
+    ]),
+]
+
+# Digit-position repairs for tracking numbers
+TO_DIGIT = str.maketrans('OQDIlLSBZG', '0001115826')
+
+
+def ups_check_digit(body):
+    """Check digit for the 15 characters after 1Z; letters count as (ord - 63) % 10, even positions doubled."""
+    total = 0
+    for i, c in enumerate(body):
+        value = int(c) if c.isdigit() else (ord(c) - 63) % 10
+        total += value * 2 if i % 2 else value
+    return (10 - total % 10) % 10
+
+
+def usps_check_digit(body):
+    """IMpb mod 10: weights 3, 1, 3, ... from the rightmost body digit."""
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(body)))
+    return (10 - total % 10) % 10
+
+
+def ups_check_ok(number):
+    return bool(re.fullmatch(r'1Z[A-Z0-9]{15}\d', number)) and ups_check_digit(number[2:17]) == int(number[17])
+
+
+def usps_check_ok(number):
+    return bool(re.fullmatch(r'\d{20,22}', number)) and usps_check_digit(number[:-1]) == int(number[-1])
+
+
+TRACKING_CHECKS = {'UPS': ups_check_ok, 'USPS': usps_check_ok}
+
+
+def validate_shipping(shipping):
+    """
+    Drop shipping fields that fail the checks zone reads are held to: the
+    tracking number must pass its carrier's check digit, state and zip must be
+    well-formed. For fields merged in from extractors run over zone text.
+    """
+    shipping = dict(shipping)
+    check = TRACKING_CHECKS.get(shipping.get('carrier'))
+    if shipping.get('tracking_number') and check and not check(shipping['tracking_number']):
+        del shipping['tracking_number']
+    if shipping.get('state') and not re.fullmatch(r'[A-Z]{2}', shipping['state']):
+        del shipping['state']
+    if shipping.get('zip') and not re.fullmatch(r'\d{5}(?:-\d{4})?', shipping['zip']):
+        del shipping['zip']
+    return shipping
+
+
+def parse_tracking(text, carrier):
+    compact = re.sub(r'[\s#:]', '', text.upper())
+    if carrier == 'UPS':
+        for m in re.finditer(r'[1I]Z[A-Z0-9]{16}', compact):
+            raw = '1Z' + m.group(0)[2:]
+            # Shipper account may hold letters; service code, package number and check digit are numeric
+            fixed = raw[:8] + raw[8:].translate(TO_DIGIT)
+            for candidate in (raw, fixed):
+                if ups_check_ok(candidate):
+                    return candidate
+        return None
+    digits = compact.translate(TO_DIGIT)
+    for m in re.finditer(r'9[2-5]\d{18,20}', digits):
+        number = m.group(0)
+        # The number may be printed with a trailing run of other digits; try the valid lengths
+        for length in (22, 21, 20):
+            if len(number) >= length and usps_check_ok(number[:length]):
+                return number[:length]
+    return None
+
+
+def _order_corners(points):
+    points = np.array(points, dtype=np.float32).reshape(4, 2)
+    s = points.sum(axis=1)
+    d = np.diff(points, axis=1).ravel()
+    return np.array([points[np.argmin(s)], points[np.argmin(d)], points[np.argmax(s)], points[np.argmax(d)]],
+                    dtype=np.float32)
+
+
+def find_corners(image):
+    """Corners (tl, tr, br, bl) of the largest white quadrilateral in image coordinates, or None."""
+    h, w = image.shape[:2]
+    scale = min(1.0, 1000.0 / max(h, w))
+    small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else image
+    white = cv2.inRange(cv2.cvtColor(small, cv2.COLOR_BGR2HSV), (0, 0, 150), (180, 60, 255))
+    white = cv2.morphologyEx(white, cv2.MORPH_CLOSE, np.ones((15, 15), np.uint8))
+    contours, _ = cv2.findContours(white, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    largest = max(contours, key=cv2.contourArea)
+    if cv2.contourArea(largest) < 0.05 * small.shape[0] * small.shape[1]:
+        return None
+
+    approx = cv2.approxPolyDP(largest, 0.02 * cv2.arcLength(largest, True), True)
+    corners = approx if len(approx) == 4 else cv2.boxPoints(cv2.minAreaRect(largest))
+    return _order_corners(corners) / scale
+
+
+def warp_label(image, corners):
+    """Perspective-warp the quadrilateral at corners to an upright 800x1200 label."""
+    tl, tr, br, bl = corners
+    width = max(np.linalg.norm(tr - tl), np.linalg.norm(br - bl))
+    height = max(np.linalg.norm(bl - tl), np.linalg.norm(br - tr))
+    size = LABEL_SIZE if height >= width else LABEL_SIZE[::-1]
+    target = np.array([[0, 0], [size[0], 0], [size[0], size[1]], [0, size[1]]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(np.array([tl, tr, br, bl], dtype=np.float32), target)
+    label = cv2.warpPerspective(image, matrix, size, flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+
+    label, _, _ = auto_orient(label)
+    if label.shape[1] > label.shape[0]:
+        label = rotate(label, 90)
+    return label
+
+
+def find_label(image):
+    """Warp the largest white quadrilateral to an upright 800x1200 label, or return None."""
+    corners = find_corners(image)
+    return None if corners is None else warp_label(image, corners)
+
+
+def identify(reader, label):
+    """Return (template, upright label) from a keyword pass over a small copy, or (None, label)."""
+    for candidate in (label, rotate(label, 180)):
+        small = cv2.resize(candidate, (400, 600), interpolation=cv2.INTER_AREA)
+        text = ' '.join(reader.readtext(small, detail=0)).upper()
+        for template in TEMPLATES:
+            if any(re.search(k, text) for k in template.keywords):
+                return template, candidate
+    return None, label
+
+
+def _lines(results):
+    """Group zone results into text lines, top to bottom."""
+    items = sorted(results, key=lambda r: (r[0][0][1] + r[0][2][1]) / 2.0)
+    lines = []
+    for box, text, _ in items:
+        center = (box[0][1] + box[2][1]) / 2.0
+        height = max(1.0, box[2][1] - box[0][1])
+        if lines and abs(center - lines[-1][0]) <= 0.5 * height:
+            lines[-1][1].append((box[0][0], text))
+        else:
+            lines.append([center, [(box[0][0], text)]])
+    return [' '.join(t for _, t in sorted(parts)) for _, parts in lines]
+
+
+CITY_LINE = re.compile(r"^([A-Z][A-Z .'-]+?)[ ,]+([A-Z]{2})\s+(\d{5}(?:-\d{4})?)$")
+
+
+def parse_ship_to(lines):
+    fields = {}
+    lines = [re.sub(r'^\s*SHIP\s*TO\s*:?\s*', '', l).strip() for l in lines]
+    lines = [l for l in lines if l]
+    for line in lines:
+        m = CITY_LINE.match(line)
+        if m:
+            fields.update(city=m.group(1).strip(), state=m.group(2), zip=m.group(3))
+        elif 'street_address' not in fields and re.match(r'^(\d{1,6}\s+[A-Z0-9]|PO\s+BOX)', line):
+            fields['street_address'] = re.sub(r'\s+', ' ', line)
+        elif 'recipient_name' not in fields and 'street_address' not in fields and re.search(r'[A-Z]{2}', line):
+            fields['recipient_name'] = re.sub(r'\s+', ' ', line)
+    return fields
+
+
+# bottom: the lowest row the label covers in the photo it was read from
+LabelRead = namedtuple('LabelRead', 'template carrier shipping results text bottom', defaults=(None,))
+
+
+def read_label(reader, image):
+    corners = find_corners(image)
+    if corners is None:
+        return None
+    template, label = identify(reader, warp_label(image, corners))
+    if template is None:
+        return None
+
+    h, w = label.shape[:2]
+    results, texts = [], {}
+    for zone in template.zones:
+        x0, y0, x1, y1 = zone.box
+        left, top = int(x0 * w), int(y0 * h)
+        crop = label[top:int(y1 * h), left:int(x1 * w)]
+        zone_results = reader.readtext(crop, allowlist=zone.allowlist)
+        # Shift zone-local boxes into label coordinates so zones don't overlap at the origin
+        results.extend(([[x + left, y + top] for x, y in box], text, conf) for box, text, conf in zone_results)
+        texts[zone.name] = _lines(zone_results)
+
+    service = extract_shipping_service(' '.join(texts.get('service', [])))
+    shipping = {'carrier': template.carrier, 'service': service or template.service}
+    tracking = parse_tracking(' '.join(texts.get('tracking', [])), template.carrier)
+    if tracking:
+        shipping['tracking_number'] = tracking
+    shipping.update(parse_ship_to(texts.get('ship_to', [])))
+    text = ' '.join(' '.join(texts[z.name]) for z in template.zones)
+    return LabelRead(template.name, template.carrier, shipping, results, text, int(corners[:, 1].max()))
@@ -0,0 +1,176 @@
+"""
+Tray scanning: one photo of 10-20 devices -> one device dict per IMEI sticker.
+
+The image is segmented into sticker regions (white paper, or dense print on
+mostly white paper), the text detector runs once over the whole photo and every
+detected text box goes through a single batched recognize() call. Recognized
+boxes are then assigned to the sticker whose region contains them, leftover
+boxes are clustered into stickers of their own, and each sticker is run through
+the field extractors.
+"""
+import cv2
+import numpy as np
+
+from ocr.extractors import v2
+
+# Sticker regions as a fraction of the whole photo
+MIN_REGION_AREA = 0.002
+MAX_REGION_AREA = 0.25
+# Local contrast (std of a 7x7 window) that counts as print
+PRINT_CONTRAST = 25
+# Of a print blob's box, the share that must be white paper for it to be a sticker
+MIN_PAPER = 0.25
+
+
+def _contours(mask, min_area, max_area, solidity):
+    area_total = mask.shape[0] * mask.shape[1]
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for c in contours:
+        x, y, bw, bh = cv2.boundingRect(c)
+        area = bw * bh
+        if not min_area <= area / area_total <= max_area:
+            continue
+        # Stickers are solid, not too elongated rectangles
+        if max(bw, bh) > 6 * min(bw, bh) or cv2.contourArea(c) < solidity * area:
+            continue
+        yield x, y, bw, bh
+
+
+def find_sticker_regions(image, min_area=MIN_REGION_AREA, max_area=MAX_REGION_AREA):
+    """
+    Return [x, y, w, h] boxes of sticker-like regions in reading order.
+
+    White paper alone isn't enough: bubble wrap and packaging are white too and
+    merge with the stickers. Dense print blobs (high local contrast) on mostly
+    white paper find the stickers there; regions from both cues are merged.
+    """
+    h, w = image.shape[:2]
+    scale = min(1.0, 1000.0 / max(h, w))
+    small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else image
+
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    paper = cv2.inRange(hsv, (0, 0, 150), (180, 60, 255))
+    white = cv2.morphologyEx(paper, cv2.MORPH_CLOSE, np.ones((9, 9), np.uint8))
+    white = cv2.morphologyEx(white, cv2.MORPH_OPEN, np.ones((5, 5), np.uint8))
+    whites = list(_contours(white, min_area, max_area, 0.6))
+
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+    mean = cv2.blur(gray, (7, 7))
+    std = np.sqrt(np.maximum(cv2.blur(gray * gray, (7, 7)) - mean * mean, 0))
+    printed = (std > PRINT_CONTRAST).astype(np.uint8) * 255
+    printed = cv2.morphologyEx(printed, cv2.MORPH_CLOSE, np.ones((15, 15), np.uint8))
+    printed = cv2.morphologyEx(printed, cv2.MORPH_OPEN, np.ones((5, 5), np.uint8))
+    # Print blobs are ragged (short last lines), so only loosely solid
+    prints = [(x, y, bw, bh) for x, y, bw, bh in _contours(printed, min_area, max_area, 0.4)
+              if cv2.countNonZero(paper[y:y + bh, x:x + bw]) >= MIN_PAPER * bw * bh]
+
+    def contains(box, other):
+        x, y, bw, bh = box
+        return x <= other[0] + other[2] / 2.0 < x + bw and y <= other[1] + other[3] / 2.0 < y + bh
+
+    # A white region holding two print blobs is stickers merged through the background
+    candidates = [b for b in whites if sum(contains(b, p) for p in prints) < 2] + prints
+
+    boxes = []
+    for x, y, bw, bh in sorted(candidates, key=lambda c: -c[2] * c[3]):
+        # The same sticker found by both cues, or a barcode inside it: keep the larger box
+        if any(contains(b, (x, y, bw, bh)) or contains((x, y, bw, bh), b) for b in boxes):
+            continue
+        boxes.append((x, y, bw, bh))
+
+    regions = []
+    for x, y, bw, bh in boxes:
+        pad_x, pad_y = int(bw * 0.02) + 1, int(bh * 0.02) + 1
+        x0, y0 = max(0, int((x - pad_x) / scale)), max(0, int((y - pad_y) / scale))
+        x1, y1 = min(w, int((x + bw + pad_x) / scale)), min(h, int((y + bh + pad_y) / scale))
+        regions.append([x0, y0, x1 - x0, y1 - y0])
+
+    if not regions:
+        return []
+    # Reading order: group into rows by vertical position, then left to right
+    row_height = float(np.median([r[3] for r in regions]))
+    regions.sort(key=lambda r: (round(r[1] / row_height), r[0]))
+    return regions
+
+
+def _center(points):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return (min(xs) + max(xs)) / 2.0, (min(ys) + max(ys)) / 2.0
+
+
+def _bounds(items):
+    xs = [p[0] for box, _, _ in items for p in box]
+    ys = [p[1] for box, _, _ in items for p in box]
+    return [int(min(xs)), int(min(ys)), int(max(xs) - min(xs)), int(max(ys) - min(ys))]
+
+
+def cluster_text(items):
+    """Group recognized boxes whose line-height-padded boxes touch; one group per sticker."""
+    rects = []
+    for box, _, _ in items:
+        x, y, w, h = _bounds([(box, None, None)])
+        rects.append((x - h, y - 1.5 * h, x + w + h, y + 2.5 * h))
+    parent = list(range(len(items)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, a in enumerate(rects):
+        for j in range(i + 1, len(rects)):
+            b = rects[j]
+            if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                parent[root(i)] = root(j)
+    groups = {}
+    for i, item in enumerate(items):
+        groups.setdefault(root(i), []).append(item)
+    return list(groups.values())
+
+
+def scan_tray(reader, image, batch_size=32):
+    """
+    Return a list of {'bbox', 'imei', 'model', ..., 'text'} dicts, one per readable sticker.
+
+    Text that falls outside every sticker region (a sticker the segmentation
+    missed, or all of it when none was found) is grouped by cluster_text instead
+    of being dropped.
+    """
+    horizontal_list, free_list = reader.detect(image)
+    results = reader.recognize(image, horizontal_list[0], free_list[0], batch_size=batch_size)
+
+    regions = find_sticker_regions(image)
+    if not regions:
+        print('Tray: no sticker regions found, grouping text over the whole image')
+    grouped = [[] for _ in regions]
+    loose = []
+    for box, text, conf in results:
+        cx, cy = _center(box)
+        for i, (x, y, w, h) in enumerate(regions):
+            if x <= cx < x + w and y <= cy < y + h:
+                grouped[i].append((box, text, conf))
+                break
+        else:
+            loose.append((box, text, conf))
+    groups = [(region, items) for region, items in zip(regions, grouped) if items]
+    groups += [(_bounds(items), items) for items in cluster_text(loose)]
+    if not groups:
+        return []
+    row_height = float(np.median([region[3] for region, _ in groups])) or 1.0
+    groups.sort(key=lambda g: (round(g[0][1] / row_height), g[0][0]))
+
+    devices = []
+    for region, items in groups:
+        # Read each sticker top-to-bottom, left-to-right before extracting
+        items.sort(key=lambda r: (_center(r[0])[1], _center(r[0])[0]))
+        text = ' '.join(r[1] for r in items)
+        device_info, _ = v2.extract_fields({'full': text, 'bottom': text})
+        if not device_info.get('imei') and not device_info.get('model'):
+            continue
+        device_info['bbox'] = [int(v) for v in region]
+        device_info['confidence'] = round(float(sum(r[2] for r in items)) / len(items), 3)
+        device_info['text'] = text
+        devices.append(device_info)
+    return devices
@@ -1,4 +1,4 @@
-import re
+from edit_replay import Patch, replay, summarize
 
 with open('frontend/src/components/Inventory/InventoryList.jsx', 'r') as f:
     target_code = f.read()
@@ -7,8 +7,9 @@ with open('frontend/src/components/Inventory/InventoryList.jsx', 'r') as f:
 state_code = """  const [showDeviceHistory, setShowDeviceHistory] = useState(false);
   const [selectedDeviceHistory, setSelectedDeviceHistory] = useState(null);"""
 
-target_code = target_code.replace('const [showLabelModal, setShowLabelModal] = useState(false);', 
-                                  'const [showLabelModal, setShowLabelModal] = useState(false);\n' + state_code)
+patches = [Patch('Add device history state',
+                 [('const [showLabelModal, setShowLabelModal] = useState(false);',
+                   'const [showLabelModal, setShowLabelModal] = useState(false);\n' + state_code)])]
 
 # 2. Add handleViewDeviceHistory
 handle_code = """  const handleViewDeviceHistory = async (inventoryId, device) => {
@@ -29,13 +30,14 @@ handle_code = """  const handleViewDeviceHistory = async (inventoryId, device) =
     }
   };"""
 
-target_code = target_code.replace('const handleEditDevice =', handle_code + '\n\n  const handleEditDevice =')
+patches.append(Patch('Add handleViewDeviceHistory',
+                     [('const handleEditDevice =', handle_code + '\n\n  const handleEditDevice =')]))
 
 # 3. Add button in expanded row
 btn_code = """<button onClick={() => handleViewDeviceHistory(item._id, device)} style={{ flex: 1, display: "flex", alignItems: "center", justifyContent: "center", gap: "4px", padding: "6px 10px", background: "#fef3c7", border: "1px solid #fcd34d", color: "#92400e", borderRadius: "6px", cursor: "pointer", fontSize: "0.75rem", fontWeight: "500" }}>📜 History</button>"""
 
-target_code = target_code.replace('<button onClick={() => handlePrintLabel(device, item)} style={{ flex: 1, display: \'flex\', alignItems: \'center\', justifyContent: \'center\', gap: \'4px\', padding: \'6px 10px\', background: \'#f0fdf4\', border: \'1px solid #bbf7d0\', color: \'#16a34a\', borderRadius: \'6px\', cursor: \'pointer\', fontSize: \'0.75rem\', fontWeight: \'500\' }}><Printer size={14} /> Print Label</button>',
-                                  '<button onClick={() => handlePrintLabel(device, item)} style={{ flex: 1, display: \'flex\', alignItems: \'center\', justifyContent: \'center\', gap: \'4px\', padding: \'6px 10px\', background: \'#f0fdf4\', border: \'1px solid #bbf7d0\', color: \'#16a34a\', borderRadius: \'6px\', cursor: \'pointer\', fontSize: \'0.75rem\', fontWeight: \'500\' }}><Printer size={14} /> Print Label</button>\n                                        ' + btn_code)
+patches.append(Patch('Add History button', [('<button onClick={() => handlePrintLabel(device, item)} style={{ flex: 1, display: \'flex\', alignItems: \'center\', justifyContent: \'center\', gap: \'4px\', padding: \'6px 10px\', background: \'#f0fdf4\', border: \'1px solid #bbf7d0\', color: \'#16a34a\', borderRadius: \'6px\', cursor: \'pointer\', fontSize: \'0.75rem\', fontWeight: \'500\' }}><Printer size={14} /> Print Label</button>',
+                                  '<button onClick={() => handlePrintLabel(device, item)} style={{ flex: 1, display: \'flex\', alignItems: \'center\', justifyContent: \'center\', gap: \'4px\', padding: \'6px 10px\', background: \'#f0fdf4\', border: \'1px solid #bbf7d0\', color: \'#16a34a\', borderRadius: \'6px\', cursor: \'pointer\', fontSize: \'0.75rem\', fontWeight: \'500\' }}><Printer size={14} /> Print Label</button>\n                                        ' + btn_code)]))
 
 # 4. Add modal
 modal_code = """
@@ -72,7 +74,13 @@ modal_code = """
         )}
 """
 
-target_code = target_code.replace('      </div>\n    </div>\n  );\n}', modal_code + '      </div>\n    </div>\n  );\n}')
+patches.append(Patch('Add device history modal',
+                     [('      </div>\n    </div>\n  );\n}', modal_code + '      </div>\n    </div>\n  );\n}')]))
+
+target_code, report = replay(target_code, patches)
+for entry in report:
+    print(f"{entry['status']}: {entry['instruction']}")
+print(summarize(report))
 
 with open('frontend/src/components/Inventory/InventoryList.jsx', 'w') as f:
     f.write(target_code)
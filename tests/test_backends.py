@@ -0,0 +1,109 @@
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from ocr import backends
+
+
+class FakeReader:
+    def __init__(self, lang_list, gpu, **kwargs):
+        self.lang_list, self.kwargs = lang_list, kwargs
+        self.model_lang, self.recog_network = 'english', 'generation2'
+        self.detector, self.recognizer = FakeModel(1.0), FakeModel(2.0)
+
+
+class FakeTensor:
+    def __init__(self, array):
+        self.array = array
+
+    def detach(self):
+        return self
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+
+class FakeModel:
+    def __init__(self, weight):
+        self.weights = {'conv.weight': FakeTensor(np.full((2, 2), weight, np.float32))}
+
+    def state_dict(self):
+        return self.weights
+
+
+@pytest.fixture
+def fake_modules(monkeypatch):
+    threads = []
+    monkeypatch.setitem(sys.modules, 'easyocr', types.SimpleNamespace(Reader=FakeReader, __version__='1.7.1'))
+    monkeypatch.setitem(sys.modules, 'torch', types.SimpleNamespace(set_num_threads=threads.append))
+    monkeypatch.delenv('OCR_THREADS', raising=False)
+    monkeypatch.delenv('OCR_ONNX_QUANTIZE', raising=False)
+    return threads
+
+
+def test_torch_backend_keeps_default_threads_unless_asked(fake_modules, monkeypatch):
+    reader = backends.create_reader('torch')
+    assert isinstance(reader, FakeReader) and reader.lang_list == ['en']
+    assert fake_modules == []
+
+    monkeypatch.setenv('OCR_THREADS', '3')
+    backends.create_reader('torch')
+    assert fake_modules == [3]
+
+
+def test_onnx_backend_exports_from_fp32_weights(fake_modules, monkeypatch):
+    calls = []
+    monkeypatch.setattr(backends, 'use_onnx', lambda reader, **kwargs: calls.append((reader, kwargs)) or reader)
+    monkeypatch.setenv('OCR_BACKEND', 'onnx')
+    monkeypatch.setenv('OCR_ONNX_QUANTIZE', 'recognizer')
+
+    reader = backends.create_reader()
+    assert reader.kwargs == {'quantize': False}
+    assert calls == [(reader, {'threads': None, 'quantize': ['recognizer']})]
+    assert fake_modules == []
+
+    with pytest.raises(ValueError):
+        backends.create_reader('tensorrt')
+
+
+def test_model_names_carry_easyocr_version_and_weights(fake_modules):
+    name = backends.model_name('craft', FakeModel(1.0))
+    assert name.startswith('craft-easyocr1.7.1-')
+    assert backends.model_name('craft', FakeModel(1.0)) == name
+    assert backends.model_name('craft', FakeModel(3.0)) != name
+
+    sys.modules['easyocr'].__version__ = '1.8.0'
+    assert backends.model_name('craft', FakeModel(1.0)) != name
+
+
+def test_build_model_exports_and_quantizes_once(tmp_path, monkeypatch):
+    exported, quantized = [], []
+
+    def export(reader, path):
+        exported.append(os.path.basename(path))
+        open(path, 'wb').close()
+
+    def quantize_dynamic(src, dst, weight_type):
+        quantized.append((os.path.basename(src), os.path.basename(dst), weight_type))
+        open(dst, 'wb').close()
+
+    quantization = types.SimpleNamespace(QuantType=types.SimpleNamespace(QUInt8='QUInt8'),
+                                         quantize_dynamic=quantize_dynamic)
+    monkeypatch.setitem(sys.modules, 'onnxruntime', types.SimpleNamespace(quantization=quantization))
+    monkeypatch.setitem(sys.modules, 'onnxruntime.quantization', quantization)
+
+    path = backends._build_model('craft-v1', export, None, True, str(tmp_path))
+    assert os.path.basename(path) == 'craft-v1.int8.onnx'
+    assert exported == ['craft-v1.onnx']
+    assert quantized == [('craft-v1.onnx', 'craft-v1.int8.onnx', 'QUInt8')]
+
+    # Cached models are reused; unquantized builds return the FP32 export
+    assert backends._build_model('craft-v1', export, None, True, str(tmp_path)) == path
+    assert backends._build_model('craft-v1', export, None, False, str(tmp_path)).endswith('craft-v1.onnx')
+    assert len(exported) == 1 and len(quantized) == 1
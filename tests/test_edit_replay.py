@@ -0,0 +1,47 @@
+import random
+
+from edit_replay import AMBIGUOUS, APPLIED, INVALID, MISSING, Patch, PieceTable, replay
+
+
+def _edited():
+    """'abcdef' edited into the pieces 'ab', 'XY', 'e', 'Z', 'f'."""
+    doc = PieceTable('abcdef')
+    doc.replace(2, 2, 'XY')
+    doc.replace(5, 0, 'Z')
+    return doc
+
+
+def test_find_spans_pieces():
+    doc = _edited()
+    assert doc.text() == 'abXYeZf'
+    for needle in ('bX', 'XYeZ', 'abXYeZf', 'Zf', 'e', 'cd', 'g'):
+        assert doc.find(needle) == 'abXYeZf'.find(needle)
+    assert doc.find('b', 2) == -1
+    assert doc.find('Y', 3) == 3
+
+
+def test_matches_reference_replay():
+    rng = random.Random(3)
+    text = ''.join(rng.choice('abc\n') for _ in range(2000))
+    doc, reference = PieceTable(text), text
+    for _ in range(300):
+        offset = rng.randrange(len(reference) + 1)
+        length = rng.randrange(0, 6)
+        new = ''.join(rng.choice('abcd') for _ in range(rng.randrange(0, 6)))
+        doc.replace(offset, length, new)
+        reference = reference[:offset] + new + reference[offset + length:]
+        needle = reference[rng.randrange(len(reference)):][:rng.randrange(1, 8)]
+        start = rng.randrange(len(reference))
+        assert doc.find(needle, start) == reference.find(needle, start)
+    assert doc.text() == reference
+
+
+def test_replay_statuses():
+    text = 'one two two three'
+    edits = [Patch('unique', [('one', '1')]), Patch('dup', [('two', '2')]),
+             Patch('gone', [('four', '4')]), Patch('empty', [('', 'x')])]
+    result, report = replay(text, edits)
+    assert result == '1 two two three'
+    assert [e['status'] for e in report] == [APPLIED, AMBIGUOUS, MISSING, INVALID]
+    assert report[3]['offset'] is None and not report[3]['applied']
+    assert replay(result, edits[:1], reverse=True)[0] == text
@@ -0,0 +1,76 @@
+import pytest
+
+pytest.importorskip('google.generativeai')
+pytest.importorskip('pillow_heif')
+
+from gemini_ocr_service import GeminiOCRService  # noqa: E402
+
+
+class QuotaError(Exception):
+    pass
+
+
+def _service(generate):
+    service = GeminiOCRService.__new__(GeminiOCRService)
+    service.payload_options = {'max_edge': None}
+    service.last_payload_info = None
+    service.prepare_image = lambda image: image
+    service._generate = generate
+    return service
+
+
+def test_map_batch_keys_items_by_index():
+    data = [{'index': 1, 'imei': '2'}, {'index': 0, 'imei': '1'}]
+    assert GeminiOCRService._map_batch(data, 2) == {0: data[1], 1: data[0]}
+
+
+def test_map_batch_drops_duplicate_and_out_of_range_indexes():
+    data = [{'index': 0, 'imei': 'a'}, {'index': 0, 'imei': 'b'}, {'index': 1, 'imei': 'c'}, {'index': 5, 'imei': 'd'}]
+    assert GeminiOCRService._map_batch(data, 3) == {1: data[2]}
+    assert GeminiOCRService._map_batch([{'index': -1}], 1) == {}
+
+
+def test_map_batch_without_indexes_needs_the_whole_array():
+    data = [{'imei': '1'}, {'imei': '2'}]
+    assert GeminiOCRService._map_batch(data, 2) == {0: data[0], 1: data[1]}
+    assert GeminiOCRService._map_batch(data[:1], 2) == {}
+    # Mixed indexed and unindexed items only pair up as a complete array
+    assert GeminiOCRService._map_batch([{'index': 0}, {'imei': '2'}], 3) == {}
+
+
+def test_map_batch_rejects_bool_indexes_and_fields():
+    assert GeminiOCRService._map_batch([{'index': True}, {'index': False}], 3) == {}
+    assert GeminiOCRService._map_batch([{'index': 0, 'zip': True}], 1) == {}
+
+
+def test_format_result_keeps_leading_zeros():
+    result = GeminiOCRService._format_result({'zip': 2134, 'imei': 12345678901234, 'tracking_number': '1Z 999-AA1'})
+    assert result['shipping']['zip'] == '02134'
+    assert result['device']['imei'] == '012345678901234'
+    assert result['shipping']['tracking_number'] == '1Z999AA1'
+
+
+def test_batch_parse_failure_falls_back_to_single_requests():
+    calls = []
+
+    def generate(contents, retry_count):
+        calls.append(len(contents))
+        if len(contents) > 2:
+            return {'not': 'an array'}
+        return {'imei': contents[1]}
+
+    results = _service(generate).extract_label_data_batch(['a', 'b', 'c'], batch_size=3)
+    assert [r['device']['imei'] for r in results] == ['a', 'b', 'c']
+    assert calls == [7, 2, 2, 2]
+
+
+def test_batch_quota_error_is_raised_without_single_retries():
+    calls = []
+
+    def generate(contents, retry_count):
+        calls.append(len(contents))
+        raise QuotaError('429 Resource has been exhausted (e.g. check quota).')
+
+    with pytest.raises(QuotaError):
+        _service(generate).extract_label_data_batch(['a', 'b', 'c'], batch_size=3)
+    assert calls == [7]
@@ -0,0 +1,46 @@
+from ocr.invoice import TableReader, _header_columns, _money
+
+
+def _row(top, *cells):
+    # (text, left, right) per cell
+    return {'top': top, 'cells': [{'text': t, 'left': l, 'right': r} for t, l, r in cells]}
+
+
+def _page(*rows):
+    return {'page': 1, 'line_height': 20.0, 'rows': list(rows)}
+
+
+HEADER = _row(100, ('Item', 40, 90), ('Description', 150, 420), ('Qty', 500, 540),
+              ('Unit Price', 600, 700), ('Amount', 760, 860))
+
+
+def test_description_column_beats_item_column():
+    columns = _header_columns(HEADER['cells'])
+    names = [c[0] for c in columns]
+    assert names == [None, 'model', 'quantity', 'price', 'amount']
+
+    table = TableReader()
+    table.feed(_page(HEADER, _row(140, ('1001', 40, 90), ('Apple iPhone 13 Pro 128GB', 150, 410),
+                                  ('2', 510, 525), ('$699.00', 610, 690), ('$1,398.00', 760, 850))))
+    item, = table.items
+    assert item['description'] == 'Apple iPhone 13 Pro 128GB'
+    assert item['model'] == 'iPhone 13 Pro'
+    assert (item['quantity'], item['price'], item['amount']) == (2, 699.0, 1398.0)
+
+
+def test_header_words_need_word_boundaries():
+    cells = [{'text': 'Description', 'left': 0, 'right': 100}, {'text': 'Context', 'left': 200, 'right': 300},
+             {'text': 'Corporate', 'left': 400, 'right': 500}]
+    assert _header_columns(cells) is None
+
+
+def test_storage_size_is_not_a_price():
+    assert _money('128GB') is None
+    assert _money('1 TB $49.99') == 49.99
+
+    table = TableReader()
+    table.feed(_page(_row(10, ('iPhone 13 Pro 128GB $699.00', 0, 600)),
+                     _row(40, ('Samsung Galaxy S22 256 GB x2', 0, 600))))
+    first, second = table.items
+    assert first['price'] == 699.0
+    assert (second['price'], second['quantity']) == (0, 2)
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+pytest.importorskip('flask')
+
+from ocr.jobs import JobQueue  # noqa: E402
+
+
+def _queue(tmp_path, **kwargs):
+    handlers = {'scan': lambda payload, params: {'size': len(payload)}}
+    return JobQueue(str(tmp_path / 'jobs.sqlite3'), handlers, params={'scan': ('mode',)},
+                    files=str(tmp_path / 'files'), **kwargs)
+
+
+def test_rejects_params_the_kind_does_not_declare(tmp_path):
+    queue = _queue(tmp_path)
+    queue.submit('scan', b'img', {'mode': 'tray'})
+    for params in ({'image_path': '/etc/passwd'}, {'mode': ['tray']}, ['mode']):
+        with pytest.raises(ValueError):
+            queue.submit('scan', b'img', params)
+
+
+def test_live_lease_is_not_taken_over(tmp_path):
+    first = _queue(tmp_path)
+    second = _queue(tmp_path)
+    job_id = first.submit('scan', b'img')
+    assert first.claim()['id'] == job_id
+    # Another process opening the same database must not re-run it
+    assert second.claim() is None
+    assert second.get(job_id)['status'] == 'running'
+
+
+def test_expired_lease_is_retried_then_failed(tmp_path):
+    queue = _queue(tmp_path, lease=0, max_attempts=2)
+    job_id = queue.submit('scan', b'img')
+    assert queue.claim()['id'] == job_id
+    time.sleep(0.01)
+    assert queue.claim()['id'] == job_id
+    time.sleep(0.01)
+    assert queue.claim() is None
+    job = queue.get(job_id)
+    assert job['status'] == 'failed' and job['attempts'] == 2
+
+
+def test_finish_after_takeover_is_ignored(tmp_path):
+    first = _queue(tmp_path, lease=0)
+    second = _queue(tmp_path)
+    job_id = first.submit('scan', b'img')
+    first.claim()
+    time.sleep(0.01)
+    second.claim()
+    first.finish(job_id, error='stale')
+    assert second.get(job_id)['status'] == 'running'
+    second.finish(job_id, result={'ok': True})
+    assert second.get(job_id)['result'] == {'ok': True}
+
+
+def test_change_before_wait_is_not_lost(tmp_path):
+    queue = _queue(tmp_path)
+    seen = queue.changes()
+    queue.submit('scan', b'img')
+    started = time.monotonic()
+    assert queue.wait_for_change(5, seen)
+    assert time.monotonic() - started < 1
+
+
+def test_workers_run_jobs(tmp_path):
+    queue = _queue(tmp_path).start()
+    try:
+        job_id = queue.submit('scan', b'image')
+        deadline = time.monotonic() + 5
+        while queue.get(job_id)['status'] != 'done' and time.monotonic() < deadline:
+            queue.wait_for_change(0.1, queue.changes())
+        assert queue.get(job_id)['result'] == {'size': 5}
+    finally:
+        queue.stop()
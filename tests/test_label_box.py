@@ -0,0 +1,37 @@
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+from label_box import find_label_box
+from ocr.synth import generate_one
+
+
+def _iou(a, b):
+    w = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    h = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = w * h
+    return inter / float((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+
+def test_finds_label_in_synthetic_scenes(tmp_path):
+    scores, surfaces = [], set()
+    for i in range(12):
+        name = generate_one((str(tmp_path), i, 11 * 1000003 + i, 'scene', 756, 1008))
+        image = Image.open(os.path.join(tmp_path, name + '.jpg'))
+        with open(os.path.join(tmp_path, name + '.json')) as f:
+            truth = json.load(f)
+        ymin, xmin, ymax, xmax = truth['label_box']
+        w, h = image.size
+        box = find_label_box(image)
+        scores.append(_iou(box, (xmin * w / 1000, ymin * h / 1000, xmax * w / 1000, ymax * h / 1000)) if box else 0)
+        surfaces.add(truth['effects']['surface'])
+    assert 'bubble' in surfaces
+    assert sum(s >= 0.7 for s in scores) >= 11, scores
+
+
+def test_no_label_on_plain_cardboard():
+    rng = np.random.default_rng(0)
+    cardboard = np.clip(np.array([170, 120, 70]) + rng.normal(0, 6, (800, 600, 3)), 0, 255).astype(np.uint8)
+    assert find_label_box(Image.fromarray(cardboard)) is None
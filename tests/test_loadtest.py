@@ -0,0 +1,50 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ocr.loadtest import Target, label_box
+
+
+class FakeJobs(BaseHTTPRequestHandler):
+    posted = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.posted.append((self.headers.get('Authorization'), body))
+        self._reply({'success': True, 'job_id': 'abc', 'status': 'queued'})
+
+    def do_GET(self):
+        self._reply({'success': True, 'job': {'status': 'done', 'result': {'success': True, 'output': 'x.jpg'}}})
+
+    def _reply(self, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_label_box_reads_truth_next_to_image(tmp_path):
+    image = tmp_path / 'synth_000001.jpg'
+    image.write_bytes(b'')
+    (tmp_path / 'synth_000001.json').write_text(json.dumps({'label_box': [100, 125, 900, 875]}))
+    assert label_box(str(image)) == '100,125,900,875'
+    assert label_box(str(tmp_path / 'other.jpg')) == '0,0,1000,1000'
+
+
+def test_straighten_uploads_the_image():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeJobs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        target = Target('straighten', f'http://127.0.0.1:{server.server_port}', {}, 5, token='secret')
+        assert target('/nowhere/photo.jpg', b'JPEGDATA')['output'] == 'x.jpg'
+    finally:
+        server.shutdown()
+    auth, body = FakeJobs.posted[-1]
+    assert auth == 'Bearer secret'
+    assert b'JPEGDATA' in body and b'name="image"' in body
+    assert b'/nowhere' not in body and b'out_path' not in body
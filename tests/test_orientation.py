@@ -0,0 +1,113 @@
+import json
+import random
+
+import cv2
+import numpy as np
+import pytest
+
+from ocr.synth import generate_one, make_device, make_shipping, render_label, render_sticker
+from orientation import MIN_CONFIDENCE, PORTRAIT_FLIP_CONFIDENCE, auto_orient, estimate_orientation, orient_portrait, rotate
+from straighten import extract_label
+
+
+def _bgr(image):
+    return cv2.cvtColor(np.asarray(image), cv2.COLOR_GRAY2BGR)
+
+
+def _labels():
+    rng = random.Random(34)
+    for _ in range(4):
+        yield _bgr(render_label(rng, make_shipping(rng)))
+
+
+@pytest.mark.parametrize('turn', [0, 90, 180, 270])
+def test_estimates_each_turn(turn):
+    rng = random.Random(turn)
+    images = list(_labels()) + [_bgr(render_sticker(rng, make_device(rng))) for _ in range(2)]
+    for upright in images:
+        angle, confidence = estimate_orientation(rotate(upright, turn))
+        assert angle == (360 - turn) % 360
+        assert confidence >= MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize('turn', [0, 90, 180, 270])
+def test_orient_portrait_restores_label(turn):
+    for upright in _labels():
+        image, angle, _ = orient_portrait(rotate(upright, turn), min_confidence=0.0)
+        assert angle == (360 - turn) % 360
+        assert image.shape == upright.shape
+        assert np.array_equal(image, upright)
+
+
+def test_portrait_flip_needs_a_strong_signal():
+    for upright in _labels():
+        image, angle, confidence = orient_portrait(rotate(upright, 180))
+        if confidence >= PORTRAIT_FLIP_CONFIDENCE:
+            assert angle == 180 and np.array_equal(image, upright)
+        else:
+            assert angle == 0
+
+
+def test_weak_signal_is_left_alone():
+    blank = np.full((1200, 800, 3), 255, np.uint8)
+    bars = blank.copy()
+    for x in range(100, 700, 12):
+        cv2.rectangle(bars, (x, 400), (x + 5, 800), (0, 0, 0), -1)
+    for image in (blank, bars):
+        out, angle, confidence = auto_orient(image)
+        assert confidence < MIN_CONFIDENCE
+        assert angle == 0 and out is image
+
+
+def test_extract_label_writes_upright_portrait(tmp_path):
+    upright = next(_labels())
+    scene = np.full((1000, 1600, 3), 90, np.uint8)
+    turned = rotate(upright, 90)
+    h, w = turned.shape[:2]
+    scene[100:100 + h, 200:200 + w] = turned
+    src, out = str(tmp_path / 'scene.jpg'), str(tmp_path / 'label.jpg')
+    cv2.imwrite(src, scene)
+    box = ','.join(str(v) for v in (100, 125, 900, 875))
+
+    result = json.loads(extract_label(src, out, box))
+    assert result['success']
+    assert result['orientation']['angle'] == 270
+    assert cv2.imread(out).shape[:2] == (1200, 800)
+
+
+# Upright synthetic photos (kind, seed, index, size) whose label crops flip 180 degrees at
+# lower confidence thresholds: bubble wrap or cardboard around the label, blur, glare
+UPRIGHT_PHOTOS = [
+    ('label', 405, 30, (1512, 2016)),
+    ('scene', 404, 34, (1512, 2016)),
+    ('scene', 404, 56, (1512, 2016)),
+    ('scene', 507, 18, (756, 1008)),
+    ('scene', 507, 45, (756, 1008)),
+    ('scene', 507, 56, (756, 1008)),
+]
+
+
+@pytest.mark.parametrize('kind,seed,index,size', UPRIGHT_PHOTOS)
+def test_upright_photo_labels_are_not_flipped(tmp_path, kind, seed, index, size):
+    name = generate_one((str(tmp_path), index, seed * 1000003 + index, kind) + size)
+    with open(tmp_path / (name + '.json')) as f:
+        truth = json.load(f)
+    assert truth['orientation'] == 0
+    out = str(tmp_path / 'label.jpg')
+
+    result = json.loads(extract_label(str(tmp_path / (name + '.jpg')), out, ','.join(map(str, truth['label_box']))))
+    assert result['orientation']['angle'] == 0
+    assert cv2.imread(out).shape[:2] == (1200, 800)
+
+
+def test_distorted_photos_keep_upright_labels(tmp_path):
+    flipped = []
+    for index in range(16):
+        name = generate_one((str(tmp_path), index, 506 * 1000003 + index, 'label', 756, 1008))
+        with open(tmp_path / (name + '.json')) as f:
+            truth = json.load(f)
+        result = json.loads(extract_label(str(tmp_path / (name + '.jpg')), str(tmp_path / 'label.jpg'),
+                                          ','.join(map(str, truth['label_box']))))
+        if truth['orientation'] == 0 and result['orientation']['angle'] != 0:
+            flipped.append(name)
+    assert flipped == []
@@ -0,0 +1,119 @@
+import multiprocessing as mp
+import os
+import queue
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from ocr.pipeline import QUEUED, FrameRing, ScanPipeline
+
+SCRIPT = '''
+import atexit, multiprocessing as mp, sys
+sys.path.insert(0, %r)
+from ocr.pipeline import FrameRing, ScanPipeline
+
+def attach(ring):
+    ring.view(('shm', 0, (4,), '<u1'))
+
+if __name__ == '__main__':
+    ctx = mp.get_context('spawn')
+    pipeline = ScanPipeline(slots=2, slot_mb=1)
+    pipeline._rings = {'full': FrameRing(ctx, 2, 1024)}
+    atexit.register(pipeline._unlink_rings)
+    print(pipeline._rings['full'].shm.name, flush=True)
+    worker = ctx.Process(target=attach, args=(pipeline._rings['full'],))
+    worker.start()
+    worker.join()
+''' % ROOT
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'), reason='needs /dev/shm')
+def test_ring_unlinked_after_worker_attached(tmp_path):
+    script = tmp_path / 'ring.py'
+    script.write_text(SCRIPT)
+    run = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=60)
+    assert run.returncode == 0, run.stderr
+    name = run.stdout.strip().lstrip('/')
+    assert not os.path.exists(os.path.join('/dev/shm', name))
+    assert 'leaked' not in run.stderr
+
+
+MONITOR_SCRIPT = '''
+import multiprocessing as mp, os, sys, time
+sys.path.insert(0, %r)
+import numpy as np
+from concurrent.futures import Future
+from ocr.pipeline import FrameRing, ScanPipeline
+
+def hold_then_crash(ring, flag):
+    if os.path.exists(flag):
+        time.sleep(60)
+    open(flag, 'w').close()
+    ring.put(np.zeros(4, np.uint8), 5)
+    os._exit(3)
+
+if __name__ == '__main__':
+    ctx = mp.get_context('spawn')
+    pipeline = ScanPipeline(slots=1, slot_mb=1)
+    pipeline._ctx = ctx
+    ring = FrameRing(ctx, 1, 1024)
+    pipeline._rings = {'full': ring}
+    future = Future()
+    pipeline._futures[5] = future
+    first = pipeline._spawn(hold_then_crash, (ring, sys.argv[1]))
+    pipeline._workers = [[first, hold_then_crash, (ring, sys.argv[1])]]
+    import threading
+    threading.Thread(target=pipeline._monitor, daemon=True).start()
+    print(future.exception(timeout=30), flush=True)
+    print(ring.free.get(timeout=10), flush=True)
+    deadline = time.time() + 10
+    while pipeline._workers[0][0] is first and time.time() < deadline:
+        time.sleep(0.1)
+    respawned = pipeline._workers[0][0]
+    print(respawned is not first and respawned.is_alive(), flush=True)
+    pipeline._stopping.set()
+    respawned.kill()
+    ring.close(unlink=True)
+''' % ROOT
+
+
+def test_reclaims_slots_of_dead_holders_only():
+    ring = FrameRing(mp.get_context('spawn'), 3, 64)
+    try:
+        ring.put(np.zeros(4, np.uint8), 11)
+        queued = ring.put(np.zeros(4, np.uint8), 12)
+        ring.hand_off(queued)
+        assert ring.owners[queued[1]] == QUEUED
+        assert ring.reclaim(os.getpid()) == [11]
+        assert ring.reclaim(os.getpid()) == []
+        ring.claim(queued)
+        ring.release(queued)
+        assert sorted(ring.free.get(timeout=5) for _ in range(3)) == [0, 1, 2]
+        assert list(ring.owners) == [0, 0, 0]
+    finally:
+        ring.close(unlink=True)
+
+
+def test_scan_timeout_forgets_the_job():
+    pipeline = ScanPipeline(slots=1, slot_mb=1)
+    pipeline._in = queue.Queue()
+    with pytest.raises(TimeoutError):
+        pipeline.scan(b'jpeg', timeout=0.01)
+    assert pipeline._futures == {}
+    # A late result for the dropped job is ignored
+    pipeline._finish(0, 'ok', {})
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'), reason='needs /dev/shm')
+def test_monitor_respawns_dead_worker_and_frees_its_slot(tmp_path):
+    script = tmp_path / 'monitor.py'
+    script.write_text(MONITOR_SCRIPT)
+    run = subprocess.run([sys.executable, str(script), str(tmp_path / 'crashed')], capture_output=True, text=True,
+                         timeout=90)
+    assert run.returncode == 0, run.stderr
+    error, slot, respawned = run.stdout.strip().splitlines()[-3:]
+    assert error == 'Scan worker died (exit code 3)'
+    assert slot == '0' and respawned == 'True'
@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+pytest.importorskip('flask')
+
+from ocr import profiling  # noqa: E402
+from ocr.profiling import Profiler  # noqa: E402
+
+
+def _work():
+    return sum(i * i for i in range(1000))
+
+
+def test_deterministic_profiles_one_request_at_a_time():
+    profiler = Profiler()
+    session = profiler.start('deterministic', requests=2)
+    inside, release = threading.Event(), threading.Event()
+
+    def slow():
+        with profiler.request('scan'):
+            inside.set()
+            release.wait(5)
+            _work()
+
+    thread = threading.Thread(target=slow)
+    thread.start()
+    inside.wait(5)
+    # A request overlapping the profiled one runs unprofiled and isn't counted
+    with profiler.request('scan'):
+        _work()
+    assert session.requests == 0
+    release.set()
+    thread.join()
+    with profiler.request('scan'):
+        _work()
+
+    assert session.done.is_set() and session.requests == 2
+    assert session.stats is not None
+    assert profiler._active == {}
+    assert not profiler._cprofile.locked()
+
+
+def test_enable_failure_leaves_no_active_entry(monkeypatch):
+    class Busy:
+        def enable(self):
+            raise ValueError('Another profiling tool is already active')
+
+    monkeypatch.setattr(profiling.cProfile, 'Profile', Busy)
+    profiler = Profiler()
+    session = profiler.start('deterministic', requests=1)
+    with profiler.request('scan'):
+        assert profiler._active == {}
+    assert session.requests == 0
+    assert not profiler._cprofile.locked()
@@ -0,0 +1,48 @@
+import numpy as np
+
+from ocr.extractors import EXTRACTORS
+from ocr.reextract import diff_batch
+from ocr.store import ScanStore
+
+SCANS = [
+    {'full': ['IMEI: 353911100000001'], 'bottom': []},
+    {'full': ['UPS GROUND', 'TRACKING #: 1Z 999 AA1 01 2345 6784'], 'bottom': ['IMEI: 356938035643809']},
+    {'full': ['Apple iPhone 14 Pro 128GB Space Black', 'IMEI 356938035643809'], 'bottom': []},
+]
+
+
+def _results(lines):
+    # readtext output as EasyOCR returns it, numpy coordinates and confidences included
+    return [(np.array([[0, 30 * i], [400, 30 * i], [400, 30 * i + 24], [0, 30 * i + 24]]), text, np.float32(0.9))
+            for i, text in enumerate(lines)]
+
+
+def _replay(store, version):
+    total, diffs = 0, []
+    for rows in store.iter_batches(batch_size=2):
+        count, batch_diffs = diff_batch((version, rows))
+        total += count
+        diffs += batch_diffs
+    return total, diffs
+
+
+def test_stored_scans_replay_through_v1_and_v2(tmp_path):
+    store = ScanStore(str(tmp_path / 'store.sqlite3'))
+    ids = []
+    for scan in SCANS:
+        passes = {name: _results(lines) for name, lines in scan.items()}
+        device, shipping = EXTRACTORS['v1'].extract_fields({name: ' '.join(lines) for name, lines in scan.items()})
+        ids.append(store.record('full-v1', 'v1', passes, device, shipping, size=(1512, 2016)))
+
+    # Replaying with the extractors that produced the rows reproduces them exactly
+    assert _replay(store, 'v1') == (3, [])
+
+    total, diffs = _replay(store, 'v2')
+    assert total == 3
+    assert diffs == [
+        {'id': ids[1], 'source': 'full-v1', 'extractors': 'v1',
+         'changed': {'device.imei': [None, '356938035643809'], 'shipping.service': [None, 'UPS Ground']}},
+        {'id': ids[2], 'source': 'full-v1', 'extractors': 'v1',
+         'changed': {'device.storage': [None, '128GB']}},
+    ]
+    store.close()
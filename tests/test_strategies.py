@@ -0,0 +1,90 @@
+import time
+
+import numpy as np
+import pytest
+
+from ocr.extractors import EXTRACTORS
+from ocr.store import ScanStore
+from ocr.strategies import ALIASES, PASS_IMAGES, STRATEGIES, ShadowRunner, agreement, get_strategy
+
+
+class LineReader:
+    """Reads the same lines from every image."""
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    def readtext(self, image, **kwargs):
+        return [([[0, 30 * i], [400, 30 * i], [400, 30 * i + 24], [0, 30 * i + 24]], text, 0.9)
+                for i, text in enumerate(self.lines)]
+
+
+def _wait(predicate, timeout=10):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.02)
+    return predicate()
+
+
+def test_registry_is_consistent():
+    for name, strategy in STRATEGIES.items():
+        assert strategy.name == name
+        assert strategy.extractors in EXTRACTORS
+        assert set(strategy.passes) <= set(PASS_IMAGES)
+        if strategy.fallback:
+            assert not STRATEGIES[strategy.fallback].templates
+    for alias, name in ALIASES.items():
+        assert get_strategy(alias) is STRATEGIES[name]
+    with pytest.raises(ValueError):
+        get_strategy('full-v3')
+
+
+def test_agreement_scores_fields_of_both_results():
+    primary = ({'imei': '353911100000001'}, {'carrier': 'UPS', 'zip': '02134'})
+    assert agreement(primary, primary) == (1.0, {})
+    assert agreement(({}, {}), ({}, {})) == (1.0, {})
+
+    candidate = ({'imei': '353911100000001'}, {'carrier': 'USPS', 'state': 'MA'})
+    score, diffs = agreement(primary, candidate)
+    assert score == 0.25
+    assert diffs == {'shipping.carrier': ['UPS', 'USPS'], 'shipping.state': [None, 'MA'],
+                     'shipping.zip': ['02134', None]}
+
+
+def test_shadow_runs_candidate_and_records_agreement(tmp_path):
+    store = ScanStore(str(tmp_path / 'store.sqlite3'))
+    reader = LineReader(['IMEI: 353911100000001', 'UPS GROUND'])
+    runner = ShadowRunner(lambda: reader, STRATEGIES['full-v2'], 1.0, store, max_share=1.0)
+    image = np.zeros((20, 20, 3), np.uint8)
+    primary = ({'imei': '353911100000001'}, {'carrier': 'FedEx'})
+
+    runner.maybe_submit(image, STRATEGIES['full-v2'], primary, 5.0)  # same strategy: nothing to compare
+    runner.maybe_submit(image, STRATEGIES['full-v1'], primary, 5.0)
+    assert _wait(lambda: store.shadow_summary())
+    [pair] = store.shadow_summary()
+    assert (pair['primary'], pair['candidate'], pair['runs'], pair['primary_ms']) == ('full-v1', 'full-v2', 1, 5.0)
+    assert 'shipping.carrier' in pair['disagreements'] and 'device.imei' not in pair['disagreements']
+    assert 0 < pair['agreement'] < 1
+
+
+def test_shadow_summary_groups_runs_per_pair(tmp_path):
+    store = ScanStore(str(tmp_path / 'store.sqlite3'))
+    store.record_shadow('full-v1', 'dual-v2', 10.0, 30.0, 1.0, {})
+    store.record_shadow('full-v1', 'dual-v2', 20.0, 50.0, 0.5, {'shipping.zip': ['1', '2']})
+    store.record_shadow('full-v1', 'template', 10.0, 20.0, 0.0, {'shipping.zip': ['1', None],
+                                                                 'device.imei': ['3', None]})
+    summary = {p['candidate']: p for p in store.shadow_summary()}
+    assert summary['dual-v2'] == {'primary': 'full-v1', 'candidate': 'dual-v2', 'runs': 2, 'agreement': 0.75,
+                                  'primary_ms': 15.0, 'candidate_ms': 40.0, 'disagreements': {'shipping.zip': 1}}
+    assert summary['template']['disagreements'] == {'shipping.zip': 1, 'device.imei': 1}
+
+
+def test_shadow_holds_to_its_cpu_share(tmp_path):
+    runner = ShadowRunner(lambda: None, STRATEGIES['full-v2'], 1.0, ScanStore(str(tmp_path / 's.sqlite3')),
+                          max_share=0.2)
+    assert runner.pause_after(0.5) == pytest.approx(2.0)
+
+    # Scans sampled while the runner idles after a run are skipped, not queued
+    runner._resume_at = time.monotonic() + 60
+    runner.maybe_submit(None, STRATEGIES['full-v1'], ({}, {}), 1.0)
+    assert runner._queue.empty()
@@ -0,0 +1,70 @@
+import json
+import os
+
+from ocr.synth import evaluate_dir, generate_one
+
+
+def _box(y, text):
+    return [[20, y], [420, y], [420, y + 24], [20, y + 24]], text, 0.9
+
+
+class ScriptedReader:
+    """Reads the same boxes from every image."""
+
+    def __init__(self, results):
+        self.results = results
+
+    def readtext(self, image, detail=1, **kwargs):
+        return [text for _, text, _ in self.results] if detail == 0 else list(self.results)
+
+    def detect(self, image):
+        return [[]], [[]]
+
+    def recognize(self, image, horizontal_list, free_list, batch_size=1):
+        return list(self.results)
+
+
+def _generate(out_dir, index, kind, seed):
+    name = generate_one((str(out_dir), index, seed * 1000003 + index, kind, 756, 1008))
+    with open(os.path.join(out_dir, name + '.json')) as f:
+        return json.load(f)
+
+
+def _scene_lines(truth):
+    shipping, device = truth['shipping'], truth['device']
+    lines = [shipping['service'].upper(), f"TRACKING #: {shipping['tracking_number']}", 'SHIP TO:',
+             shipping['recipient_name'], shipping['street_address'],
+             f"{shipping['city']} {shipping['state']} {shipping['zip']}",
+             f"Apple, {device['model']}, {device['storage'][:-2]}, {device['color']}", f"IMEI: {device['imei']}"]
+    return [_box(40 * i, text) for i, text in enumerate(lines)]
+
+
+def test_evaluate_scores_strategies_against_truth(tmp_path):
+    scene = _generate(tmp_path, 0, 'scene', 41)
+    _generate(tmp_path, 1, 'label', 41)
+
+    report = evaluate_dir(str(tmp_path), ScriptedReader(_scene_lines(scene)))
+    assert report['images'] == 2
+    assert 0 <= report['orientation']['accuracy'] <= 1
+    assert report['straighten']['success_rate'] == 1.0
+    assert set(report['strategies']) == {'dual-v2', 'template'}
+    for result in report['strategies'].values():
+        assert result['fields']['shipping.tracking_number'] == 1.0
+        assert result['fields']['device.imei'] == 1.0
+        assert 0 < result['overall'] <= 1
+
+    # Reading nothing scores nothing
+    blind = evaluate_dir(str(tmp_path), ScriptedReader([]), strategies=['dual-v2'])
+    assert blind['strategies']['dual-v2']['overall'] == 0.0
+
+
+def test_evaluate_scores_tray_recall(tmp_path):
+    tray = _generate(tmp_path, 0, 'tray', 43)
+    # Four stickers read, far enough apart to be grouped separately
+    results = []
+    for i, device in enumerate(tray['devices'][:4]):
+        results += [_box(200 * i, f"{device['model']}, {device['storage']}, {device['color']}"),
+                    _box(200 * i + 30, f"IMEI: {device['imei']}")]
+    report = evaluate_dir(str(tmp_path), ScriptedReader(results))
+    assert report['strategies'] == {}
+    assert report['tray']['imei_recall'] == round(4 / len(tray['devices']), 4)
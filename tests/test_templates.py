@@ -0,0 +1,76 @@
+import random
+
+import numpy as np
+
+from ocr import strategies, templates
+from ocr.preprocess import below_label_for_stickers
+from ocr.synth import make_tracking
+from ocr.templates import TEMPLATES, LabelRead, read_label, validate_shipping
+
+
+class FakeReader:
+    """Answers every readtext call with one 10x10 box at the crop's origin."""
+
+    def __init__(self, text='TEXT'):
+        self.text = text
+        self.images = []
+
+    def readtext(self, image, **kwargs):
+        self.images.append(image)
+        return [([[0, 0], [10, 0], [10, 10], [0, 10]], self.text, 0.9)]
+
+
+def test_validate_shipping_applies_check_digits():
+    rng = random.Random(40)
+    ups, usps = make_tracking(rng, 'UPS'), make_tracking(rng, 'USPS')
+    assert validate_shipping({'carrier': 'UPS', 'tracking_number': ups})['tracking_number'] == ups
+    assert validate_shipping({'carrier': 'USPS', 'tracking_number': usps})['tracking_number'] == usps
+    broken = usps[:-1] + str((int(usps[-1]) + 1) % 10)
+    assert 'tracking_number' not in validate_shipping({'carrier': 'USPS', 'tracking_number': broken})
+    assert 'tracking_number' not in validate_shipping({'carrier': 'USPS', 'tracking_number': ups})
+    assert validate_shipping({'state': 'T X', 'zip': '7870'}) == {}
+
+
+def test_zone_boxes_are_in_label_coordinates(monkeypatch):
+    label = np.full((1200, 800, 3), 255, np.uint8)
+    template = TEMPLATES[0]
+    corners = np.array([[0, 0], [800, 0], [800, 1200], [0, 1200]], np.float32)
+    monkeypatch.setattr(templates, 'find_corners', lambda image: corners)
+    monkeypatch.setattr(templates, 'warp_label', lambda image, corners: label)
+    monkeypatch.setattr(templates, 'identify', lambda reader, image: (template, image))
+
+    read = read_label(FakeReader(), label)
+    origins = [tuple(box[0]) for box, _, _ in read.results]
+    assert origins == [(int(z.box[0] * 800), int(z.box[1] * 1200)) for z in template.zones]
+    assert read.bottom == 1200
+
+
+def test_sticker_pass_starts_under_the_label(monkeypatch):
+    image = np.full((2000, 1500, 3), 255, np.uint8)
+    assert below_label_for_stickers(image, 400).shape == (3000, 4500)
+    assert below_label_for_stickers(image, 1400).shape == (1800, 4500)
+    # A label down to the frame's edge may be the whole photo: read the full bottom half
+    assert below_label_for_stickers(image, 1900).shape == (3000, 4500)
+
+    read = LabelRead('ups_ground', 'UPS', {'carrier': 'UPS', 'service': 'UPS Ground'}, [], '', 1400)
+    monkeypatch.setattr(strategies, 'read_label', lambda reader, image: read)
+    reader = FakeReader()
+    results, _, _, _ = strategies.run_strategy(reader, strategies.STRATEGIES['template'], image)
+    assert [i.shape for i in reader.images] == [(1800, 4500)] and set(results) == {'full', 'bottom'}
+
+
+def test_template_strategy_drops_unchecked_zone_text_fields(monkeypatch):
+    rng = random.Random(41)
+    tracking = make_tracking(rng, 'USPS')
+    # The tracking zone gave no valid number, but its text holds a longer digit run
+    # that the v2 extractor would otherwise report as the USPS tracking number
+    zone_text = f'USPS TRACKING # {tracking}77'
+    read = LabelRead('usps_ground_advantage', 'USPS', {'carrier': 'USPS', 'service': 'USPS Ground Advantage'},
+                     [([[0, 0], [10, 0], [10, 10], [0, 10]], zone_text, 0.9)], zone_text)
+    monkeypatch.setattr(strategies, 'read_label', lambda reader, image: read)
+    monkeypatch.setattr(strategies, 'below_label_for_stickers', lambda image, bottom: image)
+
+    _, _, _, shipping = strategies.run_strategy(FakeReader(''), strategies.STRATEGIES['template'],
+                                                np.zeros((10, 10), np.uint8))
+    assert shipping['carrier'] == 'USPS'
+    assert 'tracking_number' not in shipping
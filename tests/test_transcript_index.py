@@ -0,0 +1,132 @@
+import json
+import os
+import subprocess
+import sys
+
+from transcript_index import TranscriptIndex, open_index, parse_args
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGET = 'frontend/src/components/Inventory/InventoryList.jsx'
+
+
+def _call(instruction, chunks, target=TARGET):
+    # Args as the transcript stores them: every value JSON-encoded
+    args = {'TargetFile': json.dumps(target), 'Instruction': json.dumps(instruction)}
+    if len(chunks) == 1:
+        args['TargetContent'], args['ReplacementContent'] = (json.dumps(text) for text in chunks[0])
+        return {'name': 'replace_file_content', 'args': args}
+    args['ReplacementChunks'] = json.dumps([{'TargetContent': t, 'ReplacementContent': r} for t, r in chunks])
+    return {'name': 'multi_replace_file_content', 'args': args}
+
+
+def _line(*calls):
+    return json.dumps({'type': 'PLANNER_RESPONSE', 'tool_calls': list(calls)}) + '\n'
+
+
+def _write(path, lines, mode='w'):
+    with open(path, mode) as f:
+        f.writelines(lines)
+
+
+def test_parse_args_decodes_only_json_blobs():
+    args = parse_args({'Instruction': '"Use tailwind"', 'ReplacementChunks': '[{"TargetContent": "a"}]',
+                       'Count': '42', 'Flag': 'true', 'Raw': 'not json', 'Broken': '[1,'})
+    assert args == {'Instruction': 'Use tailwind', 'ReplacementChunks': [{'TargetContent': 'a'}],
+                    'Count': '42', 'Flag': 'true', 'Raw': 'not json', 'Broken': '[1,'}
+
+
+def test_index_filters_and_orders_edits(tmp_path):
+    transcript = str(tmp_path / 'transcript.jsonl')
+    _write(transcript, [
+        json.dumps({'type': 'USER_INPUT'}) + '\n',
+        _line(_call('Switch to tailwind', [('<div>', '<div className="p-2">')]),
+              {'name': 'view_file', 'args': {}}),
+        _line(_call('Rename 100%_width', [('a', 'b'), ('c', 'd')], target='src/App.jsx')),
+        '{"type": "PLANNER_RESPONSE", replace_file_content broken\n',
+    ])
+    index = open_index(transcript)
+    assert [e.instruction for e in index.edits()] == ['Switch to tailwind', 'Rename 100%_width']
+    assert [e.instruction for e in index.edits(reverse=True)] == ['Rename 100%_width', 'Switch to tailwind']
+    [edit] = index.edits(target='InventoryList', instruction='TAILWIND')
+    assert (edit.tool, edit.chunks) == ('replace_file_content', [('<div>', '<div className="p-2">')])
+    assert [e.chunks for e in index.edits(contains='100%_w')] == [[('a', 'b'), ('c', 'd')]]
+    assert index.errors == 1
+
+    # % and _ match themselves, not any run or character
+    assert list(index.edits(instruction='100%width')) == []
+    assert list(index.edits(instruction='Switch_to')) == []
+    index.close()
+
+
+def test_refresh_only_parses_appended_lines(tmp_path):
+    transcript = str(tmp_path / 'transcript.jsonl')
+    _write(transcript, [_line(_call('first', [('a', 'b')]))])
+    index = open_index(transcript)
+    partial = _line(_call('second', [('c', 'd')]))
+    _write(transcript, [partial[:20]], mode='a')
+    assert [e.instruction for e in index.refresh().edits()] == ['first']
+
+    _write(transcript, [partial[20:]], mode='a')
+    index.conn.execute("UPDATE edits SET instruction = 'kept'")  # a rescan would overwrite this
+    assert [e.instruction for e in index.refresh().edits()] == ['kept', 'second']
+    index.close()
+
+
+def test_refresh_rebuilds_a_replaced_transcript(tmp_path):
+    transcript = str(tmp_path / 'transcript.jsonl')
+    _write(transcript, [_line(_call('old', [('a', 'b')]))])
+    open_index(transcript).close()
+
+    # Rewritten in place with a different, longer first line
+    _write(transcript, [_line(_call('new and longer', [('a', 'b')]))])
+    assert [e.instruction for e in open_index(transcript).edits()] == ['new and longer']
+
+    # Same bytes, but a new file renamed over the old one
+    replacement = str(tmp_path / 'replacement.jsonl')
+    _write(replacement, [_line(_call('new and longer', [('a', 'b')])), _line(_call('more', [('c', 'd')]))])
+    index = TranscriptIndex(transcript)
+    index.conn.execute("UPDATE edits SET instruction = 'stale'")
+    index.conn.commit()
+    os.replace(replacement, transcript)
+    assert [e.instruction for e in index.refresh().edits()] == ['new and longer', 'more']
+    index.close()
+
+
+def _run(script, cwd, transcript, *args):
+    env = dict(os.environ, TRANSCRIPT=transcript,
+               PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, 'backend', 'scripts')]))
+    result = subprocess.run([sys.executable, os.path.join(ROOT, script), *args], cwd=cwd, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_history_scripts_read_the_index(tmp_path):
+    original = '<div>\n  <span>Count</span>\n</div>\n'
+    edited = '<div className="p-2">\n  <span className="text-sm">Count</span>\n</div>\n'
+    transcript = str(tmp_path / 'transcript.jsonl')
+    _write(transcript, [
+        _line(_call('Add tailwind padding', [('<div>', '<div className="p-2">')])),
+        _line(_call('Add tailwind text size', [('<span>Count', '<span className="text-sm">Count'),
+                                                ('<truncated 20 bytes>', '')])),
+    ])
+    source = tmp_path / TARGET
+    source.parent.mkdir(parents=True)
+    source.write_text(edited)
+    (tmp_path / (TARGET + '.backup')).write_text(original)
+
+    assert _run('get_edits.py', tmp_path, transcript).splitlines() == [
+        'Found instruction: Add tailwind padding', 'Found instruction: Add tailwind text size']
+
+    out = _run('check_trunc.py', tmp_path, transcript)
+    assert out.count("TargetContent contains '<truncated': True") == 1
+    assert out.count("ReplacementContent contains '<truncated': False") == 2
+
+    out = _run('match_target.py', tmp_path, transcript)
+    assert out.count('Match in backup?: True') == 2
+    assert out.count('Match in backup?: False') == 1 and "'<truncated 20 bytes>'" in out
+
+    out = _run('revert.py', tmp_path, transcript)
+    assert source.read_text() == original
+    assert 'Invalid: Add tailwind text size (chunk 1)' in out  # an empty replacement can't be located to undo
+    assert (tmp_path / 'revert_report.json').exists()
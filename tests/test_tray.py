@@ -0,0 +1,57 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+from ocr.synth import generate_one
+from ocr.tray import find_sticker_regions, scan_tray
+
+
+def _inside(point, region):
+    x, y, w, h = region
+    return x <= point[0] < x + w and y <= point[1] < y + h
+
+
+def test_regions_on_synthetic_trays(tmp_path):
+    found = total = 0
+    surfaces = set()
+    for i in range(8):
+        name = generate_one((str(tmp_path), i, 5 * 1000003 + i, 'tray', 1008, 1344))
+        image = cv2.imread(os.path.join(tmp_path, name + '.jpg'))
+        with open(os.path.join(tmp_path, name + '.json')) as f:
+            truth = json.load(f)
+        surfaces.add(truth['effects']['surface'])
+        regions = find_sticker_regions(image)
+        for device in truth['devices']:
+            x, y, w, h = device['bbox']
+            hits = [r for r in regions if _inside((x + w / 2.0, y + h / 2.0), r)]
+            found += bool(hits) and hits[0][2] * hits[0][3] < 2.5 * w * h
+            total += 1
+    assert 'bubble' in surfaces
+    assert found >= 0.95 * total, (found, total)
+
+
+class FakeReader:
+    def __init__(self, results):
+        self.results = results
+
+    def detect(self, image):
+        return [[]], [[]]
+
+    def recognize(self, image, horizontal_list, free_list, batch_size=1):
+        return self.results
+
+
+def _line(x, y, text):
+    return [[x, y], [x + 300, y], [x + 300, y + 24], [x, y + 24]], text, 0.9
+
+
+def test_whole_image_fallback_groups_text():
+    blank = np.full((800, 1000, 3), 40, np.uint8)
+    results = [
+        _line(50, 50, 'Apple, iPhone 14 Pro, 128, Black'), _line(50, 80, 'IMEI: 353918110000003'),
+        _line(600, 500, 'Galaxy S22, 256GB, Blue'), _line(600, 530, 'IMEI: 352026110000000'),
+    ]
+    devices = scan_tray(FakeReader(results), blank)
+    assert [d['imei'] for d in devices] == ['353918110000003', '352026110000000']
@@ -0,0 +1,190 @@
+"""
+Streaming, on-disk index of the file-edit calls in an agent transcript.jsonl.
+
+The transcript is read once, line by line, and every replace_file_content /
+multi_replace_file_content call is stored in a SQLite file next to it
+(<transcript>.index.sqlite3) keyed by target file and instruction. Later runs
+only parse lines appended since the last run, so the history-recovery scripts
+become index lookups instead of re-reading hundreds of MB of JSON. The index
+is rebuilt from scratch when the transcript is replaced: a different inode, a
+different first line, or a file shorter than what was already indexed.
+
+    from transcript_index import open_index
+    for edit in open_index().edits(target='InventoryList.jsx', reverse=True):
+        for target, replacement in edit.chunks:
+            ...
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from collections import namedtuple
+
+TRANSCRIPT = os.getenv(
+    'TRANSCRIPT',
+    '/Users/deepakmalik/.gemini/antigravity/brain/1f0348c7-a051-4f7a-b596-d4413e8fdef0/.system_generated/logs/transcript.jsonl')
+
+EDIT_TOOLS = ('replace_file_content', 'multi_replace_file_content')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS edits (
+    id INTEGER PRIMARY KEY,
+    line_no INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    call_no INTEGER NOT NULL,
+    tool TEXT NOT NULL,
+    target_file TEXT,
+    instruction TEXT,
+    chunks TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS edits_target ON edits (target_file, line_no);
+CREATE INDEX IF NOT EXISTS edits_instruction ON edits (instruction);
+'''
+
+# chunks is a list of (target, replacement) pairs in the order the call listed them
+Edit = namedtuple('Edit', 'id line_no offset call_no tool target_file instruction chunks')
+
+
+def parse_args(args):
+    """
+    Tool-call args arrive as JSON-encoded strings, lists and objects; decode those
+    and leave every other value as it came ("42" and "true" stay strings).
+    """
+    parsed = {}
+    for key, value in (args or {}).items():
+        if isinstance(value, str) and value[:1] in ('"', '[', '{'):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        parsed[key] = value
+    return parsed
+
+
+def _like(text):
+    """Substring pattern for LIKE ... ESCAPE '\\' that matches % and _ literally."""
+    return '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def edit_chunks(tool, args):
+    if tool == 'replace_file_content':
+        return [(args.get('TargetContent', ''), args.get('ReplacementContent', ''))]
+    return [(c.get('TargetContent', ''), c.get('ReplacementContent', '')) for c in args.get('ReplacementChunks') or []]
+
+
+class TranscriptIndex:
+    def __init__(self, transcript=TRANSCRIPT, index_path=None):
+        self.transcript = transcript
+        self.index_path = index_path or transcript + '.index.sqlite3'
+        self.conn = sqlite3.connect(self.index_path)
+        self.conn.executescript(SCHEMA)
+        self.errors = 0
+
+    def _meta(self, key, default=None):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def _identity(self):
+        """(inode, sha1 of the first complete line) of the transcript as it is now."""
+        with open(self.transcript, 'rb') as f:
+            inode = os.fstat(f.fileno()).st_ino
+            first = f.readline()
+        return str(inode), hashlib.sha1(first).hexdigest() if first.endswith(b'\n') else ''
+
+    def refresh(self):
+        """Index any lines appended since the last run; rebuild if the file was replaced."""
+        size = os.path.getsize(self.transcript)
+        offset = int(self._meta('offset', 0))
+        line_no = int(self._meta('line_no', 0))
+        inode, first_line = self._identity()
+        if offset > size or (self._meta('inode'), self._meta('first_line')) != (inode, first_line):
+            self.conn.execute('DELETE FROM edits')
+            offset, line_no = 0, 0
+        if offset == size:
+            self._save_meta(offset, line_no, inode, first_line)
+            return self
+
+        rows = []
+        with open(self.transcript, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break  # partially written line; pick it up next time
+                # Cheap byte test before paying for json.loads on every line
+                if b'PLANNER_RESPONSE' in raw and b'replace_file_content' in raw:
+                    rows.extend(self._parse_line(raw, line_no, offset))
+                offset += len(raw)
+                line_no += 1
+
+        self.conn.executemany(
+            'INSERT INTO edits (line_no, offset, call_no, tool, target_file, instruction, chunks) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        self._save_meta(offset, line_no, inode, first_line)
+        return self
+
+    def _save_meta(self, offset, line_no, inode, first_line):
+        self.conn.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                              [('offset', str(offset)), ('line_no', str(line_no)), ('inode', inode),
+                               ('first_line', first_line)])
+        self.conn.commit()
+
+    def _parse_line(self, raw, line_no, offset):
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            self.errors += 1
+            return []
+        if data.get('type') != 'PLANNER_RESPONSE':
+            return []
+        rows = []
+        for call_no, call in enumerate(data.get('tool_calls', [])):
+            if call.get('name') not in EDIT_TOOLS:
+                continue
+            try:
+                args = parse_args(call.get('args'))
+                chunks = edit_chunks(call['name'], args)
+            except Exception:
+                self.errors += 1
+                continue
+            rows.append((line_no, offset, call_no, call['name'], args.get('TargetFile', ''),
+                         args.get('Instruction', ''), json.dumps(chunks)))
+        return rows
+
+    def edits(self, target=None, instruction=None, contains=None, reverse=False):
+        """
+        Edit calls in transcript order (or reversed). target and instruction are
+        case-insensitive substring filters; contains also searches the chunk text.
+        """
+        sql = 'SELECT id, line_no, offset, call_no, tool, target_file, instruction, chunks FROM edits WHERE 1'
+        args = []
+        if target:
+            sql += " AND target_file LIKE ? ESCAPE '\\'"
+            args.append(_like(target))
+        if instruction:
+            sql += " AND instruction LIKE ? ESCAPE '\\'"
+            args.append(_like(instruction))
+        if contains:
+            sql += " AND (instruction LIKE ? ESCAPE '\\' OR target_file LIKE ? ESCAPE '\\' OR chunks LIKE ? ESCAPE '\\')"
+            args += [_like(contains)] * 3
+        sql += ' ORDER BY line_no DESC, call_no DESC' if reverse else ' ORDER BY line_no, call_no'
+        for row in self.conn.execute(sql, args):
+            yield Edit(*row[:7], chunks=[tuple(c) for c in json.loads(row[7])])
+
+    def close(self):
+        self.conn.close()
+
+
+def open_index(transcript=TRANSCRIPT):
+    return TranscriptIndex(transcript).refresh()
+
+
+if __name__ == '__main__':
+    import sys
+
+    index = open_index(sys.argv[1] if len(sys.argv) > 1 else TRANSCRIPT)
+    total = index.conn.execute('SELECT COUNT(*) FROM edits').fetchone()[0]
+    print(f'{total} edit calls indexed in {index.index_path}')
+    for target_file, n in index.conn.execute(
+            'SELECT target_file, COUNT(*) FROM edits GROUP BY target_file ORDER BY 2 DESC'):
+        print(f'  {n:>6}  {target_file}')